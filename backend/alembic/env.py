@@ -12,15 +12,33 @@ from app.core.database import SQLALCHEMY_DATABASE_URL, Base
 # Tutaj importujemy tylko to, co na 100% istnieje w kodzie.
 # Dzięki temu Alembic "widzi" Twoje tabele i może wygenerować migracje.
 
+try:
+    # Wersje danych (cache / ETag)
+    from app.core.versions import ChangeVersion
+except ImportError:
+    pass
+
+try:
+    # Wspólne kubełki limitów logowania (RATE_LIMIT_SHARED)
+    from app.core.ratelimit import RateLimitBucket
+except ImportError:
+    pass
+
 try:
     # Moduł Tenancy (Najemcy, Użytkownicy)
     from app.modules.tenancy.models import Tenant, User
 except ImportError:
     pass
 
+try:
+    # Moduł Auth (kody przejęcia kont gości)
+    from app.modules.auth.models import AccountClaimToken
+except ImportError:
+    pass
+
 try:
     # Moduł Catalog (Produkty)
-    from app.modules.catalog.models import Product
+    from app.modules.catalog.models import Product, GlobalProduct, CatalogSearchTerm, EffectiveProduct, CategoryFacet
 except ImportError:
     pass
 
@@ -30,6 +48,14 @@ try:
 except ImportError:
     pass
 
+try:
+    # Moduł Orders (Zamówienia + archiwum)
+    from app.modules.orders.models import (
+        StoreOrder, OrderItem, ArchivedOrder, ArchivedOrderItem, ArchiveWatermark, SalesDailyRollup
+    )
+except ImportError:
+    pass
+
 # Moduł Sales (Zamówienia) - zakomentowany, dopóki nie stworzysz plików
 # try:
 #     from app.modules.sales.models import StoreOrder, OrderItem
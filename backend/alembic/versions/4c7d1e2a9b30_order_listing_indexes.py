@@ -0,0 +1,32 @@
+"""Order listing indexes
+
+Revision ID: 4c7d1e2a9b30
+Revises: 9ebefede9ee5
+Create Date: 2026-10-18 10:12:03.114502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7d1e2a9b30'
+down_revision: Union[str, Sequence[str], None] = '9ebefede9ee5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stronicowanie keyset /orders/manage i /orders/ (filtr + ORDER BY order_id z jednego indeksu)
+    op.create_index('ix_store_orders_tenant_order', 'store_orders', ['tenant_id', 'order_id'], unique=False)
+    op.create_index('ix_store_orders_user_order', 'store_orders', ['user_id', 'order_id'], unique=False)
+    # selectinload(StoreOrder.items) -> WHERE order_id IN (...)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_index('ix_store_orders_user_order', table_name='store_orders')
+    op.drop_index('ix_store_orders_tenant_order', table_name='store_orders')
@@ -0,0 +1,59 @@
+"""Effective products read model
+
+Revision ID: a2d8e5c1f036
+Revises: f4b6d0e8c217
+Create Date: 2026-10-18 17:05:41.602318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2d8e5c1f036'
+down_revision: Union[str, Sequence[str], None] = 'f4b6d0e8c217'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Produkt sklepu ze scalonymi polami katalogu globalnego (lista sklepu bez JOIN-a)
+    op.create_table('effective_products',
+        sa.Column('product_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('global_ref_id', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(length=150), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('sku', sa.String(length=50), nullable=True),
+        sa.Column('stock_quantity', sa.Integer(), nullable=True),
+        sa.Column('ean_code', sa.String(length=20), nullable=True),
+        sa.Column('category', sa.String(length=50), nullable=True),
+        sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index('ix_effective_tenant_product', 'effective_products', ['tenant_id', 'product_id'], unique=False)
+    op.create_index('ix_effective_tenant_price', 'effective_products', ['tenant_id', 'price', 'product_id'], unique=False)
+    op.create_index('ix_effective_tenant_name', 'effective_products', ['tenant_id', 'name', 'product_id'], unique=False)
+    op.create_index('ix_effective_tenant_category', 'effective_products', ['tenant_id', 'category', 'product_id'], unique=False)
+    op.create_index('ix_effective_global_ref', 'effective_products', ['global_ref_id'], unique=False)
+
+    # Wypełnienie z istniejących produktów (później utrzymywane przez aplikację)
+    op.execute("""
+        INSERT INTO effective_products
+            (product_id, tenant_id, global_ref_id, name, price, description, sku, stock_quantity, ean_code, category)
+        SELECT p.product_id, p.tenant_id, p.global_ref_id, p.name, p.price,
+               COALESCE(p.description, g.base_description), p.sku, p.stock_quantity, g.ean_code, g.category
+        FROM products p
+        LEFT JOIN global_products g ON g.global_id = p.global_ref_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_effective_global_ref', table_name='effective_products')
+    op.drop_index('ix_effective_tenant_category', table_name='effective_products')
+    op.drop_index('ix_effective_tenant_name', table_name='effective_products')
+    op.drop_index('ix_effective_tenant_price', table_name='effective_products')
+    op.drop_index('ix_effective_tenant_product', table_name='effective_products')
+    op.drop_table('effective_products')
@@ -0,0 +1,64 @@
+"""Order archive tables
+
+Revision ID: a81f3c5d2e47
+Revises: 4c7d1e2a9b30
+Create Date: 2026-10-18 11:40:27.508311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81f3c5d2e47'
+down_revision: Union[str, Sequence[str], None] = '4c7d1e2a9b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # --- ARCHIWUM ZAMÓWIEŃ ---
+    op.create_table('store_orders_archive',
+        sa.Column('order_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('first_name', sa.String(length=100), nullable=True),
+        sa.Column('last_name', sa.String(length=100), nullable=True),
+        sa.Column('address', sa.String(length=255), nullable=True),
+        sa.Column('phone_number', sa.String(length=20), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('order_id')
+    )
+    op.create_index('ix_store_orders_archive_tenant_order', 'store_orders_archive', ['tenant_id', 'order_id'], unique=False)
+
+    op.create_table('order_items_archive',
+        sa.Column('item_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_price', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['store_orders_archive.order_id'], ),
+        sa.PrimaryKeyConstraint('item_id')
+    )
+    op.create_index(op.f('ix_order_items_archive_order_id'), 'order_items_archive', ['order_id'], unique=False)
+
+    # --- ZNACZNIK POSTĘPU ARCHIWIZACJI ---
+    op.create_table('archive_watermarks',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('last_order_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('archive_watermarks')
+    op.drop_index(op.f('ix_order_items_archive_order_id'), table_name='order_items_archive')
+    op.drop_table('order_items_archive')
+    op.drop_index('ix_store_orders_archive_tenant_order', table_name='store_orders_archive')
+    op.drop_table('store_orders_archive')
@@ -0,0 +1,46 @@
+"""Category facets
+
+Revision ID: b6f1c9d4e852
+Revises: a2d8e5c1f036
+Create Date: 2026-10-18 17:52:09.318245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f1c9d4e852'
+down_revision: Union[str, Sequence[str], None] = 'a2d8e5c1f036'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Liczniki produktów per kategoria (tenant_id = 0 - katalog globalny)
+    op.create_table('category_facets',
+        sa.Column('tenant_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('product_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id', 'category')
+    )
+
+    # Stan początkowy z danych (później utrzymywany przyrostowo przez aplikację)
+    op.execute("""
+        INSERT INTO category_facets (tenant_id, category, product_count)
+        SELECT 0, category, COUNT(*) FROM global_products
+        WHERE category IS NOT NULL
+        GROUP BY category
+    """)
+    op.execute("""
+        INSERT INTO category_facets (tenant_id, category, product_count)
+        SELECT tenant_id, category, COUNT(*) FROM effective_products
+        WHERE category IS NOT NULL
+        GROUP BY tenant_id, category
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('category_facets')
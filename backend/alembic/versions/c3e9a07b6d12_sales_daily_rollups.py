@@ -0,0 +1,42 @@
+"""Sales daily rollups
+
+Revision ID: c3e9a07b6d12
+Revises: a81f3c5d2e47
+Create Date: 2026-10-18 13:05:44.270918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9a07b6d12'
+down_revision: Union[str, Sequence[str], None] = 'a81f3c5d2e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # --- SUMY SPRZEDAŻY (per sklep / dzień / produkt) ---
+    # Po migracji uzupełnij dane: python -m app.modules.orders.rollups rebuild
+    op.create_table('sales_daily_rollups',
+        sa.Column('tenant_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('placed_orders', sa.Integer(), nullable=False),
+        sa.Column('placed_units', sa.Integer(), nullable=False),
+        sa.Column('placed_revenue', sa.Float(), nullable=False),
+        sa.Column('confirmed_orders', sa.Integer(), nullable=False),
+        sa.Column('confirmed_units', sa.Integer(), nullable=False),
+        sa.Column('confirmed_revenue', sa.Float(), nullable=False),
+        sa.Column('rejected_orders', sa.Integer(), nullable=False),
+        sa.Column('rejected_units', sa.Integer(), nullable=False),
+        sa.Column('rejected_revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id', 'day', 'product_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sales_daily_rollups')
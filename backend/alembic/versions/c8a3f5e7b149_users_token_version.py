@@ -0,0 +1,27 @@
+"""Users token version
+
+Revision ID: c8a3f5e7b149
+Revises: b6f1c9d4e852
+Create Date: 2026-10-18 18:41:57.884120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8a3f5e7b149'
+down_revision: Union[str, Sequence[str], None] = 'b6f1c9d4e852'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Wersja tokenów konta (claim "ver") - podbicie unieważnia wszystkie wydane tokeny
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
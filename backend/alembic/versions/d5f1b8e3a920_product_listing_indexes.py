@@ -0,0 +1,31 @@
+"""Product listing indexes
+
+Revision ID: d5f1b8e3a920
+Revises: c3e9a07b6d12
+Create Date: 2026-10-18 14:21:37.502118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f1b8e3a920'
+down_revision: Union[str, Sequence[str], None] = 'c3e9a07b6d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stronicowanie keyset /catalog/local/{tenant_id} - jeden indeks na każde sortowanie
+    op.create_index('ix_products_tenant_product', 'products', ['tenant_id', 'product_id'], unique=False)
+    op.create_index('ix_products_tenant_price', 'products', ['tenant_id', 'price', 'product_id'], unique=False)
+    op.create_index('ix_products_tenant_name', 'products', ['tenant_id', 'name', 'product_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_tenant_name', table_name='products')
+    op.drop_index('ix_products_tenant_price', table_name='products')
+    op.drop_index('ix_products_tenant_product', table_name='products')
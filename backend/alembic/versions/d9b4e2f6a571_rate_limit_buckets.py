@@ -0,0 +1,32 @@
+"""Rate limit buckets
+
+Revision ID: d9b4e2f6a571
+Revises: c8a3f5e7b149
+Create Date: 2026-10-18 20:12:43.506218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b4e2f6a571'
+down_revision: Union[str, Sequence[str], None] = 'c8a3f5e7b149'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Kubełki limitów logowania / rejestracji wspólne dla wielu procesów API (RATE_LIMIT_SHARED=1)
+    op.create_table('rate_limit_buckets',
+        sa.Column('bucket_key', sa.String(length=200), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('bucket_key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_buckets')
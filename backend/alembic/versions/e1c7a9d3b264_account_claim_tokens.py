@@ -0,0 +1,35 @@
+"""Account claim tokens
+
+Revision ID: e1c7a9d3b264
+Revises: d9b4e2f6a571
+Create Date: 2026-10-18 23:41:09.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1c7a9d3b264'
+down_revision: Union[str, Sequence[str], None] = 'd9b4e2f6a571'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Jednorazowe kody przejęcia kont gości (skrót SHA-256, wysyłane e-mailem)
+    op.create_table('account_claim_tokens',
+        sa.Column('token_hash', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.TIMESTAMP(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+        sa.PrimaryKeyConstraint('token_hash')
+    )
+    op.create_index(op.f('ix_account_claim_tokens_user_id'), 'account_claim_tokens', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_account_claim_tokens_user_id'), table_name='account_claim_tokens')
+    op.drop_table('account_claim_tokens')
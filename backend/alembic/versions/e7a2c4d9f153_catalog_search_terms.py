@@ -0,0 +1,62 @@
+"""Catalog search terms
+
+Revision ID: e7a2c4d9f153
+Revises: d5f1b8e3a920
+Create Date: 2026-10-18 15:02:11.837420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.modules.catalog.search import document_terms
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2c4d9f153'
+down_revision: Union[str, Sequence[str], None] = 'd5f1b8e3a920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # --- INDEKS WYSZUKIWANIA KATALOGU (trigramy + słowa) ---
+    op.create_table('catalog_search_terms',
+        sa.Column('scope', sa.String(length=10), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('kind', sa.String(length=1), nullable=False),
+        sa.Column('term', sa.String(length=50), nullable=False),
+        sa.Column('entity_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.PrimaryKeyConstraint('scope', 'tenant_id', 'kind', 'term', 'entity_id')
+    )
+    op.create_index('ix_catalog_search_terms_entity', 'catalog_search_terms', ['scope', 'entity_id'], unique=False)
+
+    # Stan początkowy z istniejących produktów (później utrzymywany przez aplikację) - domyślny backend
+    # "trigram" od razu coś znajduje; ponowna przebudowa: python -m app.modules.catalog.search reindex
+    terms = sa.table('catalog_search_terms',
+        sa.column('scope', sa.String), sa.column('tenant_id', sa.Integer), sa.column('kind', sa.String),
+        sa.column('term', sa.String), sa.column('entity_id', sa.Integer)
+    )
+    sources = [
+        ('global', "SELECT global_id, 0, name, ean_code FROM global_products"),
+        ('local', "SELECT product_id, tenant_id, name, sku FROM products"),
+    ]
+    bind = op.get_bind()
+    for scope, query in sources:
+        pending = []
+        for entity_id, tenant_id, *texts in bind.execute(sa.text(query)).fetchall():
+            pending.extend(
+                {"scope": scope, "tenant_id": tenant_id, "kind": kind, "term": term, "entity_id": entity_id}
+                for kind, term in document_terms(texts)
+            )
+            if len(pending) >= 5000:
+                bind.execute(terms.insert(), pending)
+                pending = []
+        if pending:
+            bind.execute(terms.insert(), pending)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_catalog_search_terms_entity', table_name='catalog_search_terms')
+    op.drop_table('catalog_search_terms')
@@ -0,0 +1,79 @@
+"""Sales rollup shards
+
+Revision ID: f2a8c6e4d917
+Revises: e1c7a9d3b264
+Create Date: 2026-10-19 00:26:51.734102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a8c6e4d917'
+down_revision: Union[str, Sequence[str], None] = 'e1c7a9d3b264'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MEASURES = (
+    "placed_orders, placed_units, placed_revenue, "
+    "confirmed_orders, confirmed_units, confirmed_revenue, "
+    "rejected_orders, rejected_units, rejected_revenue"
+)
+
+
+def upgrade() -> None:
+    # --- SUMY SPRZEDAŻY ROZŁOŻONE NA SHARDY ---
+    # Nowy klucz główny - tabelę budujemy od nowa, a dotychczasowe sumy przenosimy do shardu 0
+    op.rename_table('sales_daily_rollups', 'sales_daily_rollups_old')
+    op.create_table('sales_daily_rollups',
+        sa.Column('tenant_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('shard', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('placed_orders', sa.Integer(), nullable=False),
+        sa.Column('placed_units', sa.Integer(), nullable=False),
+        sa.Column('placed_revenue', sa.Float(), nullable=False),
+        sa.Column('confirmed_orders', sa.Integer(), nullable=False),
+        sa.Column('confirmed_units', sa.Integer(), nullable=False),
+        sa.Column('confirmed_revenue', sa.Float(), nullable=False),
+        sa.Column('rejected_orders', sa.Integer(), nullable=False),
+        sa.Column('rejected_units', sa.Integer(), nullable=False),
+        sa.Column('rejected_revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id', 'day', 'product_id', 'shard')
+    )
+    op.execute(f"""
+        INSERT INTO sales_daily_rollups (tenant_id, day, product_id, shard, {MEASURES})
+        SELECT tenant_id, day, product_id, 0, {MEASURES} FROM sales_daily_rollups_old
+    """)
+    op.drop_table('sales_daily_rollups_old')
+
+
+def downgrade() -> None:
+    # Shardy jednego dnia / produktu sumujemy z powrotem do jednego wiersza
+    op.rename_table('sales_daily_rollups', 'sales_daily_rollups_old')
+    op.create_table('sales_daily_rollups',
+        sa.Column('tenant_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('product_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('placed_orders', sa.Integer(), nullable=False),
+        sa.Column('placed_units', sa.Integer(), nullable=False),
+        sa.Column('placed_revenue', sa.Float(), nullable=False),
+        sa.Column('confirmed_orders', sa.Integer(), nullable=False),
+        sa.Column('confirmed_units', sa.Integer(), nullable=False),
+        sa.Column('confirmed_revenue', sa.Float(), nullable=False),
+        sa.Column('rejected_orders', sa.Integer(), nullable=False),
+        sa.Column('rejected_units', sa.Integer(), nullable=False),
+        sa.Column('rejected_revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id', 'day', 'product_id')
+    )
+    sums = ", ".join(f"SUM({m})" for m in MEASURES.split(", "))
+    op.execute(f"""
+        INSERT INTO sales_daily_rollups (tenant_id, day, product_id, {MEASURES})
+        SELECT tenant_id, day, product_id, {sums} FROM sales_daily_rollups_old
+        GROUP BY tenant_id, day, product_id
+    """)
+    op.drop_table('sales_daily_rollups_old')
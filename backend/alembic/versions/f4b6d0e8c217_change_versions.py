@@ -0,0 +1,32 @@
+"""Change versions
+
+Revision ID: f4b6d0e8c217
+Revises: e7a2c4d9f153
+Create Date: 2026-10-18 15:48:26.119734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b6d0e8c217'
+down_revision: Union[str, Sequence[str], None] = 'e7a2c4d9f153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Liczniki zmian danych (klucze cache / ETag), np. "catalog:tenant:5"
+    op.create_table('change_versions',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('change_versions')
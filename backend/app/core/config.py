@@ -0,0 +1,163 @@
+import os
+
+# Ustawienia aplikacji czytane ze zmiennych środowiskowych (ustawia je Docker / plik .env).
+# Wartości domyślne są dobrane pod kontener API z limitem 0.5 CPU / 512 MB.
+
+# --- BAZA DANYCH: SILNIK ASYNC ---
+# Pula połączeń silnika async (endpointy odczytu) - osobna od puli silnika sync
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "10"))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "20"))
+
+# --- ZAMÓWIENIA: REZERWACJA STANÓW MAGAZYNOWYCH ---
+# Ile razy ponawiamy transakcję po konflikcie serializacji / deadlocku
+ORDER_TX_MAX_ATTEMPTS = int(os.getenv("ORDER_TX_MAX_ATTEMPTS", "3"))
+# Bazowe opóźnienie (w sekundach) między próbami - rośnie wykładniczo
+ORDER_TX_RETRY_BACKOFF = float(os.getenv("ORDER_TX_RETRY_BACKOFF", "0.05"))
+# Maksymalna liczba zamówień w jednym POST /orders/bulk-status (Oracle: max 1000 elementów w IN)
+BULK_STATUS_MAX_ORDERS = int(os.getenv("BULK_STATUS_MAX_ORDERS", "1000"))
+
+# --- ZAMÓWIENIA: LISTY ---
+# Domyślny i maksymalny rozmiar strony dla /orders/ i /orders/manage
+ORDERS_PAGE_SIZE = int(os.getenv("ORDERS_PAGE_SIZE", "50"))
+ORDERS_PAGE_MAX = int(os.getenv("ORDERS_PAGE_MAX", "200"))
+# Ile wierszy naraz pobiera kursor serwerowy przy eksporcie zamówień
+ORDERS_EXPORT_CHUNK_ROWS = int(os.getenv("ORDERS_EXPORT_CHUNK_ROWS", "1000"))
+
+# --- KLUCZE IDEMPOTENCJI (nagłówek Idempotency-Key) ---
+# Jak długo pamiętamy odpowiedź dla klucza i ile kluczy trzymamy w pamięci procesu
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+# Ile czekamy na wynik równoległego żądania z tym samym kluczem
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+
+# --- ZAMÓWIENIA GOŚCI: GROUP COMMIT ---
+# Włącza zapis zamówień gości paczkami przez wątek w tle (1/true/yes)
+GUEST_ORDER_BATCHING = os.getenv("GUEST_ORDER_BATCHING", "0").lower() in ("1", "true", "yes")
+# Maksymalna wielkość paczki i maksymalne czekanie na jej zapełnienie (ms)
+GUEST_BATCH_MAX_SIZE = int(os.getenv("GUEST_BATCH_MAX_SIZE", "50"))
+GUEST_BATCH_MAX_DELAY_MS = float(os.getenv("GUEST_BATCH_MAX_DELAY_MS", "20"))
+# Pojemność kolejki i czas czekania na miejsce w niej, zanim odpowiemy 503
+GUEST_QUEUE_MAX_SIZE = int(os.getenv("GUEST_QUEUE_MAX_SIZE", "500"))
+GUEST_QUEUE_PUT_TIMEOUT = float(os.getenv("GUEST_QUEUE_PUT_TIMEOUT", "0.1"))
+# Ile żądanie czeka na zapis swojej paczki (s)
+GUEST_ORDER_RESULT_TIMEOUT = float(os.getenv("GUEST_ORDER_RESULT_TIMEOUT", "10"))
+
+# --- ZAMÓWIENIA: ARCHIWIZACJA ---
+# Zatwierdzone zamówienia starsze niż tyle dni trafiają do archiwum (odrzucone - zawsze)
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+# Ile zamówień przenosimy w jednej transakcji
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+# --- ZAMÓWIENIA: STATYSTYKI SPRZEDAŻY ---
+# Domyślny zakres /orders/stats (ostatnie N dni) i maksymalny zakres jednego zapytania
+STATS_DEFAULT_DAYS = int(os.getenv("STATS_DEFAULT_DAYS", "30"))
+STATS_MAX_DAYS = int(os.getenv("STATS_MAX_DAYS", "366"))
+# Na ile wierszy (shardów) dzielimy sumy jednego sklepu / dnia / produktu - równoległe transakcje
+# zamówień trafiają w różne wiersze zamiast czekać na blokadę jednego (odczyt sumuje shardy)
+ROLLUP_SHARDS = int(os.getenv("ROLLUP_SHARDS", "8"))
+
+# --- KATALOG: LISTY PRODUKTÓW ---
+# Maksymalny rozmiar strony /catalog/local/{tenant_id}
+CATALOG_PAGE_MAX = int(os.getenv("CATALOG_PAGE_MAX", "100"))
+# Jak długo (s) pamiętamy liczbę wyników (total) i ile takich liczników trzymamy
+CATALOG_COUNT_CACHE_TTL = float(os.getenv("CATALOG_COUNT_CACHE_TTL", "60"))
+CATALOG_COUNT_CACHE_SIZE = int(os.getenv("CATALOG_COUNT_CACHE_SIZE", "2048"))
+
+# --- KATALOG: WYSZUKIWANIE ---
+# Implementacja wyszukiwarki: trigram (indeks catalog_search_terms) albo like (stare ILIKE, pełny skan)
+CATALOG_SEARCH_BACKEND = os.getenv("CATALOG_SEARCH_BACKEND", "trigram").lower()
+# Jaka część trigramów zapytania musi wystąpić w produkcie (0-1), żeby uznać go za trafienie
+CATALOG_SEARCH_MIN_SIMILARITY = float(os.getenv("CATALOG_SEARCH_MIN_SIMILARITY", "0.5"))
+# Ile znaków zapytania bierzemy pod uwagę (ogranicza liczbę trigramów w IN)
+CATALOG_SEARCH_MAX_QUERY = int(os.getenv("CATALOG_SEARCH_MAX_QUERY", "100"))
+# Maksymalna liczba podpowiedzi (autocomplete)
+CATALOG_SUGGEST_LIMIT = int(os.getenv("CATALOG_SUGGEST_LIMIT", "10"))
+
+# --- CACHE ODPOWIEDZI I WERSJE DANYCH ---
+# Jak długo (s) proces ufa zapamiętanej wersji danych zmienionych przez inny proces API
+VERSION_MEMO_TTL = float(os.getenv("VERSION_MEMO_TTL", "1"))
+# Cache list /catalog/local/{tenant_id}: liczba wpisów, TTL (s) i limit pamięci (bajty)
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "5000"))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_MAX_BYTES = int(os.getenv("CATALOG_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# --- KATALOG: IMPORT MASOWY ---
+# Ile wierszy wstawiamy w jednej transakcji i ile błędów (z numerami linii) zwracamy w odpowiedzi
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "1000"))
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+
+# --- KATALOG: FASETY KATEGORII ---
+# Co ile sekund worker uzgadnia liczniki category_facets z danymi (0 = wyłączone)
+FACET_RECONCILE_INTERVAL = float(os.getenv("FACET_RECONCILE_INTERVAL", "3600"))
+
+# --- KATALOG: MIGAWKA CEN I STANÓW (KOSZYK / WYCENA ZAMÓWIEŃ) ---
+# Ile migawek sklepów trzyma proces, limit ich pamięci (bajty) i po ilu sekundach bez użycia wypadają
+CATALOG_SNAPSHOT_MAX_TENANTS = int(os.getenv("CATALOG_SNAPSHOT_MAX_TENANTS", "256"))
+CATALOG_SNAPSHOT_MAX_BYTES = int(os.getenv("CATALOG_SNAPSHOT_MAX_BYTES", str(16 * 1024 * 1024)))
+CATALOG_SNAPSHOT_TTL = float(os.getenv("CATALOG_SNAPSHOT_TTL", "3600"))
+# Katalog na pliki migawek mapowane w pamięć (wspólne dla workerów uvicorn); pusty = tylko pamięć procesu
+CATALOG_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", "")
+# Migawkę przebudowują tylko zmiany cen / produktów. Stany po zamówieniach proces, który je zmienił,
+# nanosi od razu; pozostałe procesy doczytują samą kolumnę stanów najwyżej co tyle sekund
+CATALOG_SNAPSHOT_STOCK_REFRESH = float(os.getenv("CATALOG_SNAPSHOT_STOCK_REFRESH", "5"))
+
+# --- KATALOG: MASOWA ZMIANA CEN I STANÓW ---
+# Maksymalna liczba ID / SKU w filtrze jednego żądania (Oracle: max 1000 elementów w IN)
+BULK_UPDATE_MAX_KEYS = int(os.getenv("BULK_UPDATE_MAX_KEYS", "1000"))
+
+# --- UWIERZYTELNIANIE ---
+# Jak długo (s) proces ufa zapamiętanemu stanowi konta (aktywne / wersja tokenów) - to też
+# maksymalne opóźnienie odcięcia dezaktywowanego konta w innych procesach API
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+# Ile kont pamiętamy w jednym procesie (LRU)
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+
+# --- HASŁA (bcrypt w osobnej puli procesów) ---
+# Procesy haszujące (0 = w wątku żądania), limit oczekujących haszowań (ponad nim 503) i timeout (s)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "1"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+# --- TOKENY (dostęp + odświeżanie) ---
+# Czas życia tokenu dostępu (min) i refresh tokenu (dni) - nowy token dostępu bez ponownego logowania
+ACCESS_TOKEN_TTL_MINUTES = float(os.getenv("ACCESS_TOKEN_TTL_MINUTES", "15"))
+REFRESH_TOKEN_TTL_DAYS = float(os.getenv("REFRESH_TOKEN_TTL_DAYS", "14"))
+# Ile zweryfikowanych tokenów dostępu (skrót -> claimy) pamięta jeden proces
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
+# --- LOGOWANIE I REJESTRACJA: LIMITY PRÓB (token bucket) ---
+# Prób na minutę i ile prób naraz (burst) - per adres IP (0 prób/min = bez limitu)
+LOGIN_IP_RATE = float(os.getenv("LOGIN_IP_RATE", "30"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "10"))
+# Nieudane logowania per para (e-mail, IP) - udane nie zużywają limitu, a cudze IP nie blokuje konta
+LOGIN_EMAIL_RATE = float(os.getenv("LOGIN_EMAIL_RATE", "5"))
+LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", "5"))
+REGISTER_IP_RATE = float(os.getenv("REGISTER_IP_RATE", "5"))
+REGISTER_IP_BURST = int(os.getenv("REGISTER_IP_BURST", "3"))
+# Odświeżenia tokenu per IP
+REFRESH_IP_RATE = float(os.getenv("REFRESH_IP_RATE", "60"))
+REFRESH_IP_BURST = int(os.getenv("REFRESH_IP_BURST", "20"))
+# Ile kubełków (IP / e-maili) trzyma jeden proces (LRU)
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "50000"))
+# Wspólne kubełki w bazie (tabela rate_limit_buckets) dla wielu workerów uvicorn (1/true/yes)
+RATE_LIMIT_SHARED = os.getenv("RATE_LIMIT_SHARED", "0").lower() in ("1", "true", "yes")
+
+# --- PRZEJĘCIE KONTA GOŚCIA (jednorazowy kod wysyłany e-mailem) ---
+# Ważność kodu (min)
+CLAIM_TOKEN_TTL_MINUTES = float(os.getenv("CLAIM_TOKEN_TTL_MINUTES", "30"))
+# Prośby o kod: na minutę i burst per IP i per e-mail; próby użycia kodu per IP (0 prób/min = bez limitu)
+CLAIM_REQUEST_IP_RATE = float(os.getenv("CLAIM_REQUEST_IP_RATE", "5"))
+CLAIM_REQUEST_IP_BURST = int(os.getenv("CLAIM_REQUEST_IP_BURST", "3"))
+CLAIM_REQUEST_EMAIL_RATE = float(os.getenv("CLAIM_REQUEST_EMAIL_RATE", "1"))
+CLAIM_REQUEST_EMAIL_BURST = int(os.getenv("CLAIM_REQUEST_EMAIL_BURST", "3"))
+CLAIM_IP_RATE = float(os.getenv("CLAIM_IP_RATE", "10"))
+CLAIM_IP_BURST = int(os.getenv("CLAIM_IP_BURST", "5"))
+
+# --- POCZTA (SMTP) ---
+# Bez SMTP_HOST wiadomości trafiają tylko do logu API (środowisko deweloperskie)
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_FROM = os.getenv("SMTP_FROM", "sklep@localhost")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1").lower() in ("1", "true", "yes")
@@ -1,6 +1,9 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
+from app.core.config import DB_ASYNC_POOL_SIZE, DB_ASYNC_MAX_OVERFLOW
 
 # --- POPRAWKA ---
 # Pobieramy adres bazy ze zmiennych środowiskowych (które ustawia Docker).
@@ -25,4 +28,35 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# --- SILNIK ASYNC (endpointy async def) ---
+# Ta sama baza przez sterownik async: oracledb w trybie async, lokalnie aiosqlite zamiast pysqlite.
+# Żądanie czekające na bazę nie zajmuje wątku z puli FastAPI.
+def to_async_url(url: str) -> str:
+    if url.startswith("oracle+oracledb://"):
+        return "oracle+oracledb_async://" + url[len("oracle+oracledb://"):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_SQLALCHEMY_DATABASE_URL", to_async_url(SQLALCHEMY_DATABASE_URL))
+
+# Rozmiar puli tylko dla baz z pulą kolejkową - SQLite w pamięci dostaje StaticPool, który tych argumentów nie przyjmuje
+if make_url(ASYNC_SQLALCHEMY_DATABASE_URL).get_backend_name() == "sqlite":
+    ASYNC_POOL_ARGS = {}
+else:
+    ASYNC_POOL_ARGS = {"pool_size": DB_ASYNC_POOL_SIZE, "max_overflow": DB_ASYNC_MAX_OVERFLOW}
+
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **ASYNC_POOL_ARGS)
+
+# expire_on_commit=False - obiekty zwrócone z endpointu nie mogą już doczytywać kolumn (brak IO poza await)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+# Dependency dla endpointów async def
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -0,0 +1,35 @@
+import hashlib
+from typing import Hashable, Optional
+from fastapi.responses import Response
+
+# Cache-Control dla list: przeglądarka / CDN mogą trzymać kopię, ale zawsze pytają o ważność (ETag)
+PUBLIC_REVALIDATE = "public, no-cache"
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def make_etag(version_name: str, version: int, key: Hashable = None) -> str:
+    """
+    ETag z wersji danych (change_versions) i parametrów żądania - liczony bez czytania samych danych.
+    Ten sam we wszystkich procesach API, bo zależy tylko od wersji w bazie.
+    """
+    digest = hashlib.sha1(repr((version_name, version, key)).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Nagłówek If-None-Match: "*", pojedynczy tag albo lista; porównanie słabe (W/"x" == "x")."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
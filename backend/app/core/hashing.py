@@ -0,0 +1,150 @@
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from app.core.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_TIMEOUT
+from app.core.security import get_password_hash, verify_password, is_password_usable
+
+# Ile ostatnich pomiarów trzymamy do percentyli czasu haszowania
+LATENCY_WINDOW = 500
+
+
+class PasswordHasher:
+    """
+    bcrypt poza procesem API: osobna, mała pula procesów (nie zajmuje GIL ani CPU wątków
+    obsługujących katalog i zamówienia) z limitem oczekujących zadań.
+    Gdy kolejka jest pełna, od razu zwracamy 503 zamiast ustawiać kolejne logowania w kolejce.
+    workers = 0 - haszowanie w bieżącym wątku (lokalne uruchomienia / testy).
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.failed = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Pula tworzona leniwie - już w procesie workera uvicorn, nie w procesie nadrzędnym
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._pool
+
+    def _run(self, fn: Callable, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise _busy()
+
+        started = time.monotonic()
+        with self._stats_lock:
+            self.in_flight += 1
+        try:
+            if self.workers <= 0:
+                try:
+                    return fn(*args)
+                finally:
+                    self._slots.release()
+                    self._completed(started)
+
+            try:
+                future = self._get_pool().submit(fn, *args)
+            except BaseException:
+                self._slots.release()
+                raise
+            # Miejsce w kolejce zwalnia dopiero koniec zadania w puli, nie koniec czekania żądania -
+            # zadanie porzucone po timeoucie nadal zajmuje proces, więc limit musi je liczyć
+            future.add_done_callback(lambda _: self._slots.release())
+
+            # Wątek żądania czeka bez GIL - CPU zużywa tylko proces z puli
+            try:
+                result = future.result(timeout=self.timeout)
+            except FutureTimeout:
+                # Zadanie jeszcze w kolejce puli da się anulować; uruchomione kończy się samo
+                future.cancel()
+                with self._stats_lock:
+                    self.timed_out += 1
+                raise _busy()
+            self._completed(started)
+            return result
+        except BrokenProcessPool:
+            # Proces haszujący padł (np. OOM) - następne żądanie dostanie nową pulę
+            with self._pool_lock:
+                self._pool = None
+            with self._stats_lock:
+                self.failed += 1
+            raise _busy()
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+
+    def _completed(self, started: float) -> None:
+        elapsed = time.monotonic() - started
+        with self._stats_lock:
+            self.completed += 1
+            self._latencies.append(elapsed)
+
+    def hash(self, password: str) -> str:
+        return self._run(get_password_hash, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        # Konto bez hasła (np. gość) - odpowiedź bez bcrypt i bez miejsca w kolejce
+        if not is_password_usable(hashed_password):
+            return False
+        return self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            in_flight, completed, rejected = self.in_flight, self.completed, self.rejected
+            timed_out, failed = self.timed_out, self.failed
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": in_flight,
+            "completed": completed,
+            "rejected": rejected,
+            "timed_out": timed_out,
+            "failed": failed,
+            "latency_ms_p50": percentile(0.5),
+            "latency_ms_p95": percentile(0.95),
+            "latency_ms_max": round(latencies[-1] * 1000, 1) if latencies else None,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Zbyt wiele logowań naraz. Spróbuj ponownie za chwilę.",
+        headers={"Retry-After": "1"},
+    )
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_TIMEOUT)
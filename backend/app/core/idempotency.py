@@ -0,0 +1,143 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+from fastapi import HTTPException
+from app.core.config import IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_WAIT_SECONDS
+
+# Maksymalna długość nagłówka Idempotency-Key
+MAX_KEY_LENGTH = 255
+
+
+class PendingResult(HTTPException):
+    """
+    Operacja trwa dalej w tle (np. zapis paczki zamówień), a żądanie przestało czekać.
+    Klient dostaje 503 z Retry-After, a wpis klucza zostaje "w toku" do rozstrzygnięcia future -
+    ponowienie z tym samym Idempotency-Key dostanie wynik tego wykonania zamiast drugiego zamówienia.
+    """
+
+    def __init__(self, future: Future, build_response: Callable[[Any], Any], detail: str):
+        super().__init__(status_code=503, detail=detail, headers={"Retry-After": "1"})
+        self.future = future
+        self.build_response = build_response
+
+
+class _Entry:
+    """Wpis w magazynie: w trakcie wykonania (event) albo gotowa odpowiedź (response)."""
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.event = threading.Event()
+        self.done = False
+        self.response: Any = None
+        self.error: Optional[BaseException] = None
+        self.expires_at = 0.0
+
+
+class IdempotencyStore:
+    """
+    Magazyn kluczy idempotencji w pamięci procesu (TTL + limit liczby wpisów).
+    Powtórzony klucz zwraca zapisaną odpowiedź bez dotykania bazy, a równoległe
+    duplikaty czekają na wynik jednego, trwającego wykonania.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, wait_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.wait_seconds = wait_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> None:
+        # Usuwamy przeterminowane, a przy przepełnieniu najstarsze zakończone wpisy.
+        # Wpisów w trakcie wykonania nie ruszamy - czekają na nie inne wątki.
+        over_limit = len(self._entries) - self.max_entries
+        for key in list(self._entries.keys()):
+            entry = self._entries[key]
+            if not entry.done:
+                continue
+            if entry.expires_at <= now or over_limit > 0:
+                del self._entries[key]
+                over_limit -= 1
+
+    def execute(self, key: str, fingerprint: str, operation: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.done and entry.expires_at <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    self._evict(now)
+                entry = _Entry(fingerprint)
+                self._entries[key] = entry
+                leader = True
+            else:
+                leader = False
+
+        if entry.fingerprint != fingerprint:
+            raise HTTPException(status_code=422, detail="Ten Idempotency-Key został już użyty z inną treścią żądania")
+
+        if not leader:
+            # Duplikat - czekamy na wynik pierwszego wykonania zamiast liczyć drugi raz
+            if not entry.event.wait(self.wait_seconds):
+                raise HTTPException(status_code=409, detail="Żądanie z tym Idempotency-Key jest nadal przetwarzane")
+            if entry.error is not None:
+                raise entry.error
+            return entry.response
+
+        try:
+            response = operation()
+        except PendingResult as e:
+            # Wynik przyjdzie później - wpis czeka na future (callback rozstrzyga go tak jak zwykłe wykonanie)
+            build_response = e.build_response
+            e.future.add_done_callback(lambda future: self._settle(key, entry, future, build_response))
+            raise
+        except BaseException as e:
+            self._fail(key, entry, e)
+            raise
+
+        self._succeed(entry, response)
+        return response
+
+    def _succeed(self, entry: _Entry, response: Any) -> None:
+        entry.response = response
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        entry.done = True
+        entry.event.set()
+
+    def _fail(self, key: str, entry: _Entry, error: BaseException) -> None:
+        # Błędów nie zapamiętujemy - kolejna próba z tym kluczem wykona się od nowa
+        entry.error = error
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        entry.event.set()
+
+    def _settle(self, key: str, entry: _Entry, future: Future, build_response: Callable[[Any], Any]) -> None:
+        try:
+            response = build_response(future.result())
+        except BaseException as e:
+            self._fail(key, entry, e)
+            return
+        self._succeed(entry, response)
+
+
+def request_fingerprint(payload) -> str:
+    """Skrót treści żądania (Pydantic) - ten sam klucz z innym koszykiem to błąd klienta."""
+    return hashlib.sha256(payload.model_dump_json().encode("utf-8")).hexdigest()
+
+
+idempotency_store = IdempotencyStore(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_WAIT_SECONDS)
+
+
+def run_idempotent(key: Optional[str], scope: str, payload, operation: Callable[[], Any]) -> Any:
+    """Wykonuje operation() raz na (scope, Idempotency-Key). Bez nagłówka działa jak zwykłe wywołanie."""
+    if not key:
+        return operation()
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key może mieć maksymalnie {MAX_KEY_LENGTH} znaków")
+    return idempotency_store.execute(f"{scope}:{key}", request_fingerprint(payload), operation)
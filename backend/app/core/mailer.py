@@ -0,0 +1,29 @@
+import smtplib
+import sys
+from email.message import EmailMessage
+from app.core.config import SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SMTP_FROM, SMTP_STARTTLS
+
+
+def send_email(to: str, subject: str, body: str) -> None:
+    """
+    Wysyła wiadomość tekstową przez SMTP (wywoływane jako zadanie w tle, po odpowiedzi).
+    Bez SMTP_HOST tylko wypisuje ją do logu - błąd wysyłki też kończy się wpisem w logu, nie wyjątkiem.
+    """
+    if not SMTP_HOST:
+        print(f"[Mail] SMTP nie jest skonfigurowany. Do: {to} | {subject}\n{body}", file=sys.stdout)
+        return
+
+    message = EmailMessage()
+    message["From"] = SMTP_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body)
+    try:
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as smtp:
+            if SMTP_STARTTLS:
+                smtp.starttls()
+            if SMTP_USER:
+                smtp.login(SMTP_USER, SMTP_PASSWORD)
+            smtp.send_message(message)
+    except (smtplib.SMTPException, OSError) as e:
+        print(f"[Mail BŁĄD] Nie udało się wysłać wiadomości do {to}: {e}", file=sys.stderr)
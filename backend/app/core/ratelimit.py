@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from fastapi import HTTPException, Request, status
+from sqlalchemy import Column, Float, String, case, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import (
+    LOGIN_IP_RATE, LOGIN_IP_BURST, LOGIN_EMAIL_RATE, LOGIN_EMAIL_BURST,
+    REGISTER_IP_RATE, REGISTER_IP_BURST, REFRESH_IP_RATE, REFRESH_IP_BURST,
+    RATE_LIMIT_MAX_BUCKETS, RATE_LIMIT_SHARED,
+    CLAIM_REQUEST_IP_RATE, CLAIM_REQUEST_IP_BURST, CLAIM_REQUEST_EMAIL_RATE, CLAIM_REQUEST_EMAIL_BURST,
+    CLAIM_IP_RATE, CLAIM_IP_BURST
+)
+from app.core.database import Base, engine
+
+
+class RateLimitBucket(Base):
+    """
+    Kubełek limitu wspólny dla wszystkich procesów API (RATE_LIMIT_SHARED), np. "login:ip:10.0.0.1".
+    updated_at to time.time() ostatniego poboru - z niego liczymy, ile tokenów zdążyło wrócić.
+    """
+    __tablename__ = "rate_limit_buckets"
+
+    bucket_key = Column(String(200), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket per klucz (IP, e-mail): od razu `burst` prób, potem `rate_per_minute` na minutę.
+    Kubełki żyją w pamięci procesu; ponad max_buckets wypadają najdawniej używane
+    (bezczynny kubełek i tak zdążyłby się napełnić). rate_per_minute <= 0 wyłącza limit.
+    Przy shared=True zgodę procesu potwierdza jeszcze kubełek w bazie (jeden UPDATE po kluczu).
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, burst: int, max_buckets: int, shared: bool = False):
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(burst, 1)
+        self.max_buckets = max_buckets
+        self.shared = shared
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()  # klucz -> [tokeny, czas ostatniego poboru]
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def take(self, key: str) -> float:
+        """Pobiera token. 0 = zgoda, w przeciwnym razie liczba sekund do kolejnej próby."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now]
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                self.rejected += 1
+                return (1 - bucket[0]) / self.rate
+            bucket[0] -= 1
+
+        if self.shared and not take_shared_token(f"{self.name}:{key}", self.rate, self.burst):
+            with self._lock:
+                self.rejected += 1
+            return 1 / self.rate
+        return 0.0
+
+    def check(self, key: str) -> float:
+        """Jak take(), ale bez pobrania tokenu - dla limitów, które liczy się dopiero po porażce."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = float(self.burst) if bucket is None else \
+                min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            if tokens < 1:
+                self.rejected += 1
+                return (1 - tokens) / self.rate
+
+        if self.shared and not has_shared_token(f"{self.name}:{key}", self.rate, self.burst):
+            with self._lock:
+                self.rejected += 1
+            return 1 / self.rate
+        return 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate_per_minute": self.rate * 60,
+                "burst": self.burst,
+                "buckets": len(self._buckets),
+                "rejected": self.rejected,
+            }
+
+
+def take_shared_token(key: str, rate: float, burst: int) -> bool:
+    """
+    Pobór z kubełka w bazie - doładowanie i zdjęcie tokenu w jednym warunkowym UPDATE,
+    w osobnej krótkiej transakcji (niezależnej od sesji żądania).
+    """
+    table = RateLimitBucket.__table__
+    now = time.time()
+    refilled = table.c.tokens + (now - table.c.updated_at) * rate
+    tokens = case((refilled > burst, float(burst)), else_=refilled)
+    take = update(table).where(table.c.bucket_key == key).where(tokens >= 1)\
+        .values(tokens=tokens - 1, updated_at=now)
+
+    with engine.begin() as connection:
+        if connection.execute(take).rowcount:
+            return True
+        try:
+            with connection.begin_nested():
+                connection.execute(insert(table).values(bucket_key=key, tokens=float(burst - 1), updated_at=now))
+            return True
+        except IntegrityError:
+            # Kubełek istnieje (pusty) albo równoległy proces wstawił go pierwszy - jeszcze jedna próba
+            return connection.execute(take).rowcount > 0
+
+
+def has_shared_token(key: str, rate: float, burst: int) -> bool:
+    """Czy kubełek w bazie ma token (odczyt bez zmiany; brak wiersza = pełny kubełek)."""
+    table = RateLimitBucket.__table__
+    with engine.connect() as connection:
+        row = connection.execute(
+            select(table.c.tokens, table.c.updated_at).where(table.c.bucket_key == key)
+        ).first()
+    if row is None:
+        return True
+    return min(float(burst), row.tokens + (time.time() - row.updated_at) * rate) >= 1
+
+
+def purge_idle_buckets(db: Session) -> int:
+    """Usuwa z bazy kubełki pełne od dawna (brak wiersza znaczy to samo) - uruchamiane przez workera."""
+    limiters = (
+        login_ip_limiter, login_email_limiter, register_ip_limiter, refresh_ip_limiter,
+        claim_request_ip_limiter, claim_request_email_limiter, claim_ip_limiter
+    )
+    # Po burst / rate sekundach bez poboru kubełek jest pełny
+    idle_seconds = max((limiter.burst / limiter.rate for limiter in limiters if limiter.rate > 0), default=0)
+    table = RateLimitBucket.__table__
+    deleted = db.execute(delete(table).where(table.c.updated_at < time.time() - idle_seconds)).rowcount
+    db.commit()
+    return deleted
+
+
+login_ip_limiter = TokenBucketLimiter("login:ip", LOGIN_IP_RATE, LOGIN_IP_BURST, RATE_LIMIT_MAX_BUCKETS, RATE_LIMIT_SHARED)
+login_email_limiter = TokenBucketLimiter(
+    "login:email", LOGIN_EMAIL_RATE, LOGIN_EMAIL_BURST, RATE_LIMIT_MAX_BUCKETS, RATE_LIMIT_SHARED
+)
+register_ip_limiter = TokenBucketLimiter(
+    "register:ip", REGISTER_IP_RATE, REGISTER_IP_BURST, RATE_LIMIT_MAX_BUCKETS, RATE_LIMIT_SHARED
+)
+refresh_ip_limiter = TokenBucketLimiter(
+    "refresh:ip", REFRESH_IP_RATE, REFRESH_IP_BURST, RATE_LIMIT_MAX_BUCKETS, RATE_LIMIT_SHARED
+)
+claim_request_ip_limiter = TokenBucketLimiter(
+    "claim-request:ip", CLAIM_REQUEST_IP_RATE, CLAIM_REQUEST_IP_BURST, RATE_LIMIT_MAX_BUCKETS, RATE_LIMIT_SHARED
+)
+claim_request_email_limiter = TokenBucketLimiter(
+    "claim-request:email", CLAIM_REQUEST_EMAIL_RATE, CLAIM_REQUEST_EMAIL_BURST, RATE_LIMIT_MAX_BUCKETS, RATE_LIMIT_SHARED
+)
+claim_ip_limiter = TokenBucketLimiter("claim:ip", CLAIM_IP_RATE, CLAIM_IP_BURST, RATE_LIMIT_MAX_BUCKETS, RATE_LIMIT_SHARED)
+
+
+def client_ip(request: Request) -> str:
+    # Za reverse proxy adres klienta ustawia uvicorn (--proxy-headers), nie ufamy X-Forwarded-For wprost
+    return request.client.host if request.client else "unknown"
+
+
+def enforce(limiter: TokenBucketLimiter, key: Optional[str], consume: bool = True) -> None:
+    """
+    429 z Retry-After, gdy kubełek klucza jest pusty (wywoływane przed zapytaniem do bazy i bcrypt).
+    consume=False tylko sprawdza - token zdejmuje później wywołujący (np. po nieudanej próbie).
+    """
+    if not key:
+        return
+    retry_after = limiter.take(key) if consume else limiter.check(key)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Zbyt wiele prób. Spróbuj ponownie za chwilę.",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+
+
+def throttle_login(request: Request, email: str) -> None:
+    enforce(login_ip_limiter, client_ip(request))
+    # Limit konta (sam e-mail, z dowolnego IP) liczy tylko nieudane próby (record_login_failure) - tu jedynie sprawdzamy
+    enforce(login_email_limiter, email.strip().lower(), consume=False)
+
+
+def record_login_failure(email: str) -> None:
+    if login_email_limiter.rate > 0:
+        login_email_limiter.take(email.strip().lower())
+
+
+def throttle_register(request: Request) -> None:
+    # Rejestracja nie rusza limitów logowania - inaczej można by nią zablokować cudze konto
+    enforce(register_ip_limiter, client_ip(request))
+
+
+def throttle_refresh(request: Request) -> None:
+    enforce(refresh_ip_limiter, client_ip(request))
+
+
+def throttle_claim_request(request: Request, email: str) -> None:
+    # Per e-mail ogranicza też liczbę wiadomości wysyłanych na jeden adres
+    enforce(claim_request_ip_limiter, client_ip(request))
+    enforce(claim_request_email_limiter, email.strip().lower())
+
+
+def throttle_claim(request: Request) -> None:
+    # Zgadywanie kodu: limit per IP (kod ma 256 bitów, limit chroni głównie bcrypt)
+    enforce(claim_ip_limiter, client_ip(request))
+
+
+def rate_limit_stats() -> dict:
+    return {
+        "shared": RATE_LIMIT_SHARED,
+        "login_ip": login_ip_limiter.stats(),
+        "login_email": login_email_limiter.stats(),
+        "register_ip": register_ip_limiter.stats(),
+        "refresh_ip": refresh_ip_limiter.stats(),
+        "claim_request_ip": claim_request_ip_limiter.stats(),
+        "claim_request_email": claim_request_email_limiter.stats(),
+        "claim_ip": claim_ip_limiter.stats(),
+    }
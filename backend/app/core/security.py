@@ -11,7 +11,20 @@ SECRET_KEY = "bardzo_tajny_klucz_do_szyfrowania_tokenow_zmien_mnie"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Typ tokenu (claim "typ"). Tokeny bez tego claimu (sprzed refresh tokenów) traktujemy jak tokeny dostępu.
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+# Znacznik konta bez hasła (np. automatyczne konto gościa). To nie jest poprawny hash bcrypt,
+# więc żadne hasło się z nim nie zweryfikuje - hasło ustawia dopiero przejęcie konta.
+UNUSABLE_PASSWORD = "!"
+
+def is_password_usable(hashed_password: str) -> bool:
+    return bool(hashed_password) and not hashed_password.startswith(UNUSABLE_PASSWORD)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
+    if not is_password_usable(hashed_password):
+        return False
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
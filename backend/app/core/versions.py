@@ -0,0 +1,95 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable
+from sqlalchemy import Column, DateTime, Integer, String, event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import VERSION_MEMO_TTL
+from app.core.database import Base
+
+
+class ChangeVersion(Base):
+    """
+    Licznik zmian danych (np. "catalog:tenant:5"). Podbijany w transakcji, która zmienia dane,
+    więc wszystkie procesy API widzą nową wersję dokładnie wtedy, gdy widzą nowe dane.
+    Służy jako klucz cache i podstawa ETag.
+    """
+    __tablename__ = "change_versions"
+
+    name = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.now)
+
+
+class VersionMemo:
+    """
+    Wersje zapamiętane w procesie na VERSION_MEMO_TTL sekund - gorące odczyty nie pytają bazy.
+    Zmiany z tego procesu widać od razu (commit czyści wpis), z innych procesów - po TTL.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, name: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        version = db.execute(select(ChangeVersion.version).where(ChangeVersion.name == name)).scalar()
+        version = version or 0
+        with self._lock:
+            self._entries[name] = (version, now + self.ttl_seconds)
+        return version
+
+    def forget(self, names: Iterable[str]) -> None:
+        with self._lock:
+            for name in names:
+                self._entries.pop(name, None)
+
+
+version_memo = VersionMemo(VERSION_MEMO_TTL)
+
+# Klucz w Session.info: wersje podbite w bieżącej transakcji
+_PENDING_BUMPS = "pending_version_bumps"
+
+
+def get_version(db: Session, name: str) -> int:
+    return version_memo.get(db, name)
+
+
+def bump_version(db: Session, name: str) -> None:
+    """Podbija wersję w bieżącej transakcji (bez commita - robi go wywołujący)."""
+    table = ChangeVersion.__table__
+    now = datetime.now()
+    increment = update(table).where(table.c.name == name)\
+        .values(version=table.c.version + 1, updated_at=now)
+
+    if db.execute(increment).rowcount == 0:
+        try:
+            with db.begin_nested():
+                db.execute(insert(table).values(name=name, version=1, updated_at=now))
+        except IntegrityError:
+            # Równoległa transakcja wstawiła wiersz pierwsza
+            db.execute(increment)
+    db.info.setdefault(_PENDING_BUMPS, set()).add(name)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed_versions(session: Session) -> None:
+    # after_commit / after_rollback przychodzą też dla savepointów - liczy się tylko cała transakcja
+    if session.in_nested_transaction():
+        return
+    names = session.info.pop(_PENDING_BUMPS, None)
+    if names:
+        version_memo.forget(names)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_versions(session: Session) -> None:
+    if not session.in_nested_transaction():
+        session.info.pop(_PENDING_BUMPS, None)
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware  
 from app.modules.tenancy.router import router as tenancy_router
@@ -5,11 +6,27 @@ from app.modules.catalog.router import router as catalog_router
 from app.modules.inventory.router import router as inventory_router
 from app.modules.auth.router import router as auth_router
 from app.modules.orders.router import router as orders_router
+from app.modules.orders.intake import guest_order_batcher
+from app.core.hashing import password_hasher
+from app.core.database import async_engine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Dopisujemy zamówienia gości, które czekają jeszcze w kolejce (tryb group commit)
+    guest_order_batcher.stop()
+    # Procesy haszujące hasła
+    password_hasher.shutdown()
+    # Połączenia silnika async (endpointy odczytu)
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="Music Store SaaS Platform",
     description="Backend API dla platformy SaaS sklepu muzycznego",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # --- KONFIGURACJA CORS (To pozwala Reactowi łączyć się z API) ---
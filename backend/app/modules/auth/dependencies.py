@@ -1,37 +1,140 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import event, select, update
 from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import AUTH_USER_CACHE_TTL, AUTH_USER_CACHE_SIZE, AUTH_TOKEN_CACHE_SIZE, ACCESS_TOKEN_TTL_MINUTES
 from app.core.database import get_db
-from app.core.security import SECRET_KEY, ALGORITHM
+from app.core.security import SECRET_KEY, ALGORITHM, ACCESS_TOKEN
 from app.modules.tenancy.models import User
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+
+@dataclass(frozen=True)
+class Principal:
+    """Zalogowany użytkownik zbudowany z claimów tokenu (user_id, tenant_id, role) - bez zapytania o User."""
+    user_id: int
+    tenant_id: int
+    role: str
+    email: str
+
+
+@dataclass(frozen=True)
+class UserRecord:
+    """Kolumny konta potrzebne do autoryzacji - to trzymamy w cache zamiast obiektów ORM."""
+    user_id: int
+    email: str
+    tenant_id: int
+    role: str
+    is_active: bool
+    token_version: int
+
+
+# Stan kont per user_id; wpis żyje AUTH_USER_CACHE_TTL, więc zmiana w innym procesie dociera najpóźniej po tym czasie
+user_cache = TTLCache(AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TTL)
+
+# Zweryfikowane tokeny dostępu: skrót SHA-256 tokenu -> claimy. Wpis żyje nie dłużej niż token
+# (exp sprawdzamy przy każdym trafieniu), więc pomijamy tylko ponowne HMAC i parsowanie JSON.
+verified_tokens = TTLCache(AUTH_TOKEN_CACHE_SIZE, ACCESS_TOKEN_TTL_MINUTES * 60)
+
+# Klucz w Session.info: konta, których wpisy w user_cache trzeba usunąć po commicie
+_REVOKED_USERS = "revoked_users"
+
+
+def decode_access_token(token: str) -> dict:
+    """Claimy tokenu dostępu (z cache albo jwt.decode); JWTError, gdy token jest nieważny."""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = verified_tokens.get(key)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # Refresh token nie otwiera endpointów (i nigdy nie trafia do cache)
+        if payload.get("typ", ACCESS_TOKEN) != ACCESS_TOKEN:
+            raise JWTError("Token nie jest tokenem dostępu")
+        verified_tokens.set(key, payload)
+    elif payload.get("exp") is not None and payload["exp"] <= time.time():
+        raise JWTError("Token wygasł")
+    return payload
+
+
+def get_user_record(db: Session, user_id: int) -> Optional[UserRecord]:
+    record = user_cache.get(user_id)
+    if record is None:
+        row = db.execute(
+            select(User.user_id, User.email, User.tenant_id, User.role, User.is_active, User.token_version)
+            .where(User.user_id == user_id)
+        ).first()
+        if row is None:
+            return None
+        record = UserRecord(
+            user_id=row.user_id, email=row.email, tenant_id=row.tenant_id, role=row.role,
+            # NULL (konta sprzed kolumny) traktujemy jak domyślne True z modelu
+            is_active=row.is_active is not False, token_version=row.token_version or 0
+        )
+        user_cache.set(user_id, record)
+    return record
+
+
+def revoke_user_tokens(db: Session, user_id: int) -> None:
+    """
+    Unieważnia wszystkie wydane tokeny konta (wersja w bazie rośnie).
+    W tym procesie zaraz po commicie, w pozostałych - po wygaśnięciu wpisu w cache.
+    """
+    db.execute(update(User).where(User.user_id == user_id).values(token_version=User.token_version + 1))
+    db.info.setdefault(_REVOKED_USERS, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_revoked_users(session: Session) -> None:
+    # Wpis usuwamy dopiero po commicie - wcześniej równoległe żądanie wczytałoby do cache starą wersję
+    if session.in_nested_transaction():
+        return
+    user_ids = session.info.pop(_REVOKED_USERS, None)
+    if user_ids:
+        user_cache.invalidate(lambda key: key in user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_revoked_users(session: Session) -> None:
+    if not session.in_nested_transaction():
+        session.info.pop(_REVOKED_USERS, None)
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Nieprawidłowe dane uwierzytelniające",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        
-        
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
-        
-        if email is None:
+        user_id = payload.get("user_id")
+        if email is None or user_id is None:
             raise credentials_exception
-            
     except JWTError:
         raise credentials_exception
-    
-    
-    user = db.query(User).filter(User.email == email).first()
-    
-    if user is None:
+
+    # Konto z cache (zapytanie tylko przy braku wpisu): nadal aktywne i token nie został unieważniony
+    record = get_user_record(db, int(user_id))
+    if record is None or not record.is_active or record.token_version != payload.get("ver", 0):
         raise credentials_exception
-        
-    return user
\ No newline at end of file
+
+    # tenant_id i rola z bazy (przez cache) - nie musimy wierzyć claimom starszym niż zmiana konta
+    return Principal(user_id=record.user_id, tenant_id=record.tenant_id, role=record.role, email=record.email)
+
+
+def require_owner(current_user: Principal = Depends(get_current_user)) -> Principal:
+    """
+    Endpointy panelu sklepu. Konta klientów (także przejęte konta gości) mają tenant_id sklepu,
+    więc samo dopasowanie tenant_id nie wystarcza - wymagamy roli właściciela.
+    """
+    if current_user.role != "OWNER":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Brak uprawnień do panelu sklepu")
+    return current_user
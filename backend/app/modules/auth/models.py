@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP
+from app.core.database import Base
+
+
+class AccountClaimToken(Base):
+    """
+    Jednorazowy kod przejęcia konta gościa, wysyłany na adres e-mail konta.
+    W bazie tylko skrót SHA-256 kodu; wiersz znika przy użyciu albo przy wysłaniu nowego kodu.
+    """
+    __tablename__ = "account_claim_tokens"
+
+    token_hash = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False, index=True)
+    expires_at = Column(TIMESTAMP, nullable=False)
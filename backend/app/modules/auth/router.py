@@ -1,11 +1,30 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
+import hashlib
 import random
-from fastapi import APIRouter, Depends, HTTPException, status
+import secrets
+import sys
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr 
+from jose import JWTError, jwt
+from app.core.config import ACCESS_TOKEN_TTL_MINUTES, REFRESH_TOKEN_TTL_DAYS, CLAIM_TOKEN_TTL_MINUTES
 from app.core.database import get_db
 from app.modules.tenancy.models import Tenant, User
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.security import (
+    create_access_token, is_password_usable, SECRET_KEY, ALGORITHM, ACCESS_TOKEN, REFRESH_TOKEN
+)
+from app.core.hashing import password_hasher
+from app.core.mailer import send_email
+from app.core.ratelimit import (
+    throttle_login, record_login_failure, throttle_register, throttle_refresh,
+    throttle_claim_request, throttle_claim, rate_limit_stats
+)
+from app.modules.auth.models import AccountClaimToken
+from app.modules.auth.dependencies import (
+    Principal, get_current_user, get_user_record, revoke_user_tokens, require_owner
+)
 
 
 class LoginRequest(BaseModel):
@@ -18,15 +37,59 @@ class RegisterRequestJSON(BaseModel):
     company_name: str
 
 
+class ClaimCodeRequest(BaseModel):
+    email: EmailStr
+
+
+class ClaimAccountRequest(BaseModel):
+    token: str           # Jednorazowy kod z wiadomości e-mail
+    password: str
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # Ważność tokenu dostępu w sekundach
+
+
+def issue_tokens(user_id: int, email: str, tenant_id: int, role: str, token_version: int) -> dict:
+    """Para tokenów: krótki token dostępu i długi refresh token (ta sama wersja tokenów konta)."""
+    claims = {
+        "sub": email,
+        "user_id": user_id,
+        "tenant_id": tenant_id,
+        "role": role,
+        "ver": token_version  # wersja tokenów konta (unieważnianie)
+    }
+    access_token = create_access_token(
+        data={**claims, "typ": ACCESS_TOKEN},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_TTL_MINUTES)
+    )
+    # Refresh token niesie tylko to, co potrzebne do wydania nowej pary
+    refresh_token = create_access_token(
+        data={"sub": email, "user_id": user_id, "ver": token_version, "typ": REFRESH_TOKEN},
+        expires_delta=timedelta(days=REFRESH_TOKEN_TTL_DAYS)
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": int(ACCESS_TOKEN_TTL_MINUTES * 60)
+    }
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-def register_tenant_and_user(data: RegisterRequestJSON, db: Session = Depends(get_db)):
+def register_tenant_and_user(data: RegisterRequestJSON, request: Request, db: Session = Depends(get_db)):
+
+    # 0. Limit prób per IP - nadmiarowe żądania odpadają przed bazą i bcrypt (429)
+    throttle_register(request)
     
     # 1. Sprawdź czy email jest wolny
     existing_user = db.query(User).filter(User.email == data.email).first()
@@ -39,8 +102,8 @@ def register_tenant_and_user(data: RegisterRequestJSON, db: Session = Depends(ge
     # Dodajemy losową liczbę, żeby uniknąć konfliktów jak ktoś wpisze taką samą nazwę
     generated_subdomain = f"{base_slug}-{random.randint(1000, 9999)}"
 
-    # 3. Zahaszuj hasło
-    hashed_pwd = get_password_hash(data.password)
+    # 3. Zahaszuj hasło (bcrypt w puli procesów; przy przeciążeniu 503)
+    hashed_pwd = password_hasher.hash(data.password)
 
     # 4. TRANSAKCJA (Twoja dobra logika)
     try:
@@ -68,20 +131,22 @@ def register_tenant_and_user(data: RegisterRequestJSON, db: Session = Depends(ge
 
     except Exception as e:
         db.rollback() # Jak coś pójdzie nie tak, cofamy zmiany
-        print(f"Błąd rejestracji: {e}")
+        print(f"[Auth BŁĄD] Rejestracja nie powiodła się: {e}", file=sys.stderr)
         raise HTTPException(status_code=500, detail="Błąd serwera podczas rejestracji.")
 
 
 
 @router.post("/login", response_model=Token)
-def login_for_access_token(login_data: LoginRequest, db: Session = Depends(get_db)):
-    
+def login_for_access_token(login_data: LoginRequest, request: Request, db: Session = Depends(get_db)):
     
+    # Limit prób per IP / e-mail - nadmiarowe żądania odpadają przed bazą i bcrypt (429)
+    throttle_login(request, login_data.email)
     
     user = db.query(User).filter(User.email == login_data.email).first()
     
     
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    if not user or not password_hasher.verify(login_data.password, user.hashed_password):
+        record_login_failure(login_data.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Niepoprawny email lub hasło",
@@ -89,17 +154,120 @@ def login_for_access_token(login_data: LoginRequest, db: Session = Depends(get_d
         )
     
     
-    access_token_expires = timedelta(minutes=60) 
-    
-    
-    access_token = create_access_token(
-        data={
-            "sub": user.email,          
-            "user_id": user.user_id,    
-            "tenant_id": user.tenant_id,
-            "role": user.role
-        },
-        expires_delta=access_token_expires
+    return issue_tokens(user.user_id, user.email, user.tenant_id, user.role, user.token_version or 0)
+
+
+@router.post("/refresh", response_model=Token)
+def refresh_access_token(data: RefreshRequest, request: Request, db: Session = Depends(get_db)):
+    """
+    Nowa para tokenów za ważny refresh token - bez hasła, więc bez bcrypt.
+    Stan konta sprawdzamy przez cache (get_user_record): dezaktywacja albo "wyloguj wszędzie"
+    (wyższa wersja tokenów) odcina też refresh tokeny.
+    """
+    session_expired = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Sesja wygasła. Zaloguj się ponownie.",
+        headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    throttle_refresh(request)
+    try:
+        payload = jwt.decode(data.refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise session_expired
+    if payload.get("typ") != REFRESH_TOKEN or payload.get("user_id") is None:
+        raise session_expired
+
+    record = get_user_record(db, int(payload["user_id"]))
+    if record is None or not record.is_active or record.token_version != payload.get("ver", 0):
+        raise session_expired
+
+    # tenant_id i rola z aktualnego stanu konta, nie ze starego tokenu
+    return issue_tokens(record.user_id, record.email, record.tenant_id, record.role, record.token_version)
+
+
+@router.post("/logout-all")
+def logout_everywhere(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Unieważnia wszystkie tokeny konta (np. po utracie urządzenia)."""
+    revoke_user_tokens(db, current_user.user_id)
+    db.commit()
+    return {"msg": "Wylogowano ze wszystkich urządzeń"}
+
+
+# Metryki haszowania haseł (czas, zajętość kolejki, odrzucone żądania)
+@router.get("/hash-stats")
+def get_password_hash_stats(current_user: Principal = Depends(require_owner)):
+    return password_hasher.stats()
+
+
+# Limity prób logowania / rejestracji (kubełki w pamięci procesu, odrzucone żądania)
+@router.get("/rate-limit-stats")
+def get_rate_limit_stats(current_user: Principal = Depends(require_owner)):
+    return rate_limit_stats()
+
+
+def hash_claim_code(code: str) -> str:
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+@router.post("/claim/request", status_code=status.HTTP_202_ACCEPTED)
+def request_claim_code(
+    data: ClaimCodeRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Krok 1 przejęcia automatycznego konta gościa: jednorazowy kod na adres e-mail konta.
+    Odpowiedź jest zawsze taka sama - endpoint nie zdradza, czy adres ma konto gościa.
+    """
+    throttle_claim_request(request, data.email)
+
+    user = db.query(User).filter(User.email == data.email).first()
+    # Kod dostaje tylko konto, które jeszcze nie ma hasła
+    if user and not is_password_usable(user.hashed_password):
+        code = secrets.token_urlsafe(32)
+        # Nowy kod unieważnia poprzednie
+        db.execute(delete(AccountClaimToken).where(AccountClaimToken.user_id == user.user_id))
+        db.add(AccountClaimToken(
+            token_hash=hash_claim_code(code),
+            user_id=user.user_id,
+            expires_at=datetime.now() + timedelta(minutes=CLAIM_TOKEN_TTL_MINUTES)
+        ))
+        db.commit()
+        background_tasks.add_task(
+            send_email, user.email, "Aktywacja konta",
+            f"Kod aktywacji konta: {code}\n"
+            f"Kod jest ważny {int(CLAIM_TOKEN_TTL_MINUTES)} min i można go użyć tylko raz.\n"
+            "Jeśli to nie Ty prosiłeś o kod, zignoruj tę wiadomość."
+        )
+    return {"msg": "Jeśli ten adres ma konto gościa, wysłaliśmy na niego kod aktywacji."}
+
+
+@router.post("/claim")
+def claim_guest_account(data: ClaimAccountRequest, request: Request, db: Session = Depends(get_db)):
+    """Krok 2: ustawienie hasła kontu gościa za ważny kod z wiadomości e-mail (kod jest jednorazowy)."""
+    throttle_claim(request)
+
+    invalid_code = HTTPException(status_code=400, detail="Kod aktywacji jest nieprawidłowy albo wygasł")
+    token_hash = hash_claim_code(data.token)
+    claim = db.get(AccountClaimToken, token_hash)
+    if claim is None or claim.expires_at <= datetime.now():
+        raise invalid_code
+
+    # bcrypt przed zapisem - nie trzymamy blokady wiersza kodu w trakcie haszowania
+    hashed_pwd = password_hasher.hash(data.password)
+
+    # Kod zużywa dokładnie jedno żądanie: równoległe drugie usuwa 0 wierszy
+    used = db.execute(
+        delete(AccountClaimToken).where(AccountClaimToken.token_hash == token_hash),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    user = db.get(User, claim.user_id)
+    # Hasło można ustawić tylko kontu, które jeszcze go nie ma
+    if not used or user is None or is_password_usable(user.hashed_password):
+        db.rollback()
+        raise invalid_code
+
+    user.hashed_password = hashed_pwd
+    db.commit()
+    return {"msg": "Konto aktywowane. Możesz się zalogować."}
\ No newline at end of file
@@ -0,0 +1,392 @@
+import codecs
+import csv
+import json
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import BULK_IMPORT_BATCH_SIZE, BULK_IMPORT_MAX_ERRORS
+from . import models, schemas
+from .hooks import local_products_written, global_products_written
+
+# Format pliku: parametr ?format= albo Content-Type
+FORMATS = {"csv", "ndjson"}
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+products_table = models.Product.__table__
+global_table = models.GlobalProduct.__table__
+
+# (numer linii, dane wiersza albo None, błąd albo None)
+Record = Tuple[int, Optional[dict], Optional[str]]
+
+
+def detect_format(explicit: Optional[str], content_type: Optional[str]) -> str:
+    if explicit:
+        if explicit not in FORMATS:
+            raise HTTPException(status_code=400, detail="Nieprawidłowy format. Użyj csv lub ndjson")
+        return explicit
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in CONTENT_TYPES:
+        return CONTENT_TYPES[media_type]
+    raise HTTPException(status_code=400, detail="Podaj format (?format=csv|ndjson) albo Content-Type text/csv / application/x-ndjson")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Dzieli strumień bajtów na linie (UTF-8, także z BOM) bez wczytywania całego pliku."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer, line_no = "", 0
+    try:
+        async for chunk in chunks:
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                line_no += 1
+                yield line_no, line.rstrip("\r")
+        buffer += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail=f"Plik musi być w UTF-8 (błąd po linii {line_no})")
+    if buffer:
+        yield line_no + 1, buffer.rstrip("\r")
+
+
+async def iter_records(lines: AsyncIterator[Tuple[int, str]], fmt: str) -> AsyncIterator[Record]:
+    if fmt == "ndjson":
+        async for line_no, line in lines:
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"Niepoprawny JSON: {e}"
+                continue
+            if not isinstance(data, dict):
+                yield line_no, None, "Wiersz musi być obiektem JSON"
+                continue
+            yield line_no, data, None
+        return
+
+    # CSV: pierwszy wiersz to nagłówek. Pole w cudzysłowie może zawierać znak nowej linii,
+    # więc łączymy linie, dopóki liczba cudzysłowów jest nieparzysta (RFC 4180).
+    header: Optional[List[str]] = None
+    record, start = "", 0
+    async for line_no, line in lines:
+        if not record:
+            start = line_no
+            record = line
+        else:
+            record += "\n" + line
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, None, f"Oczekiwano {len(header)} kolumn, jest {len(values)}"
+            continue
+        # Puste komórki = brak wartości (działają wartości domyślne schematu)
+        yield start, {k: v for k, v in zip(header, values) if v != ""}, None
+
+    if record:
+        yield start, None, "Niezamknięty cudzysłów"
+
+
+def _format_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+        for e in error.errors()
+    )
+
+
+class BatchImport(ABC):
+    """
+    Wspólna część importów masowych: walidacja wiersza schematem Pydantic, zbieranie paczki
+    do batch_size i błędów per wiersz (z numerem linii). Zapis paczki robi flush() podklasy.
+    """
+    schema = None
+
+    def __init__(self, db: Session, batch_size: int = BULK_IMPORT_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.pending: List[Tuple[int, dict]] = []
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, line_no: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < BULK_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    def prepare(self, data: dict) -> dict:
+        return data
+
+    def add(self, line_no: int, data: dict) -> bool:
+        """Waliduje wiersz; zwraca True, gdy paczka jest pełna i trzeba wywołać flush()."""
+        try:
+            row = self.schema(**self.prepare(data))
+        except ValidationError as e:
+            self.error(line_no, _format_error(e))
+            return False
+        self.pending.append((line_no, row.dict()))
+        return len(self.pending) >= self.batch_size
+
+    @abstractmethod
+    def flush(self) -> None:
+        """Zapisuje zebraną paczkę (self.pending) i ją czyści."""
+
+    def result(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+
+class ProductImport(BatchImport):
+    """
+    Import produktów sklepu paczkami: walidacja ProductCreate, wymuszony tenant_id,
+    wielowierszowy INSERT i commit na paczkę.
+    """
+    schema = schemas.ProductCreate
+
+    def __init__(self, db: Session, tenant_id: int, batch_size: int = BULK_IMPORT_BATCH_SIZE):
+        super().__init__(db, batch_size)
+        self.tenant_id = tenant_id
+
+    def prepare(self, data: dict) -> dict:
+        # MAGIA SAAS: tenant_id z pliku ignorujemy - tak jak w POST /catalog/local/
+        return {**data, "tenant_id": self.tenant_id}
+
+    def flush(self) -> None:
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+
+        # 1. Powiązania z katalogiem globalnym - jedno zapytanie na paczkę zamiast błędu klucza obcego
+        ref_ids = {data["global_ref_id"] for _, data in batch if data.get("global_ref_id") is not None}
+        known = set()
+        if ref_ids:
+            known = {row.global_id for row in self.db.query(models.GlobalProduct.global_id)
+                     .filter(models.GlobalProduct.global_id.in_(ref_ids)).all()}
+        valid = []
+        for line_no, data in batch:
+            if data.get("global_ref_id") is not None and data["global_ref_id"] not in known:
+                self.error(line_no, f"global_ref_id: produkt globalny {data['global_ref_id']} nie istnieje")
+            else:
+                valid.append((line_no, data))
+        if not valid:
+            return
+
+        # 2. Wielowierszowy INSERT (Core, RETURNING product_id) + indeks / wersja katalogu, jeden commit na paczkę
+        rows = [data for _, data in valid]
+        try:
+            ids = self.db.execute(
+                insert(products_table).returning(products_table.c.product_id, sort_by_parameter_order=True),
+                rows
+            ).scalars().all()
+            products = [SimpleNamespace(**data, product_id=product_id) for data, product_id in zip(rows, ids)]
+            local_products_written(self.db, products, new=True)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            for line_no, _ in valid:
+                self.error(line_no, f"Błąd zapisu paczki: {e.__class__.__name__}")
+            return
+        self.inserted += len(products)
+
+
+class GlobalProductIngest(BatchImport):
+    """
+    Zasilanie katalogu globalnego z feedu dostawcy, z EAN jako kluczem.
+    Istniejące kody rozpoznajemy jednym zapytaniem na paczkę (zamiast SELECT przed każdym INSERT),
+    nowe wstawiamy jednym wielowierszowym INSERT, a istniejące pomijamy albo
+    (update_existing) aktualizujemy im opis i kategorię jednym executemany.
+    """
+    schema = schemas.GlobalProductCreate
+
+    def __init__(self, db: Session, update_existing: bool = False, batch_size: int = BULK_IMPORT_BATCH_SIZE):
+        super().__init__(db, batch_size)
+        self.update_existing = update_existing
+        self.updated = 0
+        self.skipped = 0
+
+    def prepare(self, data: dict) -> dict:
+        # W NDJSON EAN bywa liczbą - porównujemy zawsze tekst bez spacji
+        ean = data.get("ean_code")
+        if ean is not None:
+            data = {**data, "ean_code": str(ean).strip() or None}
+        return data
+
+    def flush(self) -> None:
+        batch, self.pending = self.pending, []
+
+        # 1. Bez EAN nie rozpoznamy duplikatu; powtórzony EAN w paczce - wygrywa ostatni wiersz
+        by_ean: Dict[str, Tuple[int, dict]] = {}
+        duplicates = 0
+        for line_no, data in batch:
+            if not data["ean_code"]:
+                self.error(line_no, "ean_code: kod EAN jest wymagany w imporcie hurtowym")
+                continue
+            if data["ean_code"] in by_ean:
+                duplicates += 1
+            by_ean[data["ean_code"]] = (line_no, data)
+        if not by_ean:
+            return
+
+        # 2. Zapis paczki; konflikt unikalności EAN (równoległy import) = jeszcze jedna próba z nowym odczytem
+        for _ in range(2):
+            try:
+                inserted, updated, skipped = self._write(by_ean)
+                self.db.commit()
+            except IntegrityError:
+                self.db.rollback()
+                continue
+            except Exception as e:
+                self.db.rollback()
+                for line_no, _ in by_ean.values():
+                    self.error(line_no, f"Błąd zapisu paczki: {e.__class__.__name__}")
+                return
+            self.inserted += inserted
+            self.updated += updated
+            self.skipped += skipped + duplicates
+            return
+
+        for line_no, _ in by_ean.values():
+            self.error(line_no, "Konflikt kodu EAN z równoległym importem")
+
+    def _write(self, by_ean: Dict[str, Tuple[int, dict]]) -> Tuple[int, int, int]:
+        gp = models.GlobalProduct
+        eans = list(by_ean.keys())
+
+        # Istniejące kody - jedno zapytanie na paczkę (Oracle: max 1000 elementów w IN)
+        existing = {}
+        for start in range(0, len(eans), 1000):
+            rows = self.db.execute(
+                select(gp.global_id, gp.ean_code, gp.base_description, gp.category)
+                .where(gp.ean_code.in_(eans[start:start + 1000]))
+            )
+            existing.update({row.ean_code: row for row in rows})
+
+        new_rows = [data for ean, (_, data) in by_ean.items() if ean not in existing]
+        changes = []
+        if self.update_existing:
+            for ean, row in existing.items():
+                data = by_ean[ean][1]
+                # Puste pole w feedzie nie kasuje wartości w bazie
+                description = data["base_description"] if data["base_description"] is not None else row.base_description
+                category = data["category"] if data["category"] is not None else row.category
+                if (description, category) != (row.base_description, row.category):
+                    changes.append({"g_id": row.global_id, "g_description": description, "g_category": category})
+
+        written = []
+        if new_rows:
+            ids = self.db.execute(
+                insert(global_table).returning(global_table.c.global_id, sort_by_parameter_order=True),
+                new_rows
+            ).scalars().all()
+            written = [SimpleNamespace(**data, global_id=global_id) for data, global_id in zip(new_rows, ids)]
+            global_products_written(self.db, written, new=True)
+        if changes:
+            self.db.execute(_update_global_stmt, changes)
+            # Nazwa i EAN bez zmian - indeks wyszukiwania zostaje, podbijamy tylko wersję katalogu
+            global_products_written(
+                self.db,
+                [SimpleNamespace(global_id=c["g_id"], category=c["g_category"]) for c in changes],
+                reindex=False,
+                previous_categories={row.global_id: row.category for row in existing.values()}
+            )
+
+        return len(new_rows), len(changes), len(existing) - len(changes)
+
+    def result(self) -> dict:
+        return {**super().result(), "updated": self.updated, "skipped": self.skipped}
+
+
+_update_global_stmt = (
+    update(global_table)
+    .where(global_table.c.global_id == bindparam("g_id"))
+    .values(base_description=bindparam("g_description"), category=bindparam("g_category"))
+)
+
+
+async def run_import(job: BatchImport, chunks: AsyncIterator[bytes], fmt: str, run_sync=None) -> dict:
+    """Przepuszcza strumień przez parser i job; run_sync (np. run_in_threadpool) wykonuje zapis paczek."""
+    async for line_no, data, error in iter_records(iter_lines(chunks), fmt):
+        if error:
+            job.error(line_no, error)
+        elif job.add(line_no, data):
+            if run_sync:
+                await run_sync(job.flush)
+            else:
+                job.flush()
+    if run_sync:
+        await run_sync(job.flush)
+    else:
+        job.flush()
+    return job.result()
+
+
+async def _file_chunks(path: str, chunk_size: int = 65536) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+if __name__ == "__main__":
+    # Uruchomienie:
+    #   python -m app.modules.catalog.bulk global feed.csv [--update-existing]
+    #   python -m app.modules.catalog.bulk local produkty.ndjson --tenant-id 2
+    import argparse
+    import asyncio
+    import app.modules.tenancy.models  # noqa: F401 - rejestracja tabeli tenants dla kluczy obcych
+    from app.core.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Import masowy produktów (CSV / NDJSON)")
+    parser.add_argument("catalog", choices=["global", "local"])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(FORMATS), default=None)
+    parser.add_argument("--tenant-id", type=int, default=None)
+    parser.add_argument("--update-existing", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=BULK_IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.catalog == "local" and args.tenant_id is None:
+        parser.error("--tenant-id jest wymagane dla katalogu local")
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+
+    session = SessionLocal()
+    try:
+        if args.catalog == "global":
+            job = GlobalProductIngest(session, args.update_existing, args.batch_size)
+        else:
+            job = ProductImport(session, args.tenant_id, args.batch_size)
+        result = asyncio.run(run_import(job, _file_chunks(args.path), fmt))
+        print(
+            f"Dodano: {result['inserted']}, zaktualizowano: {result.get('updated', 0)}, "
+            f"pominięto: {result.get('skipped', 0)}, błędy: {result['failed']}"
+        )
+        for error in result["errors"][:20]:
+            print(f"  linia {error['line']}: {error['error']}")
+    except HTTPException as e:
+        print(f"Błąd: {e.detail}")
+    finally:
+        session.close()
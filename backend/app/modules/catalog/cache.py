@@ -0,0 +1,56 @@
+import json
+from typing import Callable, Hashable, Optional
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import CATALOG_CACHE_MAX_ENTRIES, CATALOG_CACHE_TTL, CATALOG_CACHE_MAX_BYTES
+from app.core.versions import bump_version
+
+# Gotowe odpowiedzi JSON list katalogu (bytes - rozmiar liczony dokładnie pod limit pamięci)
+catalog_response_cache = TTLCache(CATALOG_CACHE_MAX_ENTRIES, CATALOG_CACHE_TTL, max_bytes=CATALOG_CACHE_MAX_BYTES)
+
+
+# Wersja katalogu globalnego (hurtowni)
+GLOBAL_CATALOG_VERSION = "catalog:global"
+
+
+def tenant_catalog_version(tenant_id: int) -> str:
+    return f"catalog:tenant:{tenant_id}"
+
+
+def tenant_prices_version(tenant_id: int) -> str:
+    """Wersja zbioru produktów i cen sklepu - klucz migawki cen (snapshot.py)."""
+    return f"catalog:prices:tenant:{tenant_id}"
+
+
+def bump_tenant_catalog(db: Session, tenant_id: int, prices: bool = True) -> None:
+    """
+    Wywoływane w transakcji zmieniającej produkty sklepu (także stany magazynowe).
+    prices=False, gdy zmieniły się tylko stany albo liczniki (zamówienia, fasety) - migawka cen zostaje.
+    """
+    bump_version(db, tenant_catalog_version(tenant_id))
+    if prices:
+        bump_version(db, tenant_prices_version(tenant_id))
+
+
+def cached_json_response(
+    version_name: str,
+    version: int,
+    key: Hashable,
+    build: Callable[[], dict],
+    headers: Optional[dict] = None
+) -> Response:
+    """
+    Read-through: odpowiedź z cache dla (wersja danych, key), a przy braku - build() i zapis.
+    Po zmianie danych wersja rośnie, więc stare wpisy nie są już trafiane i wypadają z LRU.
+    """
+    cache_key = (version_name, version, key)
+
+    body = catalog_response_cache.get(cache_key)
+    status = "HIT"
+    if body is None:
+        body = json.dumps(jsonable_encoder(build()), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        catalog_response_cache.set(cache_key, body)
+        status = "MISS"
+    return Response(content=body, media_type="application/json", headers={**(headers or {}), "X-Cache": status})
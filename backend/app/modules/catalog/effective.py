@@ -0,0 +1,146 @@
+import argparse
+from typing import Dict, Iterable, List, Set
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from . import models
+from .facets import FacetDeltas, reconcile
+from .snapshot import record_stock_change
+
+effective_table = models.EffectiveProduct.__table__
+products_table = models.Product.__table__
+global_table = models.GlobalProduct.__table__
+
+# Oracle: max 1000 elementów w IN (...)
+CHUNK = 1000
+
+EFFECTIVE_COLUMNS = [
+    "product_id", "tenant_id", "global_ref_id", "name", "price",
+    "description", "sku", "stock_quantity", "ean_code", "category",
+]
+
+
+def _source():
+    """Scalony wiersz produktu: pola sklepu + dziedziczone z katalogu globalnego (LEFT JOIN)."""
+    p, g = products_table.c, global_table.c
+    return select(
+        p.product_id, p.tenant_id, p.global_ref_id, p.name, p.price,
+        func.coalesce(p.description, g.base_description),
+        p.sku, p.stock_quantity, g.ean_code, g.category,
+    ).select_from(products_table.outerjoin(global_table, p.global_ref_id == g.global_id))
+
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for start in range(0, len(ids), CHUNK):
+        yield ids[start:start + CHUNK]
+
+
+def refresh_products(db: Session, product_ids: Iterable[int], new: bool = False) -> None:
+    """
+    Przelicza wiersze podanych produktów (DELETE + INSERT ... SELECT w bazie, bez ładowania do Pythona).
+    new=True - produkty dopiero wstawione, nie ma czego kasować.
+    """
+    ids = sorted(set(product_ids))
+    # Liczniki kategorii sklepu: stare wiersze odejmujemy, nowe dodajemy
+    facets = FacetDeltas()
+    for chunk in _chunks(ids):
+        if not new:
+            for tenant_id, category, count in _category_counts(db, chunk):
+                facets.add(tenant_id, category, -count)
+            db.execute(delete(effective_table).where(effective_table.c.product_id.in_(chunk)))
+        db.execute(
+            insert(effective_table).from_select(
+                EFFECTIVE_COLUMNS, _source().where(products_table.c.product_id.in_(chunk))
+            )
+        )
+        for tenant_id, category, count in _category_counts(db, chunk):
+            facets.add(tenant_id, category, count)
+    facets.apply(db)
+
+
+def _category_counts(db: Session, product_ids: List[int]):
+    e = effective_table.c
+    return db.execute(
+        select(e.tenant_id, e.category, func.count())
+        .where(e.product_id.in_(product_ids))
+        .where(e.category.isnot(None))
+        .group_by(e.tenant_id, e.category)
+    ).all()
+
+
+def refresh_global_refs(db: Session, global_ids: Iterable[int]) -> Set[int]:
+    """
+    Po zmianie produktów globalnych: przepisuje pola dziedziczone wszystkim produktom sklepów,
+    które na nie wskazują. Zwraca sklepy, których lista się zmieniła (do podbicia wersji).
+    """
+    ids = sorted(set(global_ids))
+    tenants: Set[int] = set()
+    for chunk in _chunks(ids):
+        refs = db.execute(
+            select(effective_table.c.product_id, effective_table.c.tenant_id)
+            .where(effective_table.c.global_ref_id.in_(chunk))
+        ).all()
+        if not refs:
+            continue
+        tenants.update(row.tenant_id for row in refs)
+        refresh_products(db, [row.product_id for row in refs])
+    return tenants
+
+
+def refresh_columns(db: Session, tenant_id: int, product_ids, columns: List[str]) -> None:
+    """
+    Przepisuje wybrane kolumny (np. cena, stan) z products jednym skorelowanym UPDATE
+    dla produktów z podzapytania product_ids - po zmianach zbiorowych, bez ładowania wierszy.
+    """
+    p, e = products_table.c, effective_table.c
+    db.execute(
+        update(effective_table)
+        .where(e.tenant_id == tenant_id)
+        .where(e.product_id.in_(product_ids))
+        .values({column: select(p[column]).where(p.product_id == e.product_id).scalar_subquery() for column in columns})
+    )
+
+
+# Zmiana stanu przenoszona 1:1 z products (ten sam executemany co w rezerwacji)
+_stock_delta_stmt = (
+    update(effective_table)
+    .where(effective_table.c.product_id == bindparam("p_id"))
+    .values(stock_quantity=effective_table.c.stock_quantity + bindparam("delta"))
+)
+
+
+def mirror_stock(db: Session, deltas: Dict[int, int]) -> None:
+    """
+    Zdjęcie / zwrot na stan już wykonane na products - to samo na modelu odczytu,
+    a po commicie także na migawkach cen i stanów tego procesu (snapshot.py).
+    """
+    params = [{"p_id": pid, "delta": delta} for pid, delta in sorted(deltas.items()) if delta]
+    if params:
+        db.execute(_stock_delta_stmt, params)
+        record_stock_change(db, {p["p_id"]: p["delta"] for p in params})
+
+
+def rebuild(db: Session) -> int:
+    """Pełna przebudowa (pierwsze wdrożenie, naprawa po ręcznych zmianach w bazie)."""
+    db.execute(delete(effective_table))
+    db.execute(insert(effective_table).from_select(EFFECTIVE_COLUMNS, _source()))
+    return db.execute(select(func.count()).select_from(effective_table)).scalar()
+
+
+if __name__ == "__main__":
+    # Uruchomienie: python -m app.modules.catalog.effective rebuild
+    import app.modules.tenancy.models  # noqa: F401 - rejestracja tabeli tenants dla kluczy obcych
+
+    parser = argparse.ArgumentParser(description="Model odczytu effective_products")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        count = rebuild(session)
+        session.commit()
+        print(f"Przebudowano effective_products: {count} produktów.")
+        # Liczniki kategorii sklepów liczone są z tej tabeli
+        print(f"Uzgodniono liczniki kategorii: poprawiono {reconcile(session)}.")
+    finally:
+        session.close()
@@ -0,0 +1,190 @@
+import argparse
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, bindparam, delete, false, func, insert, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.core.versions import bump_version
+from . import models
+from .cache import GLOBAL_CATALOG_VERSION, bump_tenant_catalog
+
+facets_table = models.CategoryFacet.__table__
+
+# Wiersze katalogu globalnego w category_facets
+GLOBAL_FACETS = 0
+
+# Ile rund UPDATE/INSERT przy równoległym wstawianiu tego samego wiersza
+FACET_UPSERT_ATTEMPTS = 3
+
+FacetKey = Tuple[int, str]
+
+
+class FacetDeltas:
+    """
+    Zmiany liczników kategorii zbierane w pamięci i zapisywane jednym apply()
+    w transakcji, która zmienia produkty (jak RollupDeltas dla sprzedaży).
+    Produkty bez kategorii nie mają fasety.
+    """
+
+    def __init__(self):
+        self.rows: Dict[FacetKey, int] = {}
+
+    def add(self, tenant_id: int, category: Optional[str], delta: int = 1) -> None:
+        if not category or not delta:
+            return
+        key = (tenant_id, category)
+        self.rows[key] = self.rows.get(key, 0) + delta
+
+    def moved(self, tenant_id: int, old: Optional[str], new: Optional[str], count: int = 1) -> None:
+        if old != new:
+            self.add(tenant_id, old, -count)
+            self.add(tenant_id, new, count)
+
+    def apply(self, db: Session) -> None:
+        """Jeden executemany UPDATE (x = x + :delta) dla istniejących wierszy, jeden INSERT dla nowych."""
+        pending = [key for key, delta in self.rows.items() if delta]
+
+        for _ in range(FACET_UPSERT_ATTEMPTS):
+            if not pending:
+                break
+            # 1. Które wiersze już istnieją (jedno zapytanie na nadzbiór kluczy)
+            existing = set()
+            for chunk in _chunks(pending):
+                existing.update(
+                    (r.tenant_id, r.category)
+                    for r in db.execute(
+                        select(facets_table.c.tenant_id, facets_table.c.category).where(and_(
+                            facets_table.c.tenant_id.in_({k[0] for k in chunk}),
+                            facets_table.c.category.in_({k[1] for k in chunk})
+                        ))
+                    )
+                )
+
+            # 2. Istniejące - przyrostowy UPDATE
+            to_update = [k for k in pending if k in existing]
+            if to_update:
+                db.execute(_increment_stmt, [
+                    {"k_tenant_id": k[0], "k_category": k[1], "delta": self.rows[k]} for k in to_update
+                ])
+
+            # 3. Nowe - INSERT w savepoincie; jeśli ktoś nas uprzedził, kolejna runda zrobi UPDATE
+            pending = [k for k in pending if k not in existing]
+            if pending:
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(facets_table), [
+                            {"tenant_id": k[0], "category": k[1], "product_count": self.rows[k]} for k in pending
+                        ])
+                    pending = []
+                except IntegrityError:
+                    continue
+
+        if pending:
+            raise RuntimeError("Nie udało się zapisać liczników kategorii (konflikt przy wstawianiu)")
+        self.rows = {}
+
+
+_increment_stmt = (
+    update(facets_table)
+    .where(facets_table.c.tenant_id == bindparam("k_tenant_id"))
+    .where(facets_table.c.category == bindparam("k_category"))
+    .values(product_count=facets_table.c.product_count + bindparam("delta"))
+)
+
+
+def _chunks(keys: List[FacetKey], size: int = 500) -> Iterable[List[FacetKey]]:
+    for start in range(0, len(keys), size):
+        yield keys[start:start + size]
+
+
+def get_facets(db: Session, tenant_id: int) -> List[dict]:
+    """Blok "facets" listy: kategorie z liczbą produktów (odczyt kilku wierszy z klucza głównego)."""
+    rows = db.execute(
+        select(facets_table.c.category, facets_table.c.product_count)
+        .where(facets_table.c.tenant_id == tenant_id)
+        .where(facets_table.c.product_count > 0)
+        .order_by(facets_table.c.category)
+    )
+    return [{"category": row.category, "count": row.product_count} for row in rows]
+
+
+def count_categories(db: Session) -> Dict[FacetKey, int]:
+    """Liczniki policzone od zera z danych (GROUP BY) - podstawa uzgadniania."""
+    counts: Dict[FacetKey, int] = {}
+    gp = models.GlobalProduct
+    for category, count in db.execute(
+        select(gp.category, func.count()).where(gp.category.isnot(None)).group_by(gp.category)
+    ):
+        counts[(GLOBAL_FACETS, category)] = count
+
+    ep = models.EffectiveProduct
+    for tenant_id, category, count in db.execute(
+        select(ep.tenant_id, ep.category, func.count()).where(ep.category.isnot(None))
+        .group_by(ep.tenant_id, ep.category)
+    ):
+        counts[(tenant_id, category)] = count
+    return counts
+
+
+def _lock_facets(db: Session) -> None:
+    """
+    Blokada zapisu category_facets do końca transakcji (odczyty list działają dalej).
+    Zapis produktu zmienia licznik w tej samej transakcji, więc po blokadzie każdy zapis jest albo
+    zatwierdzony (widać go i w licznikach, i w danych), albo czeka i naniesie deltę po nas.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite nie ma LOCK TABLE - pusty UPDATE bierze blokadę zapisu całej bazy
+        db.execute(update(facets_table).where(false()).values(product_count=facets_table.c.product_count))
+    else:
+        db.execute(text(f"LOCK TABLE {facets_table.name} IN EXCLUSIVE MODE"))
+
+
+def reconcile(db: Session) -> int:
+    """
+    Okresowe uzgodnienie: różnice między licznikami a danymi nanosimy jako delty.
+    Odczyt liczników i przeliczenie to dwa zapytania, więc oba robimy pod blokadą tabeli
+    (_lock_facets) - inaczej zapis zatwierdzony pomiędzy nimi zostałby policzony podwójnie albo wcale.
+    Zapisy produktów, które zmieniają kategorie, czekają na koniec uzgadniania.
+    Zwraca liczbę poprawionych liczników.
+    """
+    _lock_facets(db)
+    current = {
+        (r.tenant_id, r.category): r.product_count
+        for r in db.execute(select(facets_table.c.tenant_id, facets_table.c.category, facets_table.c.product_count))
+    }
+    actual = count_categories(db)
+
+    deltas = FacetDeltas()
+    for key in set(current) | set(actual):
+        deltas.add(key[0], key[1], actual.get(key, 0) - current.get(key, 0))
+    changed_tenants = {key[0] for key in deltas.rows}
+    fixed = len(deltas.rows)
+    deltas.apply(db)
+
+    # Puste kategorie nie są już potrzebne
+    db.execute(delete(facets_table).where(facets_table.c.product_count <= 0))
+
+    # Fasety są częścią odpowiedzi list - poprawione liczniki unieważniają cache / ETag
+    for tenant_id in sorted(changed_tenants):
+        if tenant_id == GLOBAL_FACETS:
+            bump_version(db, GLOBAL_CATALOG_VERSION)
+        else:
+            bump_tenant_catalog(db, tenant_id, prices=False)
+    db.commit()
+    return fixed
+
+
+if __name__ == "__main__":
+    # Uruchomienie: python -m app.modules.catalog.facets reconcile
+    import app.modules.tenancy.models  # noqa: F401 - rejestracja tabeli tenants dla kluczy obcych
+
+    parser = argparse.ArgumentParser(description="Liczniki kategorii (nawigacja fasetowa)")
+    parser.add_argument("command", choices=["reconcile"])
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        fixed = reconcile(session)
+        print(f"Uzgodniono liczniki kategorii: poprawiono {fixed}.")
+    finally:
+        session.close()
@@ -0,0 +1,53 @@
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.core.versions import bump_version
+from .cache import bump_tenant_catalog, GLOBAL_CATALOG_VERSION
+from .search import search_backend, GLOBAL, LOCAL
+from .effective import refresh_products, refresh_global_refs
+from .facets import FacetDeltas, GLOBAL_FACETS
+
+# Jedno miejsce na wszystko, co musi się stać w transakcji zapisu produktów
+# (pojedynczy endpoint, import masowy, skrypty) - żeby żadna ścieżka o czymś nie zapomniała.
+
+
+def local_products_written(db: Session, products: List, new: bool = False, reindex: bool = True) -> None:
+    """Po INSERT / UPDATE produktów sklepów (obiekty po flush, z product_id)."""
+    if not products:
+        return
+    if reindex:
+        search_backend.index_many(db, LOCAL, products, new=new)
+    # Model odczytu liczony z tabel w bazie - zmiany ORM muszą już tam być
+    db.flush()
+    refresh_products(db, [p.product_id for p in products], new=new)
+    for tenant_id in sorted({p.tenant_id for p in products}):
+        bump_tenant_catalog(db, tenant_id)
+
+
+def global_products_written(
+    db: Session,
+    products: List,
+    new: bool = False,
+    reindex: bool = True,
+    previous_categories: Optional[Dict[int, Optional[str]]] = None
+) -> None:
+    """
+    Po INSERT / UPDATE produktów katalogu globalnego.
+    previous_categories (global_id -> kategoria przed UPDATE) przenosi liczniki faset przy zmianie kategorii.
+    """
+    if not products:
+        return
+    if reindex:
+        search_backend.index_many(db, GLOBAL, products, new=new)
+    facets = FacetDeltas()
+    for p in products:
+        if new:
+            facets.add(GLOBAL_FACETS, p.category)
+        elif previous_categories is not None:
+            facets.moved(GLOBAL_FACETS, previous_categories.get(p.global_id), p.category)
+    facets.apply(db)
+    bump_version(db, GLOBAL_CATALOG_VERSION)
+    # Pola dziedziczone przez produkty sklepów (nowy produkt globalny nie ma jeszcze odwołań)
+    if not new:
+        db.flush()
+        for tenant_id in sorted(refresh_global_refs(db, [p.global_id for p in products])):
+            bump_tenant_catalog(db, tenant_id)
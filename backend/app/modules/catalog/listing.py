@@ -0,0 +1,144 @@
+import base64
+import binascii
+import json
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from app.core.cache import TTLCache
+from app.core.config import CATALOG_PAGE_MAX, CATALOG_COUNT_CACHE_TTL, CATALOG_COUNT_CACHE_SIZE
+from . import models
+
+# Lista sklepu czyta z modelu odczytu (produkt + pola z katalogu globalnego)
+ListedProduct = models.EffectiveProduct
+
+# Kolumna sortowania -> klucz keyset to zawsze (kolumna, product_id), żeby był unikalny
+SORT_COLUMNS = {
+    "price": ListedProduct.price,
+    "name": ListedProduct.name,
+}
+
+# Liczniki produktów per (tenant_id, search) - COUNT nie liczymy przy każdej stronie
+product_count_cache = TTLCache(CATALOG_COUNT_CACHE_SIZE, CATALOG_COUNT_CACHE_TTL)
+
+
+def normalize_sort(sort_by: str, sort_order: str, relevance=None):
+    """
+    newest zawsze od najnowszych (jak wcześniej), pozostałe asc / desc.
+    relevance (trafność wyszukiwania) tylko gdy podano search, zawsze od najlepszych.
+    """
+    if sort_by == "relevance" and relevance is not None:
+        return "relevance", "desc"
+    if sort_by not in SORT_COLUMNS:
+        return "newest", "desc"
+    return sort_by, "desc" if sort_order == "desc" else "asc"
+
+
+def encode_cursor(sort_by: str, sort_order: str, values: list) -> str:
+    raw = json.dumps({"s": sort_by, "o": sort_order, "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> list:
+    """Kursor jest nieprzezroczysty dla klienta - sprawdzamy, czy pasuje do bieżącego sortowania."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        values = data["v"]
+        valid = data["s"] == sort_by and data["o"] == sort_order and len(values) == (1 if sort_by == "newest" else 2)
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        valid = False
+    if not valid:
+        raise HTTPException(status_code=400, detail="Nieprawidłowy kursor (zmieniono sortowanie?). Zacznij od pierwszej strony.")
+    return values
+
+
+def apply_sort(query, sort_by: str, sort_order: str, after: Optional[list] = None, relevance=None):
+    """ORDER BY klucza sortowania + warunek "za kursorem" (rozpisany na OR - Oracle nie porównuje krotek)."""
+    pid = ListedProduct.product_id
+    if sort_by == "newest":
+        if after is not None:
+            query = query.filter(pid < after[0])
+        return query.order_by(pid.desc())
+
+    column = relevance if sort_by == "relevance" else SORT_COLUMNS[sort_by]
+    if sort_order == "desc":
+        if after is not None:
+            query = query.filter(or_(column < after[0], and_(column == after[0], pid < after[1])))
+        return query.order_by(column.desc(), pid.desc())
+
+    if after is not None:
+        query = query.filter(or_(column > after[0], and_(column == after[0], pid > after[1])))
+    return query.order_by(column.asc(), pid.asc())
+
+
+def count_products(query, cache_key, exact: bool = False):
+    """
+    Liczba wyników z cache (TTL); exact=True wymusza świeży COUNT i odświeża cache.
+    Zwraca (total, czy_dokładna) - wartość z cache może być nieaktualna o kilka produktów.
+    """
+    if not exact:
+        cached = product_count_cache.get(cache_key)
+        if cached is not None:
+            return cached, False
+    total = query.order_by(None).count()
+    product_count_cache.set(cache_key, total)
+    return total, True
+
+
+def invalidate_product_counts(tenant_id: int) -> None:
+    product_count_cache.invalidate(lambda key: key[0] == tenant_id)
+
+
+def get_product_page(
+    query,
+    count_key,
+    page: int,
+    limit: int,
+    sort_by: str,
+    sort_order: str,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
+    relevance=None
+) -> dict:
+    """
+    Strona produktów. Z kursorem (next_cursor z poprzedniej odpowiedzi) strona N kosztuje
+    tyle samo co pierwsza - indeks (tenant_id, kolumna, product_id) i limit+1 wierszy.
+    Bez kursora działa dotychczasowe page/offset (skok na dowolną stronę).
+    relevance to kolumna score z dołączonego wyniku wyszukiwarki (search.py).
+    """
+    limit = max(1, min(limit, CATALOG_PAGE_MAX))
+    page = max(1, page)
+    sort_by, sort_order = normalize_sort(sort_by, sort_order, relevance)
+
+    total, total_exact = count_products(query, count_key, exact_total)
+
+    after = decode_cursor(cursor, sort_by, sort_order) if cursor else None
+    query = apply_sort(query, sort_by, sort_order, after, relevance)
+    if after is None:
+        query = query.offset((page - 1) * limit)
+
+    # Jeden wiersz więcej - wiemy, czy jest następna strona
+    if sort_by == "relevance":
+        rows = query.add_columns(relevance).limit(limit + 1).all()
+        products = [row[0] for row in rows]
+        keys = [[row[1], row[0].product_id] for row in rows]
+    else:
+        products = query.limit(limit + 1).all()
+        keys = [
+            [p.product_id] if sort_by == "newest" else [getattr(p, sort_by), p.product_id]
+            for p in products
+        ]
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = encode_cursor(sort_by, sort_order, keys[limit - 1])
+
+    return {
+        "total": total,
+        "total_exact": total_exact,
+        "page": page,
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "products": products
+    }
@@ -0,0 +1,98 @@
+from fastapi import HTTPException
+from sqlalchemy import and_, func, select, true, update
+from sqlalchemy.orm import Session
+from app.core.config import BULK_UPDATE_MAX_KEYS
+from . import models, schemas
+from .cache import bump_tenant_catalog
+from .effective import refresh_columns
+from .search import search_backend, LOCAL
+
+products_table = models.Product.__table__
+
+
+def _where(tenant_id: int, flt: schemas.BulkProductFilter):
+    """Warunek WHERE z filtra - zawsze zawężony do sklepu właściciela."""
+    p = products_table.c
+    conditions = [p.tenant_id == tenant_id]
+    if flt.product_ids is not None:
+        conditions.append(p.product_id.in_(flt.product_ids))
+    if flt.skus is not None:
+        conditions.append(p.sku.in_(flt.skus))
+    if flt.category:
+        # Kategoria produktu sklepu pochodzi z katalogu globalnego - model odczytu ma ją gotową
+        e = models.EffectiveProduct
+        conditions.append(p.product_id.in_(
+            select(e.product_id).where(e.tenant_id == tenant_id, e.category == flt.category)
+        ))
+    if flt.search:
+        matches = search_backend.match(LOCAL, tenant_id, flt.search).subquery()
+        conditions.append(p.product_id.in_(select(matches.c.entity_id)))
+    return and_(*conditions)
+
+
+def _values_and_guard(op: schemas.BulkProductOperation):
+    """SET ... i warunek, który odrzuca wiersze z ujemną ceną albo stanem po zmianie."""
+    p = products_table.c
+    values, guard = {}, true()
+
+    if op.set_price is not None and op.price_change_percent is not None:
+        raise HTTPException(status_code=400, detail="Podaj tylko jedną operację na cenie")
+    if op.set_stock is not None and op.adjust_stock is not None:
+        raise HTTPException(status_code=400, detail="Podaj tylko jedną operację na stanie")
+
+    if op.set_price is not None:
+        if op.set_price < 0:
+            raise HTTPException(status_code=400, detail="Cena nie może być ujemna")
+        values["price"] = op.set_price
+    elif op.price_change_percent is not None:
+        if op.price_change_percent <= -100:
+            raise HTTPException(status_code=400, detail="Obniżka musi być mniejsza niż 100%")
+        values["price"] = func.round(p.price * (1 + op.price_change_percent / 100.0), 2)
+
+    if op.set_stock is not None:
+        if op.set_stock < 0:
+            raise HTTPException(status_code=400, detail="Stan magazynowy nie może być ujemny")
+        values["stock_quantity"] = op.set_stock
+    elif op.adjust_stock is not None:
+        stock = func.coalesce(p.stock_quantity, 0)
+        values["stock_quantity"] = stock + op.adjust_stock
+        if op.adjust_stock < 0:
+            guard = stock + op.adjust_stock >= 0
+
+    if not values:
+        raise HTTPException(status_code=400, detail="Nie podano żadnej operacji")
+    return values, guard
+
+
+def bulk_update_products(db: Session, tenant_id: int, data: schemas.BulkProductUpdate) -> dict:
+    """
+    Zmiana ceny / stanu wielu produktów jednym UPDATE ... WHERE (filtr) AND (warunek) w bazie,
+    bez pobierania produktów. Model odczytu dostaje te same kolumny jednym UPDATE,
+    a wersja katalogu sklepu rośnie raz na całą operację.
+    """
+    flt = data.filter
+    if not any([flt.product_ids, flt.skus, flt.category, flt.search]):
+        raise HTTPException(status_code=400, detail="Podaj co najmniej jeden filtr (product_ids, skus, category, search)")
+    for keys in (flt.product_ids, flt.skus):
+        if keys is not None and len(keys) > BULK_UPDATE_MAX_KEYS:
+            raise HTTPException(status_code=400, detail=f"Maksymalnie {BULK_UPDATE_MAX_KEYS} pozycji w filtrze")
+
+    values, guard = _values_and_guard(data.operation)
+    where = _where(tenant_id, flt)
+
+    # 1. Ile produktów pasuje do filtra (reszta po warunku to pominięte)
+    matched = db.execute(select(func.count()).select_from(products_table).where(where)).scalar()
+
+    # 2. Jeden UPDATE na całym zbiorze
+    updated = db.execute(
+        update(products_table).where(where).where(guard).values(values)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    if updated:
+        # 3. Te same kolumny w effective_products (skorelowany UPDATE) i jedna nowa wersja katalogu
+        refresh_columns(db, tenant_id, select(products_table.c.product_id).where(where), list(values.keys()))
+        bump_tenant_catalog(db, tenant_id)
+    db.commit()
+
+    return {"matched": matched, "updated": updated, "skipped": matched - updated}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -34,4 +34,78 @@ class Product(Base):
     price = Column(Float, nullable=False)       # Własna cena Tenanta
     description = Column(Text, nullable=True)   # Własny opis
     sku = Column(String(50), index=True)        # Stock Keeping Unit (kod magazynowy)
-    stock_quantity = Column(Integer, default=0)
\ No newline at end of file
+    stock_quantity = Column(Integer, default=0)
+
+    # Stronicowanie keyset listy sklepu: filtr tenant_id + ORDER BY (kolumna, product_id) z indeksu
+    __table_args__ = (
+        Index("ix_products_tenant_product", "tenant_id", "product_id"),
+        Index("ix_products_tenant_price", "tenant_id", "price", "product_id"),
+        Index("ix_products_tenant_name", "tenant_id", "name", "product_id"),
+    )
+
+
+class CatalogSearchTerm(Base):
+    """
+    Indeks wyszukiwania katalogu (search.py): trigramy (kind="T") i całe słowa (kind="W")
+    z nazwy i kodów produktu. Zwykłe indeksy B-tree obsługują tu IN (...) i LIKE 'prefiks%',
+    więc wyszukiwanie nie skanuje tabel produktów.
+    scope = "global" (tenant_id = 0) albo "local" (produkty sklepu).
+    """
+    __tablename__ = "catalog_search_terms"
+
+    scope = Column(String(10), primary_key=True)
+    tenant_id = Column(Integer, primary_key=True, autoincrement=False)
+    kind = Column(String(1), primary_key=True)
+    term = Column(String(50), primary_key=True)
+    entity_id = Column(Integer, primary_key=True, autoincrement=False)
+
+    # Przebudowa wpisów jednego produktu (DELETE ... WHERE scope AND entity_id)
+    __table_args__ = (
+        Index("ix_catalog_search_terms_entity", "scope", "entity_id"),
+    )
+
+
+class EffectiveProduct(Base):
+    """
+    Model odczytu listy sklepu: produkt lokalny ze scalonymi polami z katalogu globalnego
+    (global_ref_id -> kategoria, EAN, opis bazowy, gdy sklep nie ma własnego).
+    Utrzymywany przez effective.py w tych samych transakcjach co zapisy produktów,
+    więc strona sklepu z kategoriami to jedno zapytanie po indeksie, bez JOIN-a.
+    """
+    __tablename__ = "effective_products"
+
+    product_id = Column(Integer, primary_key=True, autoincrement=False)
+    tenant_id = Column(Integer, nullable=False)
+    global_ref_id = Column(Integer, nullable=True)
+
+    name = Column(String(150), nullable=False)
+    price = Column(Float, nullable=False)
+    description = Column(Text, nullable=True)  # własny opis sklepu, a gdy go brak - opis z katalogu globalnego
+    sku = Column(String(50))
+    stock_quantity = Column(Integer, default=0)
+
+    # Dziedziczone z GlobalProduct
+    ean_code = Column(String(20), nullable=True)
+    category = Column(String(50), nullable=True)
+
+    # Te same klucze sortowania co na products + strona kategorii
+    __table_args__ = (
+        Index("ix_effective_tenant_product", "tenant_id", "product_id"),
+        Index("ix_effective_tenant_price", "tenant_id", "price", "product_id"),
+        Index("ix_effective_tenant_name", "tenant_id", "name", "product_id"),
+        Index("ix_effective_tenant_category", "tenant_id", "category", "product_id"),
+        Index("ix_effective_global_ref", "global_ref_id"),
+    )
+
+
+class CategoryFacet(Base):
+    """
+    Liczniki produktów per kategoria do nawigacji fasetowej (facets.py).
+    tenant_id = 0 to katalog globalny, pozostałe - produkty sklepu (kategoria przez global_ref_id).
+    Aktualizowane przyrostowo przy zapisach produktów, okresowo uzgadniane z danymi.
+    """
+    __tablename__ = "category_facets"
+
+    tenant_id = Column(Integer, primary_key=True, autoincrement=False)
+    category = Column(String(50), primary_key=True)
+    product_count = Column(Integer, nullable=False, default=0)
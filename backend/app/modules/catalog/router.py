@@ -1,12 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 from app.core.database import get_db
+from app.core.config import CATALOG_SUGGEST_LIMIT
+from app.core.etag import make_etag, etag_matches, not_modified, PUBLIC_REVALIDATE
+from app.core.versions import get_version
 from app.modules.catalog import models, schemas
-# Importujemy strażnika (funkcję sprawdzającą token) i model User
-from app.modules.auth.dependencies import get_current_user
-from app.modules.tenancy.models import User
+from app.modules.catalog.listing import get_product_page, invalidate_product_counts, product_count_cache
+from app.modules.catalog.cache import (
+    catalog_response_cache, cached_json_response, tenant_catalog_version, GLOBAL_CATALOG_VERSION
+)
+from app.modules.catalog.hooks import local_products_written, global_products_written
+from app.modules.catalog.facets import get_facets, GLOBAL_FACETS
+from app.modules.catalog.snapshot import tenant_snapshots
+from app.modules.catalog.mass_update import bulk_update_products
+from app.modules.catalog.bulk import ProductImport, GlobalProductIngest, detect_format, run_import
+from app.modules.catalog.search import search_backend, GLOBAL, LOCAL, GLOBAL_TENANT
+# Importujemy strażnika (funkcję sprawdzającą token) i zalogowanego użytkownika z tokenu
+from app.modules.auth.dependencies import require_owner, Principal
 
 router = APIRouter(
     prefix="/catalog",
@@ -19,38 +32,63 @@ router = APIRouter(
 def create_global_product(
     product: schemas.GlobalProductCreate, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user) 
+    current_user: Principal = Depends(require_owner) 
 ):
     if db.query(models.GlobalProduct).filter(models.GlobalProduct.ean_code == product.ean_code).first():
         raise HTTPException(status_code=400, detail="Produkt z tym kodem EAN już istnieje w bazie globalnej")
     
     new_gp = models.GlobalProduct(**product.dict())
     db.add(new_gp)
+    db.flush()
+    # Indeks wyszukiwania i wersja katalogu w tej samej transakcji co produkt
+    global_products_written(db, [new_gp], new=True)
     db.commit()
     db.refresh(new_gp)
     return new_gp
 
+# Zasilanie katalogu globalnego feedem dostawcy (CSV / NDJSON), EAN jako klucz
+@router.post("/global/bulk")
+async def bulk_ingest_global_products(
+    request: Request,
+    import_format: Optional[str] = Query(None, alias="format"),
+    update_existing: bool = False,  # True = istniejącym EAN aktualizujemy opis i kategorię
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_owner)
+):
+    fmt = detect_format(import_format, request.headers.get("content-type"))
+    job = GlobalProductIngest(db, update_existing)
+    return await run_import(job, request.stream(), fmt, run_in_threadpool)
+
 # ZMIANA: Dodano paginację i wyszukiwanie (analogicznie do local)
 @router.get("/global/")
 def get_global_products(
+    response: Response,
     page: int = 1, 
     limit: int = 20,
     search: Optional[str] = None,
+    category: Optional[str] = None,  # filtr z bloku facets
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db)
 ):
+    # 0. Warunkowy GET: ta sama wersja katalogu = 304 bez zapytania o produkty
+    etag = make_etag(GLOBAL_CATALOG_VERSION, get_version(db, GLOBAL_CATALOG_VERSION), (page, limit, search, category))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PUBLIC_REVALIDATE)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PUBLIC_REVALIDATE
+
     skip = (page - 1) * limit
     
     # 1. Budujemy zapytanie
     query = db.query(models.GlobalProduct)
+    if category:
+        query = query.filter(models.GlobalProduct.category == category)
     
-    # 2. Wyszukiwanie (jeśli podano parametr search)
+    # 2. Wyszukiwanie (jeśli podano parametr search) - po nazwie LUB kodzie EAN, od najtrafniejszych
     if search:
-        search_fmt = f"%{search}%"
-        # Szukamy po nazwie LUB kodzie EAN
-        query = query.filter(
-            (models.GlobalProduct.name.ilike(search_fmt)) | 
-            (models.GlobalProduct.ean_code.ilike(search_fmt))
-        )
+        matches = search_backend.match(GLOBAL, GLOBAL_TENANT, search).subquery()
+        query = query.join(matches, matches.c.entity_id == models.GlobalProduct.global_id)\
+            .order_by(matches.c.score.desc(), models.GlobalProduct.global_id.desc())
 
     # 3. Liczymy całkowitą ilość (do paginacji)
     total_count = query.count()
@@ -62,9 +100,20 @@ def get_global_products(
         "total": total_count,
         "page": page,
         "limit": limit,
-        "products": products
+        "products": products,
+        # 5. Liczniki kategorii - gotowe wiersze category_facets zamiast GROUP BY po katalogu
+        "facets": get_facets(db, GLOBAL_FACETS)
     }
 
+# Podpowiedzi do pola wyszukiwania (prefiks ostatniego słowa)
+@router.get("/global/suggest", response_model=List[schemas.SearchSuggestion])
+def suggest_global_products(
+    q: str,
+    limit: int = CATALOG_SUGGEST_LIMIT,
+    db: Session = Depends(get_db)
+):
+    return search_backend.suggest(db, GLOBAL, GLOBAL_TENANT, q, max(1, min(limit, CATALOG_SUGGEST_LIMIT)))
+
 # --- ENDPOINTY LOKALNE (SKLEPOWE) ---
 
 @router.post("/local/", response_model=schemas.ProductResponse)
@@ -72,7 +121,7 @@ def create_local_product(
     product: schemas.ProductCreate, 
     db: Session = Depends(get_db),
     # ZABEZPIECZENIE: Pobieramy użytkownika z tokena
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(require_owner)
 ):
     # MAGIA SAAS:
     # Ignorujemy tenant_id przesłane w JSONie (nawet jak user wpisze tam ID sąsiada).
@@ -87,58 +136,111 @@ def create_local_product(
 
     new_product = models.Product(**product_data)
     db.add(new_product)
+    db.flush()
+    local_products_written(db, [new_product], new=True)
     db.commit()
     db.refresh(new_product)
+    # Nowy produkt zmienia liczniki (total) w listach tego sklepu
+    invalidate_product_counts(current_user.tenant_id)
     return new_product
 
+# --- IMPORT MASOWY (CSV / NDJSON) ---
+@router.post("/local/bulk")
+async def bulk_import_local_products(
+    request: Request,
+    import_format: Optional[str] = Query(None, alias="format"),  # csv lub ndjson (albo Content-Type)
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_owner)
+):
+    # Plik czytamy strumieniowo - w pamięci jest tylko bieżąca paczka wierszy.
+    # Zapis paczek (sync SQLAlchemy) idzie w puli wątków, żeby nie blokować pętli zdarzeń.
+    fmt = detect_format(import_format, request.headers.get("content-type"))
+    job = ProductImport(db, current_user.tenant_id)
+    result = await run_import(job, request.stream(), fmt, run_in_threadpool)
+
+    invalidate_product_counts(current_user.tenant_id)
+    return result
+
+# --- MASOWA ZMIANA CEN I STANÓW (jeden UPDATE zamiast PATCH na każdy produkt) ---
+@router.post("/local/bulk-update", response_model=schemas.BulkProductUpdateResult)
+def bulk_update_local_products(
+    data: schemas.BulkProductUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_owner)
+):
+    # Zakres zawsze z tokenu - właściciel zmienia tylko produkty swojego sklepu
+    return bulk_update_products(db, current_user.tenant_id, data)
+
 @router.get("/local/{tenant_id}")
 def get_tenant_products(
     tenant_id: int, 
     page: int = 1, 
     limit: int = 20,
     search: Optional[str] = None,
-    sort_by: str = "newest",  # <--- Opcje: newest, price, name
+    category: Optional[str] = None,  # filtr z bloku facets
+    sort_by: str = "newest",  # <--- Opcje: newest, price, name, relevance (z search)
     sort_order: str = "asc",  # <--- Opcje: asc, desc
+    cursor: Optional[str] = None,  # next_cursor z poprzedniej strony (zamiast page)
+    exact_total: bool = False,  # True = świeży COUNT zamiast licznika z cache
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db)
 ):
-    skip = (page - 1) * limit
-    
-    # 1. Budujemy zapytanie bazowe
-    query = db.query(models.Product).filter(models.Product.tenant_id == tenant_id)
-    
-    # 2. Wyszukiwanie (Search)
-    if search:
-        search_fmt = f"%{search}%"
-        query = query.filter(
-            (models.Product.name.ilike(search_fmt)) | 
-            (models.Product.sku.ilike(search_fmt))
+    def build_page():
+        # 1. Budujemy zapytanie bazowe - model odczytu ma już kategorię / EAN / opis z katalogu globalnego
+        query = db.query(models.EffectiveProduct).filter(models.EffectiveProduct.tenant_id == tenant_id)
+        if category:
+            query = query.filter(models.EffectiveProduct.category == category)
+
+        # 2. Wyszukiwanie (Search) - po nazwie LUB SKU, przez indeks wyszukiwarki
+        relevance = None
+        if search:
+            matches = search_backend.match(LOCAL, tenant_id, search).subquery()
+            query = query.join(matches, matches.c.entity_id == models.EffectiveProduct.product_id)
+            relevance = matches.c.score
+
+        # 3. Sortowanie + stronicowanie (keyset po kursorze, total z cache)
+        result = get_product_page(
+            query, (tenant_id, search or "", category or ""), page, limit, sort_by, sort_order, cursor, exact_total, relevance
         )
-    
-    # 3. Sortowanie (Sorting) <--- NOWOŚĆ
-    if sort_by == "price":
-        if sort_order == "desc":
-            query = query.order_by(models.Product.price.desc())
-        else:
-            query = query.order_by(models.Product.price.asc())
-            
-    elif sort_by == "name":
-        if sort_order == "desc":
-            query = query.order_by(models.Product.name.desc())
-        else:
-            query = query.order_by(models.Product.name.asc())
-            
-    else: # Domyślnie "newest" (po ID)
-        query = query.order_by(models.Product.product_id.desc())
-
-    # 4. Liczenie i Paginacja
-    total_count = query.count()
-    products = query.offset(skip).limit(limit).all()
-        
+        # Liczniki kategorii sklepu - gotowe wiersze category_facets zamiast GROUP BY
+        result["facets"] = get_facets(db, tenant_id)
+        return result
+
+    # Świeży COUNT to świadome ominięcie cache (i ETag)
+    if exact_total:
+        return build_page()
+
+    # 4. Warunkowy GET: niezmieniona wersja katalogu sklepu = 304 bez zapytania o produkty
+    version_name = tenant_catalog_version(tenant_id)
+    version = get_version(db, version_name)
+    key = (tenant_id, page, limit, cursor, search, category, sort_by, sort_order)
+    etag = make_etag(version_name, version, key)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PUBLIC_REVALIDATE)
+
+    # 5. Read-through cache: ruch ze sklepu dostaje gotowy JSON, dopóki właściciel nic nie zmieni
+    return cached_json_response(
+        version_name, version, key, build_page,
+        headers={"ETag": etag, "Cache-Control": PUBLIC_REVALIDATE}
+    )
+
+@router.get("/local/{tenant_id}/suggest", response_model=List[schemas.SearchSuggestion])
+def suggest_tenant_products(
+    tenant_id: int,
+    q: str,
+    limit: int = CATALOG_SUGGEST_LIMIT,
+    db: Session = Depends(get_db)
+):
+    return search_backend.suggest(db, LOCAL, tenant_id, q, max(1, min(limit, CATALOG_SUGGEST_LIMIT)))
+
+
+# Liczniki cache list katalogu (do doboru rozmiaru i TTL)
+@router.get("/cache/stats")
+def get_catalog_cache_stats(current_user: Principal = Depends(require_owner)):
     return {
-        "total": total_count,
-        "page": page,
-        "limit": limit,
-        "products": products
+        "responses": catalog_response_cache.stats(),
+        "counts": product_count_cache.stats(),
+        "snapshots": tenant_snapshots.stats()
     }
 
 
@@ -156,7 +258,7 @@ def update_product(
     product_id: int, 
     product_data: ProductUpdate, 
     db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(require_owner)
 ):
     # 1. Szukamy produktu w bazie
     product = db.query(models.Product).filter(models.Product.product_id == product_id).first()
@@ -182,6 +284,8 @@ def update_product(
     if product_data.stock_quantity is not None:
         product.stock_quantity = product_data.stock_quantity
 
+    # Nowa wersja katalogu sklepu (listy w cache nieaktualne), a przy zmianie nazwy - nowy indeks wyszukiwania
+    local_products_written(db, [product], reindex=product_data.name is not None)
     db.commit()
     db.refresh(product)
     return product
\ No newline at end of file
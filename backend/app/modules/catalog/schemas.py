@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 # --- PRODUKTY GLOBALNE (HURTOWNIA) ---
 class GlobalProductBase(BaseModel):
@@ -39,4 +39,35 @@ class ProductResponse(ProductBase):
     stock_quantity: int  
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+# --- PODPOWIEDZI WYSZUKIWARKI (AUTOCOMPLETE) ---
+class SearchSuggestion(BaseModel):
+    id: int    # global_id albo product_id (zależnie od katalogu)
+    name: str
+
+
+# --- MASOWA ZMIANA CEN I STANÓW ---
+class BulkProductFilter(BaseModel):
+    # Warunki łączone przez AND; zawsze w obrębie sklepu zalogowanego właściciela
+    product_ids: Optional[List[int]] = None
+    skus: Optional[List[str]] = None
+    category: Optional[str] = None  # kategoria z katalogu globalnego (przez global_ref_id)
+    search: Optional[str] = None    # jak w wyszukiwarce listy sklepu
+
+class BulkProductOperation(BaseModel):
+    # Najwyżej jedna operacja na cenie i jedna na stanie
+    set_price: Optional[float] = None
+    price_change_percent: Optional[float] = None  # np. -10 = obniżka o 10%
+    set_stock: Optional[int] = None
+    adjust_stock: Optional[int] = None            # np. +5 dostawa, -2 korekta
+
+class BulkProductUpdate(BaseModel):
+    filter: BulkProductFilter
+    operation: BulkProductOperation
+
+class BulkProductUpdateResult(BaseModel):
+    matched: int
+    updated: int
+    skipped: int  # pasujące, ale odrzucone przez warunek (np. stan poniżej zera)
@@ -0,0 +1,252 @@
+import argparse
+import math
+from abc import ABC, abstractmethod
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Set, Tuple
+from sqlalchemy import delete, false, func, insert, literal, or_, select, union_all
+from sqlalchemy.orm import Session
+from app.core.config import CATALOG_SEARCH_BACKEND, CATALOG_SEARCH_MIN_SIMILARITY, CATALOG_SEARCH_MAX_QUERY
+from app.core.database import SessionLocal
+from . import models
+
+# Zakresy wyszukiwania: katalog globalny (hurtownia) i produkty sklepów
+GLOBAL = "global"
+LOCAL = "local"
+GLOBAL_TENANT = 0
+
+# Rodzaje wpisów w catalog_search_terms
+TRIGRAM = "T"
+WORD = "W"
+MAX_TERM_LENGTH = 50
+
+# Litery, których NFKD nie rozkłada na literę bazową + znak diakrytyczny
+_EXTRA_FOLDS = str.maketrans({"ł": "l", "đ": "d", "ø": "o", "ß": "ss"})
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+# --- 1. NORMALIZACJA TEKSTU ---
+
+def normalize(text: Optional[str]) -> str:
+    """Małe litery bez polskich znaków: "Łódź Gitara" -> "lodz gitara"."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text.lower().translate(_EXTRA_FOLDS))
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [word[:MAX_TERM_LENGTH] for word in _WORD_RE.findall(normalize(text))]
+
+
+def trigrams(word: str, padded: bool = True) -> Set[str]:
+    """Trigramy słowa jak w pg_trgm: "  gibson " -> "  g", " gi", "gib", ..., "on "."""
+    if padded or len(word) < 3:
+        word = f"  {word} "
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def document_terms(texts: Iterable[Optional[str]]) -> Set[Tuple[str, str]]:
+    terms = set()
+    for text in texts:
+        for word in tokenize(text):
+            terms.add((WORD, word))
+            terms.update((TRIGRAM, gram) for gram in trigrams(word))
+    return terms
+
+
+def query_trigrams(text: str) -> Tuple[Set[str], Set[str]]:
+    """
+    Trigramy zapytania: (dokładne, przybliżone).
+    Słowa z cyframi (EAN, SKU) to fragmenty kodu - bez dopełnienia spacjami, żeby "1234"
+    trafiało w środek dłuższego kodu, i bez tolerancji na literówki (wszystkie trigramy).
+    """
+    strict, fuzzy = set(), set()
+    for word in tokenize(text[:CATALOG_SEARCH_MAX_QUERY]):
+        if any(c.isdigit() for c in word):
+            strict.update(trigrams(word, padded=False))
+        else:
+            fuzzy.update(trigrams(word))
+    return strict, fuzzy - strict
+
+
+# --- 2. OPIS INDEKSOWANYCH ENCJI ---
+
+def _describe(scope: str):
+    """(model, kolumna id, kolumna tenant_id albo None, kolumny tekstowe w indeksie)"""
+    if scope == GLOBAL:
+        gp = models.GlobalProduct
+        return gp, gp.global_id, None, [gp.name, gp.ean_code]
+    p = models.Product
+    return p, p.product_id, p.tenant_id, [p.name, p.sku]
+
+
+def _entity_key(scope: str, entity) -> Tuple[int, int, list]:
+    """(entity_id, tenant_id, teksty) dla obiektu ORM albo wiersza z select()."""
+    if scope == GLOBAL:
+        return entity.global_id, GLOBAL_TENANT, [entity.name, entity.ean_code]
+    return entity.product_id, entity.tenant_id, [entity.name, entity.sku]
+
+
+# --- 3. IMPLEMENTACJE WYSZUKIWARKI ---
+
+class SearchBackend(ABC):
+    """
+    Wyszukiwarka katalogu. match() zwraca select (entity_id, score), który router
+    dołącza JOIN-em do listy produktów - filtr i ranking w jednym zapytaniu.
+    """
+    name = ""
+
+    def index(self, db: Session, scope: str, entity) -> None:
+        """Aktualizuje indeks po zapisie produktu (w tej samej transakcji)."""
+        self.index_many(db, scope, [entity])
+
+    def index_many(self, db: Session, scope: str, entities: List, new: bool = False) -> None:
+        """Jak index() dla wielu produktów naraz; new=True - produkty świeżo wstawione (bez DELETE)."""
+
+    def reindex(self, db: Session, scope: str, chunk_rows: int = 5000) -> int:
+        return 0
+
+    @abstractmethod
+    def match(self, scope: str, tenant_id: int, text: str):
+        """select (entity_id, score) produktów pasujących do frazy."""
+
+    @abstractmethod
+    def suggest(self, db: Session, scope: str, tenant_id: int, text: str, limit: int) -> List[dict]:
+        """Podpowiedzi do pola wyszukiwania (limit najlepszych)."""
+
+
+class LikeSearchBackend(SearchBackend):
+    """Dotychczasowe ILIKE '%fraza%' - bez indeksu (pełny skan), awaryjnie i do porównań."""
+    name = "like"
+
+    def match(self, scope: str, tenant_id: int, text: str):
+        model, id_col, tenant_col, text_cols = _describe(scope)
+        pattern = f"%{text}%"
+        stmt = select(id_col.label("entity_id"), literal(1).label("score"))\
+            .where(or_(*[col.ilike(pattern) for col in text_cols]))
+        if tenant_col is not None:
+            stmt = stmt.where(tenant_col == tenant_id)
+        return stmt
+
+    def suggest(self, db: Session, scope: str, tenant_id: int, text: str, limit: int) -> List[dict]:
+        model, id_col, tenant_col, text_cols = _describe(scope)
+        stmt = select(id_col, model.name).where(model.name.ilike(f"{text}%")).order_by(model.name).limit(limit)
+        if tenant_col is not None:
+            stmt = stmt.where(tenant_col == tenant_id)
+        return [{"id": row[0], "name": row[1]} for row in db.execute(stmt)]
+
+
+class TrigramSearchBackend(SearchBackend):
+    """
+    Indeks odwrócony w tabeli catalog_search_terms - działa tak samo na Oracle i SQLite.
+    Wyszukiwanie: produkty, które mają co najmniej CATALOG_SEARCH_MIN_SIMILARITY trigramów
+    słów zapytania (odporne na literówki) i wszystkie trigramy fragmentów kodów,
+    score = liczba wspólnych trigramów.
+    Podpowiedzi: całe słowa + prefiks ostatniego słowa (LIKE 'pre%' po indeksie).
+    """
+    name = "trigram"
+
+    def _rows(self, scope: str, entity_id: int, tenant_id: int, texts) -> List[dict]:
+        return [
+            {"scope": scope, "tenant_id": tenant_id, "kind": kind, "term": term, "entity_id": entity_id}
+            for kind, term in document_terms(texts)
+        ]
+
+    def index_many(self, db: Session, scope: str, entities: List, new: bool = False) -> None:
+        terms = models.CatalogSearchTerm.__table__
+        keys = [_entity_key(scope, entity) for entity in entities]
+        if not keys:
+            return
+        if not new:
+            # Oracle: max 1000 elementów w IN
+            ids = [key[0] for key in keys]
+            for start in range(0, len(ids), 1000):
+                db.execute(delete(terms).where(terms.c.scope == scope, terms.c.entity_id.in_(ids[start:start + 1000])))
+        rows = [row for key in keys for row in self._rows(scope, *key)]
+        if rows:
+            db.execute(insert(terms), rows)
+
+    def reindex(self, db: Session, scope: str, chunk_rows: int = 5000) -> int:
+        """Przebudowa całego zakresu: produkty czytane strumieniowo, wpisy wstawiane paczkami."""
+        terms = models.CatalogSearchTerm.__table__
+        model, id_col, tenant_col, text_cols = _describe(scope)
+        columns = [id_col] + ([tenant_col] if tenant_col is not None else []) + text_cols
+
+        db.execute(delete(terms).where(terms.c.scope == scope))
+        count, pending = 0, []
+        stmt = select(*columns).execution_options(stream_results=True, yield_per=chunk_rows)
+        for row in db.execute(stmt):
+            pending.extend(self._rows(scope, *_entity_key(scope, row)))
+            count += 1
+            if len(pending) >= chunk_rows:
+                db.execute(insert(terms), pending)
+                pending = []
+        if pending:
+            db.execute(insert(terms), pending)
+        db.commit()
+        return count
+
+    def match(self, scope: str, tenant_id: int, text: str):
+        t = models.CatalogSearchTerm
+        strict, fuzzy = query_trigrams(text)
+        stmt = select(t.entity_id.label("entity_id"), func.count().label("score"))\
+            .where(t.scope == scope, t.tenant_id == tenant_id, t.kind == TRIGRAM)\
+            .group_by(t.entity_id)
+        if not strict and not fuzzy:
+            return stmt.where(false())
+        needed = max(1, len(strict) + math.ceil(len(fuzzy) * CATALOG_SEARCH_MIN_SIMILARITY))
+        return stmt.where(t.term.in_(sorted(strict | fuzzy))).having(func.count() >= needed)
+
+    def suggest(self, db: Session, scope: str, tenant_id: int, text: str, limit: int) -> List[dict]:
+        words = tokenize(text[:CATALOG_SEARCH_MAX_QUERY])
+        if not words:
+            return []
+        *complete, prefix = words
+
+        # Tokeny to tylko [a-z0-9], więc prefiks nie zawiera znaków specjalnych LIKE
+        t = models.CatalogSearchTerm
+        conditions = [t.term == word for word in dict.fromkeys(complete)] + [t.term.like(f"{prefix}%")]
+        # Trafienia oznaczone numerem słowa zapytania - prefiks pasujący do kilku słów nazwy liczy się raz
+        hits = union_all(*[
+            select(t.entity_id, t.term, literal(i).label("token"))
+            .where(t.scope == scope, t.tenant_id == tenant_id, t.kind == WORD, condition)
+            for i, condition in enumerate(conditions)
+        ]).subquery()
+        matches = select(hits.c.entity_id, func.count(func.distinct(hits.c.term)).label("score"))\
+            .group_by(hits.c.entity_id)\
+            .having(func.count(func.distinct(hits.c.token)) == len(conditions))\
+            .subquery()
+
+        model, id_col, tenant_col, text_cols = _describe(scope)
+        stmt = select(id_col, model.name)\
+            .join(matches, matches.c.entity_id == id_col)\
+            .order_by(matches.c.score.desc(), model.name)\
+            .limit(limit)
+        return [{"id": row[0], "name": row[1]} for row in db.execute(stmt)]
+
+
+_BACKENDS = {backend.name: backend for backend in (TrigramSearchBackend, LikeSearchBackend)}
+
+if CATALOG_SEARCH_BACKEND not in _BACKENDS:
+    raise ValueError(f"Nieznany CATALOG_SEARCH_BACKEND: {CATALOG_SEARCH_BACKEND} (dostępne: {', '.join(_BACKENDS)})")
+
+search_backend: SearchBackend = _BACKENDS[CATALOG_SEARCH_BACKEND]()
+
+
+if __name__ == "__main__":
+    # Uruchomienie: python -m app.modules.catalog.search reindex [--scope global|local]
+    import app.modules.tenancy.models  # noqa: F401 - rejestracja tabeli tenants dla kluczy obcych
+
+    parser = argparse.ArgumentParser(description="Indeks wyszukiwania katalogu")
+    parser.add_argument("command", choices=["reindex"])
+    parser.add_argument("--scope", choices=[GLOBAL, LOCAL], default=None)
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        for scope in [args.scope] if args.scope else [GLOBAL, LOCAL]:
+            count = search_backend.reindex(session, scope)
+            print(f"Zaindeksowano {count} produktów ({scope}, backend: {search_backend.name}).")
+    finally:
+        session.close()
@@ -0,0 +1,248 @@
+import glob
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Optional
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import (
+    CATALOG_SNAPSHOT_MAX_TENANTS, CATALOG_SNAPSHOT_MAX_BYTES, CATALOG_SNAPSHOT_TTL, CATALOG_SNAPSHOT_DIR,
+    CATALOG_SNAPSHOT_STOCK_REFRESH
+)
+from app.core.versions import get_version
+from app.modules.tenancy.models import Tenant
+from . import models
+from .cache import tenant_catalog_version, tenant_prices_version
+
+# Plik migawki: nagłówek (magic, wersja, liczba produktów) + kolumny ids | prices | stock
+SNAPSHOT_MAGIC = b"MSS1"
+_HEADER = struct.Struct("<4s4xqq")
+# Bajtów na produkt: product_id (q) + cena (d) + stan (q)
+ROW_BYTES = 24
+
+# Klucz w Session.info: zmiany stanów (product_id -> delta) do naniesienia na migawki po commicie
+_PENDING_STOCK = "pending_snapshot_stock"
+
+
+class TenantSnapshot:
+    """
+    Ceny i stany produktów jednego sklepu w trzech równoległych kolumnach:
+    posortowane product_id + cena + stan (ok. 24 bajty na produkt, bez obiektów ORM).
+    Kolumny to array albo memoryview na zmapowanym pliku (wspólny dla workerów uvicorn).
+    Produkt szukamy binarnie (bisect) po kolumnie ids.
+    version to wersja cen (tenant_prices_version); stock_version - wersja katalogu, z której są stany.
+    """
+    __slots__ = ("tenant_id", "version", "ids", "prices", "stock", "stock_version", "stock_synced_at", "_mmap")
+
+    def __init__(self, tenant_id: int, version: int, ids, prices, stock, mapped: Optional[mmap.mmap] = None):
+        self.tenant_id = tenant_id
+        self.version = version
+        self.ids = ids
+        self.prices = prices
+        self.stock = stock
+        self.stock_version = -1
+        self.stock_synced_at = 0.0
+        self._mmap = mapped
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.ids) * ROW_BYTES
+
+    def find(self, product_id: int) -> int:
+        """Indeks produktu w kolumnach albo -1 (produkt innego sklepu lub nieistniejący)."""
+        i = bisect_left(self.ids, product_id)
+        if i < len(self.ids) and self.ids[i] == product_id:
+            return i
+        return -1
+
+    def writable_stock(self):
+        """Kolumna stanów do zmiany w miejscu (kolumna z pliku jest tylko do odczytu - kopiujemy ją)."""
+        if not isinstance(self.stock, array):
+            self.stock = array("q", self.stock)
+        return self.stock
+
+
+def build_snapshot(db: Session, tenant_id: int, version: int) -> TenantSnapshot:
+    """Jedno zapytanie po indeksie (tenant_id, product_id) - wiersze od razu w kolumnach."""
+    p = models.Product
+    ids, prices, stock = array("q"), array("d"), array("q")
+    rows = db.execute(
+        select(p.product_id, p.price, p.stock_quantity)
+        .where(p.tenant_id == tenant_id)
+        .order_by(p.product_id)
+        .execution_options(yield_per=5000)
+    )
+    for product_id, price, quantity in rows:
+        ids.append(product_id)
+        prices.append(price)
+        stock.append(quantity or 0)
+    return TenantSnapshot(tenant_id, version, ids, prices, stock)
+
+
+def _snapshot_path(tenant_id: int, version: int) -> str:
+    return os.path.join(CATALOG_SNAPSHOT_DIR, f"tenant-{tenant_id}-v{version}.snap")
+
+
+def save_snapshot(snapshot: TenantSnapshot) -> None:
+    """Zapis atomowy (plik tymczasowy + rename); starsze wersje tego sklepu usuwamy."""
+    path = _snapshot_path(snapshot.tenant_id, snapshot.version)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, snapshot.version, len(snapshot)))
+        for column in (snapshot.ids, snapshot.prices, snapshot.stock):
+            f.write(column.tobytes() if isinstance(column, array) else bytes(column))
+    os.replace(tmp, path)
+
+    for old in glob.glob(os.path.join(CATALOG_SNAPSHOT_DIR, f"tenant-{snapshot.tenant_id}-v*.snap")):
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass  # inny worker mógł go już usunąć
+
+
+def load_snapshot(tenant_id: int, version: int) -> Optional[TenantSnapshot]:
+    """Mapuje plik zapisany przez dowolny worker - strony pamięci są współdzielone, nic nie kopiujemy."""
+    try:
+        with open(_snapshot_path(tenant_id, version), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    # Ucięty plik (np. pełny dysk przy zapisie) - budujemy migawkę od nowa
+    if len(mapped) < _HEADER.size:
+        mapped.close()
+        return None
+    magic, file_version, count = _HEADER.unpack_from(mapped)
+    if magic != SNAPSHOT_MAGIC or file_version != version or len(mapped) != _HEADER.size + count * ROW_BYTES:
+        mapped.close()
+        return None
+
+    view = memoryview(mapped)
+    start = _HEADER.size
+    ids = view[start:start + count * 8].cast("q")
+    prices = view[start + count * 8:start + count * 16].cast("d")
+    stock = view[start + count * 16:start + count * 24].cast("q")
+    return TenantSnapshot(tenant_id, version, ids, prices, stock, mapped)
+
+
+class SnapshotStore:
+    """
+    Migawki sklepów w pamięci procesu (LRU z limitem bajtów), budowane leniwie
+    i przebudowywane, gdy zmieni się wersja cen sklepu (change_versions).
+    Z CATALOG_SNAPSHOT_DIR worker najpierw szuka pliku tej wersji zbudowanego przez inny proces.
+    Zamówienia zmieniają tylko stany: ten proces nanosi je po commicie (apply_stock), a migawka
+    ze starszą wersją katalogu doczytuje samą kolumnę stanów najwyżej co CATALOG_SNAPSHOT_STOCK_REFRESH s.
+    """
+
+    def __init__(self, max_tenants: int, max_bytes: int, ttl_seconds: float):
+        self.snapshots = TTLCache(max_tenants, ttl_seconds, max_bytes=max_bytes, sizeof=lambda s: s.nbytes)
+        self._build_lock = threading.Lock()
+        self.builds = 0
+        self.stock_syncs = 0
+
+    def get(self, db: Session, tenant_id: int) -> TenantSnapshot:
+        version = get_version(db, tenant_prices_version(tenant_id))
+        stock_version = get_version(db, tenant_catalog_version(tenant_id))
+        snapshot = self.snapshots.get(tenant_id)
+        if snapshot is not None and snapshot.version == version:
+            if snapshot.stock_version != stock_version and \
+                    time.monotonic() - snapshot.stock_synced_at >= CATALOG_SNAPSHOT_STOCK_REFRESH:
+                with self._build_lock:
+                    if snapshot.stock_version != stock_version:
+                        self._sync_stock(db, snapshot, stock_version)
+            return snapshot
+
+        # Jedna przebudowa naraz - równoległe żądania tego samego sklepu czekają na wynik
+        with self._build_lock:
+            snapshot = self.snapshots.get(tenant_id)
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+
+            # Migawka trafia do LRU - nie budujemy jej dla tenant_id, którego nie ma (np. z niezalogowanego koszyka)
+            if db.execute(select(Tenant.tenant_id).where(Tenant.tenant_id == tenant_id)).first() is None:
+                raise HTTPException(status_code=404, detail="Sklep nie istnieje")
+
+            snapshot = load_snapshot(tenant_id, version) if CATALOG_SNAPSHOT_DIR else None
+            if snapshot is None:
+                snapshot = build_snapshot(db, tenant_id, version)
+                snapshot.stock_version, snapshot.stock_synced_at = stock_version, time.monotonic()
+                self.builds += 1
+                if CATALOG_SNAPSHOT_DIR:
+                    try:
+                        save_snapshot(snapshot)
+                    except OSError:
+                        pass  # bez pliku działa dalej z pamięci procesu
+            else:
+                # Plik ma ceny tej wersji, ale stany z chwili zapisu
+                self._sync_stock(db, snapshot, stock_version)
+            self.snapshots.set(tenant_id, snapshot)
+        return snapshot
+
+    def _sync_stock(self, db: Session, snapshot: TenantSnapshot, stock_version: int) -> None:
+        """Doczytuje samą kolumnę stanów (jedno zapytanie, bez przebudowy cen i bez zapisu pliku)."""
+        synced_at = time.monotonic()
+        p = models.Product
+        stock = array("q", bytes(len(snapshot) * 8))
+        rows = db.execute(
+            select(p.product_id, p.stock_quantity)
+            .where(p.tenant_id == snapshot.tenant_id)
+            .execution_options(yield_per=5000)
+        )
+        for product_id, quantity in rows:
+            i = snapshot.find(product_id)
+            if i >= 0:
+                stock[i] = quantity or 0
+        snapshot.stock = stock
+        snapshot.stock_version, snapshot.stock_synced_at = stock_version, synced_at
+        self.stock_syncs += 1
+
+    def apply_stock(self, deltas: Dict[int, int], committed_at: float) -> None:
+        """Nanosi zatwierdzone zmiany stanów na migawki tego procesu (bez zapytań do bazy)."""
+        with self._build_lock:
+            for snapshot in self.snapshots.values():
+                # Stany doczytane już po commicie zawierają tę zmianę
+                if snapshot.stock_synced_at >= committed_at:
+                    continue
+                for product_id, delta in deltas.items():
+                    i = snapshot.find(product_id)
+                    if i >= 0:
+                        stock = snapshot.writable_stock()
+                        stock[i] += delta
+
+    def stats(self) -> dict:
+        return {**self.snapshots.stats(), "builds": self.builds, "stock_syncs": self.stock_syncs}
+
+
+tenant_snapshots = SnapshotStore(CATALOG_SNAPSHOT_MAX_TENANTS, CATALOG_SNAPSHOT_MAX_BYTES, CATALOG_SNAPSHOT_TTL)
+
+
+def record_stock_change(db: Session, deltas: Dict[int, int]) -> None:
+    """Zapamiętuje zmianę stanów w transakcji - na migawki trafi dopiero po commicie."""
+    pending = db.info.setdefault(_PENDING_STOCK, {})
+    for product_id, delta in deltas.items():
+        pending[product_id] = pending.get(product_id, 0) + delta
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_stock(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    deltas = session.info.pop(_PENDING_STOCK, None)
+    if deltas:
+        tenant_snapshots.apply_stock(deltas, time.monotonic())
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_stock(session: Session) -> None:
+    if not session.in_nested_transaction():
+        session.info.pop(_PENDING_STOCK, None)
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.modules.inventory import models, schemas
 from app.modules.catalog.models import Product 
 
@@ -55,14 +57,17 @@ def update_stock(stock_data: schemas.StockUpdate, db: Session = Depends(get_db))
 
 # 3. Sprawdź dostępność towaru w danej sieci sklepów
 @router.get("/{tenant_id}/availability/{product_id}")
-def check_availability(tenant_id: int, product_id: int, db: Session = Depends(get_db)):
-    # Zwraca listę sklepów, gdzie ten towar jest dostępny (>0 sztuk)
-    results = db.query(models.Inventory, models.Store).join(models.Store)\
-        .filter(models.Inventory.product_id == product_id)\
-        .filter(models.Inventory.tenant_id == tenant_id)\
-        .filter(models.Inventory.quantity > 0).all()
+async def check_availability(tenant_id: int, product_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Zwraca listę sklepów, gdzie ten towar jest dostępny (>0 sztuk) - tylko potrzebne kolumny, sesja async
+    results = await db.execute(
+        select(models.Store.name, models.Store.city, models.Inventory.quantity)
+        .join(models.Store, models.Inventory.store_id == models.Store.store_id)
+        .where(models.Inventory.product_id == product_id)
+        .where(models.Inventory.tenant_id == tenant_id)
+        .where(models.Inventory.quantity > 0)
+    )
         
     return [
-        {"store": store.name, "city": store.city, "quantity": inv.quantity}
-        for inv, store in results
+        {"store": row.name, "city": row.city, "quantity": row.quantity}
+        for row in results
     ]
\ No newline at end of file
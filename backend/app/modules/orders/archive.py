@@ -0,0 +1,121 @@
+import argparse
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import and_, delete, insert, literal, or_, select
+from sqlalchemy.orm import Session
+from app.core.config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+from app.core.database import SessionLocal
+from . import models
+from .changes import bump_tenant_orders
+
+WATERMARK_NAME = "store_orders"
+
+ORDER_COLUMNS = [
+    "order_id", "tenant_id", "user_id", "total_amount", "status", "created_at",
+    "first_name", "last_name", "address", "phone_number",
+]
+ITEM_COLUMNS = ["item_id", "order_id", "product_id", "quantity", "unit_price"]
+
+
+def _archivable(cutoff: datetime):
+    """Odrzucone zamówienia (w każdym wieku) i zatwierdzone starsze niż cutoff."""
+    order = models.StoreOrder
+    return or_(
+        order.status == "REJECTED",
+        and_(order.status == "CONFIRMED", order.created_at < cutoff)
+    )
+
+
+def _get_watermark(db: Session) -> models.ArchiveWatermark:
+    watermark = db.query(models.ArchiveWatermark).filter(models.ArchiveWatermark.name == WATERMARK_NAME).first()
+    if watermark is None:
+        watermark = models.ArchiveWatermark(name=WATERMARK_NAME, last_order_id=0, updated_at=datetime.now())
+        db.add(watermark)
+        db.flush()
+    return watermark
+
+
+def archive_batch(db: Session, order_ids) -> int:
+    """Przenosi wskazane zamówienia z pozycjami do archiwum (INSERT ... SELECT + DELETE)."""
+    orders_t, items_t = models.StoreOrder.__table__, models.OrderItem.__table__
+    archive_orders_t, archive_items_t = models.ArchivedOrder.__table__, models.ArchivedOrderItem.__table__
+    now = datetime.now()
+
+    db.execute(insert(archive_orders_t).from_select(
+        ORDER_COLUMNS + ["archived_at"],
+        select(*[orders_t.c[c] for c in ORDER_COLUMNS], literal(now, archive_orders_t.c.archived_at.type))
+        .where(orders_t.c.order_id.in_(order_ids))
+    ))
+    db.execute(insert(archive_items_t).from_select(
+        ITEM_COLUMNS,
+        select(*[items_t.c[c] for c in ITEM_COLUMNS]).where(items_t.c.order_id.in_(order_ids))
+    ))
+    db.execute(delete(items_t).where(items_t.c.order_id.in_(order_ids)))
+    return db.execute(delete(orders_t).where(orders_t.c.order_id.in_(order_ids))).rowcount
+
+
+def archive_orders(
+    db: Session,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    max_batches: Optional[int] = None
+) -> dict:
+    """
+    Przenosi zimne zamówienia do archiwum paczkami po batch_size, rosnąco po order_id.
+    Każda paczka to osobna transakcja razem z przesunięciem znacznika postępu,
+    więc proces można przerwać i wznowić w dowolnym momencie.
+    Po dojściu do końca tabeli znacznik wraca na 0 (następne przejście zaczyna od początku).
+    """
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    archivable = _archivable(cutoff)
+    batch_size = max(1, min(batch_size, 1000))  # Oracle: max 1000 elementów w IN
+
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        watermark = _get_watermark(db)
+
+        # 1. Kandydaci za znacznikiem
+        candidate_ids = [row.order_id for row in db.query(models.StoreOrder.order_id)
+                         .filter(models.StoreOrder.order_id > watermark.last_order_id, archivable)
+                         .order_by(models.StoreOrder.order_id).limit(batch_size).all()]
+        if not candidate_ids:
+            watermark.last_order_id = 0
+            watermark.updated_at = datetime.now()
+            db.commit()
+            break
+
+        # 2. Blokujemy je i sprawdzamy warunek jeszcze raz (status mógł się w międzyczasie zmienić)
+        rows = db.query(models.StoreOrder.order_id, models.StoreOrder.tenant_id)\
+            .filter(models.StoreOrder.order_id.in_(candidate_ids), archivable)\
+            .with_for_update().all()
+        order_ids = [row.order_id for row in rows]
+
+        # 3. Przeniesienie + znacznik (+ wersje list zamówień sklepów) w jednej transakcji
+        if order_ids:
+            archived += archive_batch(db, order_ids)
+            bump_tenant_orders(db, [row.tenant_id for row in rows])
+        watermark.last_order_id = candidate_ids[-1]
+        watermark.updated_at = datetime.now()
+        db.commit()
+        batches += 1
+
+    return {"archived": archived, "batches": batches}
+
+
+if __name__ == "__main__":
+    # Uruchomienie: python -m app.modules.orders.archive --older-than-days 90
+    import app.modules.tenancy.models  # noqa: F401 - rejestracja tabeli users dla kluczy obcych
+
+    parser = argparse.ArgumentParser(description="Archiwizacja zamówień (store_orders -> store_orders_archive)")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        result = archive_orders(session, args.batch_size, args.older_than_days, args.max_batches)
+        print(f"Zarchiwizowano {result['archived']} zamówień w {result['batches']} paczkach.")
+    finally:
+        session.close()
@@ -0,0 +1,40 @@
+from typing import Iterable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.versions import bump_version
+
+# Klucz w Session.info: sklepy, których lista zamówień zmieni się przy commicie
+_PENDING_TENANTS = "pending_orders_bumps"
+
+
+def tenant_orders_version(tenant_id: int) -> str:
+    return f"orders:tenant:{tenant_id}"
+
+
+def bump_tenant_orders(db: Session, tenant_ids: Iterable[int]) -> None:
+    """
+    Zaznacza do podbicia wersję listy zamówień sklepu (ETag /orders/manage).
+    Wywoływane przy każdym zapisie, który zmienia tę listę: nowe zamówienie, status, usunięcie, archiwizacja.
+    Sam UPDATE wersji (version = version + 1) idzie tuż przed commitem, w tej samej transakcji -
+    wiersz wersji sklepu jest zablokowany tylko na chwilę commitu, a nie przez całe zamówienie.
+    """
+    db.info.setdefault(_PENDING_TENANTS, set()).update(tenant_ids)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_pending_orders(session: Session) -> None:
+    # Commit savepointu to jeszcze nie koniec transakcji
+    if session.in_nested_transaction():
+        return
+    tenant_ids = session.info.pop(_PENDING_TENANTS, None)
+    if not tenant_ids:
+        return
+    # Stała kolejność wierszy - dwie paczki z tymi samymi sklepami nie zakleszczą się
+    for tenant_id in sorted(tenant_ids):
+        bump_version(session, tenant_orders_version(tenant_id))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_orders(session: Session) -> None:
+    if not session.in_nested_transaction():
+        session.info.pop(_PENDING_TENANTS, None)
@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+from sqlalchemy import select
+from app.core.config import ORDERS_EXPORT_CHUNK_ROWS
+from app.core.database import SessionLocal
+from . import models
+
+# Kolumny eksportu CSV (jedna linia = jedna pozycja zamówienia)
+ORDER_COLUMNS = [
+    "order_id", "created_at", "status", "total_amount", "user_id",
+    "first_name", "last_name", "address", "phone_number",
+]
+ITEM_COLUMNS = ["item_id", "product_id", "quantity", "unit_price"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _export_statement(tenant_id: int, status_filter: Optional[str],
+                      date_from: Optional[datetime], date_to: Optional[datetime]):
+    """Zamówienia złączone z pozycjami, posortowane tak, żeby pozycje zamówienia szły po kolei."""
+    order, item = models.StoreOrder, models.OrderItem
+    stmt = select(
+        *[getattr(order, c) for c in ORDER_COLUMNS],
+        *[getattr(item, c) for c in ITEM_COLUMNS],
+    ).outerjoin(item, item.order_id == order.order_id)\
+        .where(order.tenant_id == tenant_id)
+
+    if status_filter:
+        stmt = stmt.where(order.status == status_filter)
+    if date_from:
+        stmt = stmt.where(order.created_at >= date_from)
+    if date_to:
+        stmt = stmt.where(order.created_at < date_to)
+
+    # Kursor po stronie serwera: wiersze przychodzą paczkami, nic nie trzymamy w całości w pamięci
+    return stmt.order_by(order.order_id, item.item_id).execution_options(
+        stream_results=True, yield_per=ORDERS_EXPORT_CHUNK_ROWS
+    )
+
+
+def _csv_chunks(result) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # Nagłówek wysyłamy od razu - klient dostaje pierwsze bajty zanim baza odda dane
+    writer.writerow(ORDER_COLUMNS + ITEM_COLUMNS)
+    yield buffer.getvalue()
+
+    for partition in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        for row in partition:
+            writer.writerow([v.isoformat() if isinstance(v, datetime) else v for v in row])
+        yield buffer.getvalue()
+
+
+def _ndjson_chunks(result) -> Iterator[str]:
+    # Jedna linia = jedno zamówienie z zagnieżdżonymi pozycjami.
+    # Wiersze są posortowane po order_id, więc wystarczy pamiętać bieżące zamówienie.
+    current = None
+    for partition in result.partitions():
+        lines = []
+        for row in partition:
+            data = row._mapping
+            if current is None or current["order_id"] != data["order_id"]:
+                if current is not None:
+                    lines.append(json.dumps(current, default=str))
+                current = {c: data[c] for c in ORDER_COLUMNS}
+                if current["created_at"] is not None:
+                    current["created_at"] = current["created_at"].isoformat()
+                current["items"] = []
+            if data["item_id"] is not None:
+                current["items"].append({c: data[c] for c in ITEM_COLUMNS})
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    if current is not None:
+        yield json.dumps(current, default=str) + "\n"
+
+
+def stream_orders(tenant_id: int, export_format: str, status_filter: Optional[str] = None,
+                  date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> Iterator[str]:
+    """
+    Generator dla StreamingResponse.
+    Otwiera własną sesję, bo żyje dłużej niż samo wywołanie endpointu.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(_export_statement(tenant_id, status_filter, date_from, date_to))
+        chunks = _csv_chunks(result) if export_format == "csv" else _ndjson_chunks(result)
+        for chunk in chunks:
+            yield chunk
+    finally:
+        db.close()
@@ -0,0 +1,223 @@
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, List, Optional
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.config import (
+    GUEST_BATCH_MAX_SIZE, GUEST_BATCH_MAX_DELAY_MS, GUEST_QUEUE_MAX_SIZE,
+    GUEST_QUEUE_PUT_TIMEOUT, GUEST_ORDER_RESULT_TIMEOUT
+)
+from app.core.database import SessionLocal
+from app.core.idempotency import PendingResult
+from app.core.security import UNUSABLE_PASSWORD
+from app.modules.tenancy.models import User
+from . import models
+from .pricing import PricedLine, build_order_items
+from .rollups import RollupDeltas
+from .changes import bump_tenant_orders
+
+
+@dataclass
+class GuestOrderIntent:
+    """Zwalidowane i wycenione zamówienie gościa, czekające na zapis w paczce."""
+    tenant_id: int
+    email: str
+    first_name: str
+    last_name: str
+    address: str
+    phone_number: str
+    total_amount: float
+    lines: List[PricedLine]
+    created_at: datetime = field(default_factory=datetime.now)
+    future: Future = field(default_factory=Future)
+    order_id: Optional[int] = None
+
+
+class GuestOrderBatcher:
+    """
+    Group commit dla zamówień gości.
+    Żądania HTTP wrzucają gotowe zamówienia do ograniczonej kolejki, a jeden wątek w tle
+    zapisuje je paczkami (wielowierszowe INSERT-y, jeden commit na paczkę).
+    Każde żądanie czeka na swój Future, który dostaje przydzielone order_id.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_queue_size: int = GUEST_QUEUE_MAX_SIZE,
+                 max_batch_size: int = GUEST_BATCH_MAX_SIZE, max_delay_ms: float = GUEST_BATCH_MAX_DELAY_MS):
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000.0
+        self._queue: "queue.Queue[Optional[GuestOrderIntent]]" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="guest-order-batcher", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Dopisuje to, co jest w kolejce, i zatrzymuje wątek (wywoływane przy zamykaniu API)."""
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._stopping.set()
+        try:
+            # Znacznik końca budzi wątek od razu; przy pełnej kolejce wątek skończy po jej opróżnieniu
+            self._queue.put(None, timeout=GUEST_QUEUE_PUT_TIMEOUT)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+
+    def submit(self, intent: GuestOrderIntent, build_response: Callable[[int], Any]) -> Any:
+        """
+        Kolejkuje zamówienie i czeka na zapis jego paczki; zwraca build_response(order_id).
+        Po GUEST_ORDER_RESULT_TIMEOUT rzuca PendingResult (503) - paczka może się jeszcze zapisać,
+        więc klucz idempotencji czeka na jej wynik, zamiast pozwolić na drugie zamówienie.
+        """
+        self.start()
+        try:
+            # Backpressure: przy pełnej kolejce od razu odpowiadamy 503 zamiast kumulować żądania
+            self._queue.put(intent, timeout=GUEST_QUEUE_PUT_TIMEOUT)
+        except queue.Full:
+            raise HTTPException(
+                status_code=503,
+                detail="Zbyt wiele zamówień naraz. Spróbuj ponownie za chwilę.",
+                headers={"Retry-After": "1"}
+            )
+        try:
+            order_id = intent.future.result(timeout=GUEST_ORDER_RESULT_TIMEOUT)
+        except FutureTimeout:
+            raise PendingResult(
+                intent.future, build_response,
+                "Zamówienie jest jeszcze zapisywane. Ponów żądanie z tym samym Idempotency-Key."
+            )
+        return build_response(order_id)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            if first is None:
+                return
+            batch = [first]
+            stopping = False
+
+            # Zbieramy paczkę do max_batch_size albo do upływu max_delay od pierwszego zamówienia
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    intent = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if intent is None:
+                    stopping = True
+                    break
+                batch.append(intent)
+
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch: List[GuestOrderIntent]) -> None:
+        db = self.session_factory()
+        try:
+            self._write_batch(db, batch)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if len(batch) > 1:
+                # Jedno złe zamówienie nie może zablokować reszty - zapisujemy je pojedynczo
+                for intent in batch:
+                    self._flush([intent])
+                return
+            print(f"[Intake BŁĄD] Nie udało się zapisać zamówienia gościa: {e}", file=sys.stderr)
+            batch[0].future.set_exception(_http_error(e))
+            return
+        finally:
+            db.close()
+
+        for intent in batch:
+            intent.future.set_result(intent.order_id)
+
+    def _write_batch(self, db: Session, batch: List[GuestOrderIntent]) -> None:
+        # 1. Konta klientów: jedno zapytanie o wszystkie emaile z paczki
+        emails = {intent.email for intent in batch}
+        users = {u.email: u for u in db.query(User).filter(User.email.in_(emails)).all()}
+        new_users = []
+        for intent in batch:
+            if intent.email not in users:
+                user = User(
+                    email=intent.email,
+                    hashed_password=UNUSABLE_PASSWORD,
+                    role="CUSTOMER",
+                    tenant_id=intent.tenant_id,
+                    is_active=True
+                )
+                users[intent.email] = user
+                new_users.append(user)
+        if new_users:
+            db.add_all(new_users)
+            db.flush()
+
+        # 2. Nagłówki zamówień - jeden flush (wielowierszowy INSERT)
+        orders = [
+            models.StoreOrder(
+                tenant_id=intent.tenant_id,
+                user_id=users[intent.email].user_id,
+                total_amount=intent.total_amount,
+                status="NEW",
+                created_at=intent.created_at,
+                first_name=intent.first_name,
+                last_name=intent.last_name,
+                address=intent.address,
+                phone_number=intent.phone_number
+            )
+            for intent in batch
+        ]
+        db.add_all(orders)
+        db.flush()
+
+        # 3. Pozycje wszystkich zamówień z paczki
+        deltas = RollupDeltas()
+        for intent, order in zip(batch, orders):
+            intent.order_id = order.order_id
+            db.add_all(build_order_items(order.order_id, intent.lines))
+            deltas.order_placed(intent.tenant_id, intent.created_at, intent.lines)
+        db.flush()
+
+        # 4. Sumy sprzedaży - jedno apply() na całą paczkę, wersje list zamówień sklepów
+        deltas.apply(db)
+        bump_tenant_orders(db, [intent.tenant_id for intent in batch])
+
+
+def _http_error(error: Exception) -> Exception:
+    """Błąd bazy z zapisu paczki jako odpowiedź HTTP (zamiast 500 z treścią wyjątku)."""
+    if isinstance(error, IntegrityError):
+        return HTTPException(status_code=409, detail="Nie udało się zapisać zamówienia (konflikt danych)")
+    if isinstance(error, SQLAlchemyError):
+        return HTTPException(
+            status_code=503,
+            detail="Nie udało się zapisać zamówienia. Spróbuj ponownie za chwilę.",
+            headers={"Retry-After": "1"}
+        )
+    return error
+
+
+guest_order_batcher = GuestOrderBatcher()
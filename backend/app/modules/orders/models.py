@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime
@@ -25,13 +25,99 @@ class StoreOrder(Base):
     # Relacja z pozycjami zamówienia
     items = relationship("OrderItem", back_populates="order")
 
+    # Indeksy pod stronicowanie keyset (właściciel i klient)
+    __table_args__ = (
+        Index("ix_store_orders_tenant_order", "tenant_id", "order_id"),
+        Index("ix_store_orders_user_order", "user_id", "order_id"),
+    )
+
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     item_id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("store_orders.order_id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("store_orders.order_id"), nullable=False, index=True)
     product_id = Column(Integer, nullable=False)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float, nullable=False) # Cena w momencie zakupu
 
-    order = relationship("StoreOrder", back_populates="items")
\ No newline at end of file
+    order = relationship("StoreOrder", back_populates="items")
+
+
+# --- ARCHIWUM (ZIMNE DANE) ---
+# Odrzucone i stare zrealizowane zamówienia przenoszone z gorących tabel (archive.py).
+# Identyfikatory zostają te same co w store_orders / order_items.
+
+class ArchivedOrder(Base):
+    __tablename__ = "store_orders_archive"
+
+    order_id = Column(Integer, primary_key=True, autoincrement=False)
+    tenant_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    total_amount = Column(Float, nullable=False)
+    status = Column(String(50))
+    created_at = Column(DateTime)
+
+    first_name = Column(String(100), nullable=True)
+    last_name = Column(String(100), nullable=True)
+    address = Column(String(255), nullable=True)
+    phone_number = Column(String(20), nullable=True)
+
+    # Kiedy zamówienie trafiło do archiwum
+    archived_at = Column(DateTime, nullable=False)
+
+    items = relationship("ArchivedOrderItem", back_populates="order")
+
+    __table_args__ = (
+        Index("ix_store_orders_archive_tenant_order", "tenant_id", "order_id"),
+    )
+
+class ArchivedOrderItem(Base):
+    __tablename__ = "order_items_archive"
+
+    item_id = Column(Integer, primary_key=True, autoincrement=False)
+    order_id = Column(Integer, ForeignKey("store_orders_archive.order_id"), nullable=False, index=True)
+    product_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=False)
+
+    order = relationship("ArchivedOrder", back_populates="items")
+
+class ArchiveWatermark(Base):
+    """
+    Postęp archiwizacji: order_id, do którego doszło bieżące przejście.
+    Zapisywany w tej samej transakcji co paczka, więc przerwany proces wznawia się od tego miejsca.
+    """
+    __tablename__ = "archive_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    last_order_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.now)
+
+
+# --- SUMY SPRZEDAŻY (ROLLUPY) ---
+class SalesDailyRollup(Base):
+    """
+    Sumy per sklep / dzień złożenia zamówienia / produkt, aktualizowane przyrostowo
+    w tej samej transakcji co zamówienia (rollups.py).
+    product_id = 0 to wiersz zbiorczy dnia (każde zamówienie liczone raz).
+    Każda suma jest rozłożona na ROLLUP_SHARDS wierszy (shard) - wynik to suma po shardach.
+    """
+    __tablename__ = "sales_daily_rollups"
+
+    tenant_id = Column(Integer, primary_key=True, autoincrement=False)
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True, autoincrement=False)
+    shard = Column(Integer, primary_key=True, autoincrement=False, default=0)
+
+    # Wszystkie złożone zamówienia
+    placed_orders = Column(Integer, nullable=False, default=0)
+    placed_units = Column(Integer, nullable=False, default=0)
+    placed_revenue = Column(Float, nullable=False, default=0)
+    # Zatwierdzone (CONFIRMED)
+    confirmed_orders = Column(Integer, nullable=False, default=0)
+    confirmed_units = Column(Integer, nullable=False, default=0)
+    confirmed_revenue = Column(Float, nullable=False, default=0)
+    # Odrzucone (REJECTED)
+    rejected_orders = Column(Integer, nullable=False, default=0)
+    rejected_units = Column(Integer, nullable=False, default=0)
+    rejected_revenue = Column(Float, nullable=False, default=0)
\ No newline at end of file
@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from app.modules.catalog.models import Product
+from app.modules.catalog.snapshot import tenant_snapshots
+from app.modules.orders.models import OrderItem
+
+# Powody odrzucenia pozycji koszyka
+PRODUCT_NOT_FOUND = "not_found"
+PRODUCT_OTHER_TENANT = "other_tenant"
+
+
+@dataclass
+class PricedLine:
+    """Pozycja koszyka po wycenie (jedna na produkt, po scaleniu duplikatów)."""
+    product_id: int
+    quantity: int
+    unit_price: float
+
+
+def merge_cart_lines(items) -> Dict[int, int]:
+    """Scala powtarzające się product_id w koszyku (kolejność pierwszego wystąpienia)."""
+    quantities: Dict[int, int] = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
+def price_cart(db: Session, items, tenant_id: int) -> Tuple[float, List[PricedLine]]:
+    """
+    Etap wyceny koszyka wspólny dla create_order i create_guest_order.
+    Wszystkie produkty z koszyka pobieramy JEDNYM zapytaniem IN (...),
+    a z tego samego wyniku liczymy sumę i budujemy pozycje zamówienia.
+    Cena zamówienia zawsze z bazy - migawka (snapshot.py) może być spóźniona o chwilę.
+    """
+    quantities = merge_cart_lines(items)
+    if not quantities:
+        return 0.0, []
+
+    # 1. Jedno zapytanie zamiast dwóch na każdą pozycję koszyka
+    found, problems = query_products(db, tenant_id, quantities.keys())
+
+    # 2. Walidacja w pamięci (te same komunikaty co wcześniej)
+    total_amount = 0.0
+    lines = []
+    for product_id, quantity in quantities.items():
+        problem = problems.get(product_id)
+        if problem == PRODUCT_NOT_FOUND:
+            raise HTTPException(status_code=404, detail=f"Produkt {product_id} nie istnieje")
+
+        # Izolacja: produkt musi należeć do sklepu, w którym składane jest zamówienie
+        if problem == PRODUCT_OTHER_TENANT:
+            raise HTTPException(status_code=400, detail="Produkt nie należy do tego sklepu")
+
+        price = found[product_id][0]
+        total_amount += price * quantity
+        lines.append(PricedLine(product_id=product_id, quantity=quantity, unit_price=price))
+
+    return total_amount, lines
+
+
+def lookup_products(db: Session, tenant_id: int, product_ids) -> Tuple[Dict[int, Tuple[float, int]], Dict[int, str]]:
+    """
+    Zwraca (product_id -> (cena, stan), product_id -> powód odrzucenia) - tylko do odczytu (walidacja koszyka).
+    Migawka może być spóźniona o chwilę (pamięć wersji innych procesów) - produkt, którego
+    w niej brak, a który należy do sklepu (np. dopiero dodany), bierzemy z bazy.
+    """
+    snapshot = tenant_snapshots.get(db, tenant_id)
+    found: Dict[int, Tuple[float, int]] = {}
+    missing = []
+    for product_id in product_ids:
+        i = snapshot.find(product_id)
+        if i < 0:
+            missing.append(product_id)
+        else:
+            found[product_id] = (snapshot.prices[i], snapshot.stock[i])
+
+    problems: Dict[int, str] = {}
+    if missing:
+        from_db, problems = query_products(db, tenant_id, missing)
+        found.update(from_db)
+    return found, problems
+
+
+def query_products(db: Session, tenant_id: int, product_ids) -> Tuple[Dict[int, Tuple[float, int]], Dict[int, str]]:
+    """To samo co lookup_products, ale jednym zapytaniem IN (...) do bazy (bez migawki)."""
+    product_ids = list(product_ids)
+    rows = db.query(Product.product_id, Product.tenant_id, Product.price, Product.stock_quantity)\
+        .filter(Product.product_id.in_(product_ids)).all()
+    rows = {row.product_id: row for row in rows}
+    found: Dict[int, Tuple[float, int]] = {}
+    problems: Dict[int, str] = {}
+    for product_id in product_ids:
+        row = rows.get(product_id)
+        if row is None:
+            problems[product_id] = PRODUCT_NOT_FOUND
+        elif row.tenant_id != tenant_id:
+            problems[product_id] = PRODUCT_OTHER_TENANT
+        else:
+            found[product_id] = (row.price, row.stock_quantity or 0)
+    return found, problems
+
+
+def validate_cart(db: Session, items, tenant_id: int) -> dict:
+    """
+    Sprawdzenie koszyka przed zamówieniem: ceny i dostępność z migawki sklepu, bez obiektów ORM.
+    Stan jest orientacyjny - o zdjęciu towaru decyduje dopiero warunkowy UPDATE przy zatwierdzeniu.
+    """
+    quantities = merge_cart_lines(items)
+    found, problems = lookup_products(db, tenant_id, quantities.keys())
+
+    total_amount = 0.0
+    lines = []
+    for product_id, quantity in quantities.items():
+        if product_id in problems:
+            lines.append({"product_id": product_id, "quantity": quantity, "status": problems[product_id]})
+            continue
+        price, available = found[product_id]
+        total_amount += price * quantity
+        lines.append({
+            "product_id": product_id, "quantity": quantity, "unit_price": price, "available": available,
+            "status": "ok" if available >= quantity else "insufficient_stock"
+        })
+
+    return {
+        "valid": all(line["status"] == "ok" for line in lines),
+        "total_amount": total_amount,
+        "lines": lines
+    }
+
+
+def build_order_items(order_id: int, lines: List[PricedLine]):
+    """Tworzy obiekty OrderItem z wycenionych pozycji (bez ponownego odpytywania bazy)."""
+    return [
+        OrderItem(
+            order_id=order_id,
+            product_id=line.product_id,
+            quantity=line.quantity,
+            unit_price=line.unit_price
+        )
+        for line in lines
+    ]
@@ -0,0 +1,272 @@
+import random
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import update, bindparam
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, selectinload
+from app.core.config import ORDER_TX_MAX_ATTEMPTS, ORDER_TX_RETRY_BACKOFF
+from app.modules.catalog.models import Product
+from app.modules.catalog.cache import bump_tenant_catalog
+from app.modules.catalog.effective import mirror_stock
+from . import models
+from .rollups import RollupDeltas
+from .changes import bump_tenant_orders
+
+products_table = Product.__table__
+orders_table = models.StoreOrder.__table__
+
+# Warunkowe zdjęcie ze stanu: UPDATE trafi tylko wtedy, gdy towaru wystarczy.
+# Liczba zmienionych wierszy mówi nam, które pozycje się nie zmieściły.
+_reserve_stmt = (
+    update(products_table)
+    .where(products_table.c.product_id == bindparam("p_id"))
+    .where(products_table.c.stock_quantity >= bindparam("qty"))
+    .values(stock_quantity=products_table.c.stock_quantity - bindparam("qty"))
+)
+
+# Zwrot na stan (np. odrzucenie zatwierdzonego zamówienia) - bez warunku
+_release_stmt = (
+    update(products_table)
+    .where(products_table.c.product_id == bindparam("p_id"))
+    .values(stock_quantity=products_table.c.stock_quantity + bindparam("qty"))
+)
+
+# Kody błędów, po których warto powtórzyć całą transakcję
+RETRYABLE_ERRORS = (
+    "ORA-08177",  # can't serialize access for this transaction
+    "ORA-00060",  # deadlock detected while waiting for resource
+    "ORA-00054",  # resource busy
+    "database is locked",  # SQLite (lokalne testy)
+)
+
+
+class InsufficientStock(Exception):
+    """Co najmniej jedna pozycja nie zmieściła się w stanie magazynowym."""
+
+    def __init__(self, shortages: List[dict]):
+        self.shortages = shortages
+        super().__init__(shortages)
+
+    def detail(self) -> str:
+        s = self.shortages[0]
+        return f"Za mało towaru: {s['name']}. Dostępne: {s['available']}, Wymagane: {s['required']}"
+
+
+class ConcurrentUpdate(Exception):
+    """Wiersz zmienił się w trakcie naszej transakcji - należy ją powtórzyć."""
+
+
+def aggregate_quantities(items) -> Dict[int, int]:
+    """Sumuje ilości per produkt (np. pozycje wielu zamówień naraz)."""
+    quantities: Dict[int, int] = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
+def _execute_many(db: Session, stmt, params: List[dict]) -> int:
+    """executemany z sumaryczną liczbą zmienionych wierszy (lub pętla, gdy sterownik jej nie podaje)."""
+    if not params:
+        return 0
+    if db.get_bind().dialect.supports_sane_multi_rowcount:
+        return db.execute(stmt, params).rowcount
+    return sum(db.execute(stmt, p).rowcount for p in params)
+
+
+def reserve_stock(db: Session, quantities: Dict[int, int]) -> None:
+    """
+    Zdejmuje towar ze stanu jednym executemany z warunkiem stock_quantity >= :qty.
+    Produkty blokujemy w stałej kolejności (rosnące ID), więc równoległe
+    zatwierdzenia nie zakleszczają się na tych samych wierszach.
+    Przy braku towaru transakcja jest wycofywana i rzucamy InsufficientStock.
+    """
+    params = [{"p_id": pid, "qty": qty} for pid, qty in sorted(quantities.items())]
+    affected = _execute_many(db, _reserve_stmt, params)
+    if affected == len(params):
+        mirror_stock(db, {pid: -qty for pid, qty in quantities.items()})
+        return
+
+    # Któraś pozycja się nie zmieściła - cofamy wszystko i ustalamy które (jedno zapytanie)
+    db.rollback()
+    rows = db.query(Product.product_id, Product.name, Product.stock_quantity)\
+        .filter(Product.product_id.in_(list(quantities.keys()))).all()
+    shortages = find_shortages(
+        quantities,
+        {row.product_id: row.stock_quantity or 0 for row in rows},
+        {row.product_id: row.name for row in rows}
+    )
+    if not shortages:
+        # Stan zmienił się między UPDATE a diagnozą - spróbujmy jeszcze raz
+        raise ConcurrentUpdate()
+    raise InsufficientStock(shortages)
+
+
+def find_shortages(quantities: Dict[int, int], available: Dict[int, int], names: Dict[int, str]) -> List[dict]:
+    """Porównuje zapotrzebowanie ze stanem (produkt, którego już nie ma, traktujemy jak stan 0)."""
+    shortages = []
+    for pid, qty in sorted(quantities.items()):
+        if available.get(pid, 0) < qty:
+            shortages.append({
+                "product_id": pid, "name": names.get(pid, f"Produkt {pid}"),
+                "available": available.get(pid, 0), "required": qty
+            })
+    return shortages
+
+
+def release_stock(db: Session, quantities: Dict[int, int]) -> None:
+    """Zwraca towar na stan (jeden executemany)."""
+    params = [{"p_id": pid, "qty": qty} for pid, qty in sorted(quantities.items())]
+    _execute_many(db, _release_stmt, params)
+    mirror_stock(db, quantities)
+
+
+def transition_status(db: Session, order_id: int, from_status: Optional[str], to_status: str) -> None:
+    """
+    Zmiana statusu tylko, jeśli zamówienie nadal ma status, który widzieliśmy.
+    Chroni przed podwójnym zatwierdzeniem (i podwójnym zdjęciem towaru) przez dwa równoległe żądania.
+    """
+    transition_many(db, {from_status: [order_id]}, to_status)
+
+
+def transition_many(db: Session, ids_by_status: Dict[Optional[str], List[int]], to_status: str) -> None:
+    """Warunkowa zmiana statusu wielu zamówień - jeden UPDATE ... IN (...) na każdy status wyjściowy."""
+    for from_status, order_ids in ids_by_status.items():
+        if not order_ids:
+            continue
+        if from_status is not None:
+            condition = orders_table.c.status == from_status
+        else:
+            condition = orders_table.c.status.is_(None)
+        result = db.execute(
+            update(orders_table)
+            .where(orders_table.c.order_id.in_(order_ids))
+            .where(condition)
+            .values(status=to_status)
+        )
+        if result.rowcount != len(order_ids):
+            raise ConcurrentUpdate()
+
+
+def apply_bulk_status(db: Session, tenant_id: int, order_ids: List[int], target_status: str) -> List[dict]:
+    """
+    Masowe CONFIRMED / REJECTED z tymi samymi regułami co process_order, w jednej transakcji.
+    Stany zmieniamy zbiorczo: zapotrzebowanie sumujemy per produkt i wykonujemy jeden executemany,
+    a zamówienia, dla których zabrakło towaru, zwracamy jako nieudane (reszta przechodzi).
+    """
+    # 1. Zamówienia razem z pozycjami (2 zapytania niezależnie od liczby zamówień)
+    orders = db.query(models.StoreOrder).options(selectinload(models.StoreOrder.items))\
+        .filter(models.StoreOrder.order_id.in_(order_ids)).all()
+    by_id = {order.order_id: order for order in orders}
+
+    results: Dict[int, dict] = {}
+    eligible = []
+    for order_id in order_ids:
+        order = by_id.get(order_id)
+        if order is None:
+            results[order_id] = _bulk_result(order_id, False, None, "Zamówienie nie istnieje")
+        elif order.tenant_id != tenant_id:
+            results[order_id] = _bulk_result(order_id, False, None, "Brak uprawnień do tego zamówienia")
+        elif order.status == target_status:
+            # Tak jak w process_order - ten sam status to brak zmian
+            results[order_id] = _bulk_result(order_id, True, order.status, None)
+        else:
+            eligible.append(order)
+
+    # Najstarsze zamówienia mają pierwszeństwo do towaru
+    eligible.sort(key=lambda o: o.order_id)
+    accepted = []
+
+    # 2. ZATWIERDZANIE: jeden SELECT ... FOR UPDATE stanów, przydział w pamięci, jeden executemany
+    if target_status == "CONFIRMED":
+        demand = aggregate_quantities(item for order in eligible for item in order.items)
+        available: Dict[int, int] = {}
+        names: Dict[int, str] = {}
+        if demand:
+            rows = db.query(Product.product_id, Product.name, Product.stock_quantity)\
+                .filter(Product.product_id.in_(list(demand.keys())))\
+                .order_by(Product.product_id).with_for_update().all()
+            available = {row.product_id: row.stock_quantity or 0 for row in rows}
+            names = {row.product_id: row.name for row in rows}
+
+        to_reserve: Dict[int, int] = {}
+        for order in eligible:
+            needed = aggregate_quantities(order.items)
+            shortages = find_shortages(needed, available, names)
+            if shortages:
+                s = shortages[0]
+                results[order.order_id] = _bulk_result(
+                    order.order_id, False, order.status,
+                    f"Za mało towaru: {s['name']}. Dostępne: {s['available']}, Wymagane: {s['required']}"
+                )
+                continue
+            for pid, qty in needed.items():
+                available[pid] -= qty
+                to_reserve[pid] = to_reserve.get(pid, 0) + qty
+            accepted.append(order)
+
+        try:
+            reserve_stock(db, to_reserve)
+        except InsufficientStock:
+            # Wiersze są zablokowane, więc to nie powinno się zdarzyć - traktujemy jak konflikt
+            raise ConcurrentUpdate()
+        if to_reserve:
+            bump_tenant_catalog(db, tenant_id, prices=False)
+
+    # 3. ODRZUCANIE: zwrot na stan tylko dla zamówień, które były zatwierdzone
+    elif target_status == "REJECTED":
+        accepted = eligible
+        to_release = aggregate_quantities(
+            item for order in accepted if order.status == "CONFIRMED" for item in order.items
+        )
+        release_stock(db, to_release)
+        if to_release:
+            bump_tenant_catalog(db, tenant_id, prices=False)
+
+    # 4. Zmiana statusów - jeden UPDATE na każdy status wyjściowy (+ sumy sprzedaży jednym apply)
+    ids_by_status: Dict[Optional[str], List[int]] = {}
+    deltas = RollupDeltas()
+    for order in accepted:
+        ids_by_status.setdefault(order.status, []).append(order.order_id)
+        deltas.status_changed(order.tenant_id, order.created_at, order.items, order.status, target_status)
+    transition_many(db, ids_by_status, target_status)
+    deltas.apply(db)
+    if accepted:
+        bump_tenant_orders(db, [tenant_id])
+
+    for order in accepted:
+        results[order.order_id] = _bulk_result(order.order_id, True, target_status, None)
+
+    return [results[order_id] for order_id in order_ids]
+
+
+def _bulk_result(order_id: int, success: bool, status: Optional[str], detail: Optional[str]) -> dict:
+    return {"order_id": order_id, "success": success, "status": status, "detail": detail}
+
+
+def is_retryable(error: DBAPIError) -> bool:
+    message = str(error.orig) if error.orig is not None else str(error)
+    return any(code in message for code in RETRYABLE_ERRORS)
+
+
+def run_with_retry(db: Session, operation, max_attempts: int = ORDER_TX_MAX_ATTEMPTS):
+    """
+    Wykonuje operation() jako jedną transakcję, ponawiając ją (ograniczoną liczbę razy)
+    po konflikcie serializacji, deadlocku lub równoległej zmianie statusu.
+    Każdy inny błąd wycofuje transakcję i leci dalej.
+    """
+    attempt = 1
+    while True:
+        try:
+            return operation()
+        except (ConcurrentUpdate, DBAPIError) as e:
+            db.rollback()
+            if isinstance(e, DBAPIError) and not is_retryable(e):
+                raise
+            if attempt >= max_attempts:
+                raise
+            # Backoff wykładniczy z losowym rozrzutem, żeby ponowienia się nie zderzały
+            time.sleep(ORDER_TX_RETRY_BACKOFF * (2 ** (attempt - 1)) * (1 + random.random()))
+            attempt += 1
+        except Exception:
+            db.rollback()
+            raise
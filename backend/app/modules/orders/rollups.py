@@ -0,0 +1,224 @@
+import argparse
+import random
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import and_, bindparam, delete, false, insert, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import ROLLUP_SHARDS
+from app.core.database import SessionLocal
+from . import models
+
+# Ile rund UPDATE/INSERT przy równoległym wstawianiu tego samego wiersza
+ROLLUP_UPSERT_ATTEMPTS = 3
+
+# Wiersz "wszystkie produkty" - dokładne liczby zamówień per dzień (zamówienie liczone raz)
+ALL_PRODUCTS = 0
+
+# Zamówienie zawsze jest w "placed", a dodatkowo w kubełku swojego statusu
+STATUS_BUCKETS = {"CONFIRMED": "confirmed", "REJECTED": "rejected"}
+BUCKETS = ("placed", "confirmed", "rejected")
+MEASURES = [f"{bucket}_{m}" for bucket in BUCKETS for m in ("orders", "units", "revenue")]
+
+RollupKey = Tuple[int, date, int, int]
+
+
+class RollupDeltas:
+    """
+    Zmiany do naniesienia na sales_daily_rollups, zbierane w pamięci
+    i zapisywane jednym apply() w transakcji, która zmienia zamówienia.
+    Pozycje (lines) to cokolwiek z product_id, quantity i unit_price (OrderItem, PricedLine).
+
+    Transakcja pisze do jednego, losowego sharda. Bez tego wiersz zbiorczy dnia (ALL_PRODUCTS)
+    byłby blokowany przez każde zamówienie sklepu do końca jego transakcji. Sumy są addytywne,
+    więc cofnięcie (np. zmiana statusu) może trafić w inny shard niż zapis zamówienia.
+    """
+
+    def __init__(self, shard: Optional[int] = None):
+        self.rows: Dict[RollupKey, Dict[str, float]] = {}
+        self.shard = random.randrange(max(ROLLUP_SHARDS, 1)) if shard is None else shard
+
+    def _row(self, key: RollupKey) -> Dict[str, float]:
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = {m: 0 for m in MEASURES}
+        return row
+
+    def add(self, tenant_id: int, created_at: Optional[datetime], lines: Iterable, bucket: str, sign: int = 1) -> None:
+        if created_at is None:
+            return
+        day = created_at.date()
+        total = self._row((tenant_id, day, ALL_PRODUCTS, self.shard))
+        total[f"{bucket}_orders"] += sign
+
+        seen = set()
+        for line in lines:
+            revenue = line.quantity * line.unit_price
+            row = self._row((tenant_id, day, line.product_id, self.shard))
+            if line.product_id not in seen:
+                row[f"{bucket}_orders"] += sign
+                seen.add(line.product_id)
+            row[f"{bucket}_units"] += sign * line.quantity
+            row[f"{bucket}_revenue"] += sign * revenue
+            total[f"{bucket}_units"] += sign * line.quantity
+            total[f"{bucket}_revenue"] += sign * revenue
+
+    def order_placed(self, tenant_id: int, created_at: Optional[datetime], lines: Iterable) -> None:
+        self.add(tenant_id, created_at, lines, "placed")
+
+    def status_changed(self, tenant_id: int, created_at: Optional[datetime], lines: Iterable,
+                       from_status: Optional[str], to_status: Optional[str]) -> None:
+        lines = list(lines)
+        if from_status in STATUS_BUCKETS:
+            self.add(tenant_id, created_at, lines, STATUS_BUCKETS[from_status], -1)
+        if to_status in STATUS_BUCKETS:
+            self.add(tenant_id, created_at, lines, STATUS_BUCKETS[to_status], 1)
+
+    def order_removed(self, tenant_id: int, created_at: Optional[datetime], lines: Iterable, status: Optional[str]) -> None:
+        lines = list(lines)
+        self.add(tenant_id, created_at, lines, "placed", -1)
+        self.status_changed(tenant_id, created_at, lines, status, None)
+
+    def apply(self, db: Session) -> None:
+        """
+        Nanosi zmiany: jeden executemany UPDATE dla istniejących wierszy, jeden INSERT dla nowych.
+        Gdy równoległa transakcja wstawi ten sam wiersz pierwsza, dokładamy się UPDATE-em.
+        """
+        table = models.SalesDailyRollup.__table__
+        pending = list(self.rows.keys())
+
+        for _ in range(ROLLUP_UPSERT_ATTEMPTS):
+            if not pending:
+                break
+            # 1. Które wiersze już istnieją (jedno zapytanie na nadzbiór kluczy)
+            existing = {
+                (r.tenant_id, r.day, r.product_id, r.shard)
+                for r in db.execute(
+                    select(table.c.tenant_id, table.c.day, table.c.product_id, table.c.shard).where(and_(
+                        table.c.tenant_id.in_({k[0] for k in pending}),
+                        table.c.day.in_({k[1] for k in pending}),
+                        table.c.product_id.in_({k[2] for k in pending}),
+                        table.c.shard == self.shard
+                    ))
+                )
+            }
+
+            # 2. Istniejące - przyrostowy UPDATE (x = x + :delta)
+            to_update = [k for k in pending if k in existing]
+            if to_update:
+                db.execute(_increment_stmt(table), [self._params(k, prefix="d_") for k in to_update])
+
+            # 3. Nowe - INSERT w savepoincie; jeśli ktoś nas uprzedził, kolejna runda zrobi UPDATE
+            pending = [k for k in pending if k not in existing]
+            if pending:
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(table), [self._params(k, prefix="") for k in pending])
+                    pending = []
+                except IntegrityError:
+                    continue
+
+        if pending:
+            raise RuntimeError("Nie udało się zapisać sum sprzedaży (konflikt przy wstawianiu)")
+        self.rows = {}
+
+    def _params(self, key: RollupKey, prefix: str) -> dict:
+        tenant_id, day, product_id, shard = key
+        params = {f"{prefix}{m}": v for m, v in self.rows[key].items()}
+        if prefix:
+            params.update({"k_tenant_id": tenant_id, "k_day": day, "k_product_id": product_id, "k_shard": shard})
+        else:
+            params.update({"tenant_id": tenant_id, "day": day, "product_id": product_id, "shard": shard})
+        return params
+
+
+def _increment_stmt(table):
+    return (
+        update(table)
+        .where(table.c.tenant_id == bindparam("k_tenant_id"))
+        .where(table.c.day == bindparam("k_day"))
+        .where(table.c.product_id == bindparam("k_product_id"))
+        .where(table.c.shard == bindparam("k_shard"))
+        .values({m: table.c[m] + bindparam(f"d_{m}") for m in MEASURES})
+    )
+
+
+def _lock_for_rebuild(db: Session) -> None:
+    """
+    Blokada zapisu zamówień (gorących i archiwum) i sum do końca transakcji - odczyty działają dalej.
+    Zamówienie zmienia sumy w tej samej transakcji, więc po blokadzie każde jest albo zatwierdzone
+    (widać je w obu odczytach), albo czeka na koniec przeliczenia; archiwizacja nie przeniesie
+    zamówienia między odczytem gorących tabel a archiwum (byłoby policzone dwa razy).
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite nie ma LOCK TABLE - pusty UPDATE bierze blokadę zapisu całej bazy
+        table = models.SalesDailyRollup.__table__
+        db.execute(update(table).where(false()).values(placed_orders=table.c.placed_orders))
+    else:
+        tables = [models.StoreOrder, models.ArchivedOrder, models.SalesDailyRollup]
+        db.execute(text(f"LOCK TABLE {', '.join(m.__tablename__ for m in tables)} IN EXCLUSIVE MODE"))
+
+
+def rebuild_rollups(db: Session, tenant_id: Optional[int] = None, chunk_rows: int = 5000) -> int:
+    """
+    Przelicza sumy od zera z zamówień (gorące tabele + archiwum).
+    Wiersze czytamy strumieniowo, w pamięci trzymamy tylko same sumy (dni x produkty).
+    Całość pod blokadą zapisu (_lock_for_rebuild) - zamówienia czekają na koniec przeliczenia.
+    """
+    table = models.SalesDailyRollup.__table__
+    _lock_for_rebuild(db)
+    # Przeliczone sumy lądują w jednym shardzie - kolejne zamówienia rozłożą się po pozostałych
+    deltas = RollupDeltas(shard=0)
+
+    sources = [
+        (models.StoreOrder, models.OrderItem),
+        (models.ArchivedOrder, models.ArchivedOrderItem),
+    ]
+    for order, item in sources:
+        stmt = select(order.order_id, order.tenant_id, order.created_at, order.status,
+                      item.product_id, item.quantity, item.unit_price)\
+            .join(item, item.order_id == order.order_id)\
+            .order_by(order.order_id)\
+            .execution_options(stream_results=True, yield_per=chunk_rows)
+        if tenant_id is not None:
+            stmt = stmt.where(order.tenant_id == tenant_id)
+
+        current_id, current, lines = None, None, []
+        for row in db.execute(stmt):
+            if row.order_id != current_id:
+                if current is not None:
+                    deltas.order_placed(current.tenant_id, current.created_at, lines)
+                    deltas.status_changed(current.tenant_id, current.created_at, lines, None, current.status)
+                current_id, current, lines = row.order_id, row, []
+            lines.append(row)
+        if current is not None:
+            deltas.order_placed(current.tenant_id, current.created_at, lines)
+            deltas.status_changed(current.tenant_id, current.created_at, lines, None, current.status)
+
+    # Podmiana zawartości w jednej transakcji
+    stmt = delete(table)
+    if tenant_id is not None:
+        stmt = stmt.where(table.c.tenant_id == tenant_id)
+    db.execute(stmt)
+    rows = [deltas._params(k, prefix="") for k in deltas.rows]
+    if rows:
+        db.execute(insert(table), rows)
+    db.commit()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    # Uruchomienie: python -m app.modules.orders.rollups rebuild [--tenant-id 2]
+    import app.modules.tenancy.models  # noqa: F401 - rejestracja tabeli users dla kluczy obcych
+
+    parser = argparse.ArgumentParser(description="Sumy sprzedaży per sklep / dzień / produkt")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--tenant-id", type=int, default=None)
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        count = rebuild_rollups(session, args.tenant_id)
+        print(f"Przeliczono sumy sprzedaży: {count} wierszy.")
+    finally:
+        session.close()
@@ -1,17 +1,33 @@
-import random
-import string
-from typing import List
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime, timedelta
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
 from app.core.database import get_db
+from app.core.config import (
+    BULK_STATUS_MAX_ORDERS, ORDERS_PAGE_SIZE, ORDERS_PAGE_MAX, GUEST_ORDER_BATCHING,
+    STATS_DEFAULT_DAYS, STATS_MAX_DAYS
+)
+from app.core.idempotency import run_idempotent
+from app.core.etag import make_etag, etag_matches, not_modified, PRIVATE_REVALIDATE
+from app.core.versions import get_version
 from . import models, schemas
-# Importujemy modele produktów i userów
-from app.modules.catalog.models import Product
+# Importujemy modele userów
 from app.modules.tenancy.models import User
-from app.modules.auth.dependencies import get_current_user
-from app.core.security import get_password_hash
+from app.modules.auth.dependencies import get_current_user, require_owner, Principal
+from app.core.security import UNUSABLE_PASSWORD
+from .pricing import price_cart, build_order_items, validate_cart
+from .export import stream_orders, MEDIA_TYPES
+from .intake import guest_order_batcher, GuestOrderIntent
+from .rollups import RollupDeltas, MEASURES, ALL_PRODUCTS
+from app.modules.catalog.cache import bump_tenant_catalog
+from .changes import bump_tenant_orders, tenant_orders_version
+from .reservation import (
+    aggregate_quantities, reserve_stock, release_stock, transition_status,
+    apply_bulk_status, run_with_retry, InsufficientStock, ConcurrentUpdate
+)
 
 router = APIRouter(
     prefix="/orders",
@@ -23,21 +39,19 @@ router = APIRouter(
 def create_order(
     order_data: schemas.OrderCreate, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    # 1. Obliczamy sumę
-    total_amount = 0
-    # Weryfikacja cen produktów
-    for item in order_data.items:
-        product = db.query(Product).filter(Product.product_id == item.product_id).first()
-        if not product:
-            raise HTTPException(status_code=404, detail=f"Produkt {item.product_id} nie istnieje")
-        
-        # Izolacja: sprawdzamy czy produkt należy do tego samego sklepu co user
-        if product.tenant_id != current_user.tenant_id:
-            raise HTTPException(status_code=400, detail="Produkt nie należy do tego sklepu")
-            
-        total_amount += product.price * item.quantity
+    # Ponowienie z tym samym kluczem zwraca zapisaną odpowiedź (bez drugiego zamówienia)
+    return run_idempotent(
+        idempotency_key, f"orders:{current_user.user_id}", order_data,
+        lambda: _place_order(db, order_data, current_user)
+    )
+
+
+def _place_order(db: Session, order_data: schemas.OrderCreate, current_user: Principal):
+    # 1. Wycena koszyka (jedno zapytanie o wszystkie produkty + izolacja tenantów)
+    total_amount, lines = price_cart(db, order_data.items, current_user.tenant_id)
 
     # 2. Tworzymy nagłówek zamówienia
     new_order = models.StoreOrder(
@@ -55,37 +69,68 @@ def create_order(
     db.add(new_order)
     db.flush() # Pobieramy ID zamówienia
 
-    # 3. Dodajemy pozycje
-    for item in order_data.items:
-        product = db.query(Product).filter(Product.product_id == item.product_id).first()
-        new_item = models.OrderItem(
-            order_id=new_order.order_id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            unit_price=product.price
-        )
-        db.add(new_item)
+    # 3. Dodajemy pozycje (ceny z tej samej wyceny co suma)
+    db.add_all(build_order_items(new_order.order_id, lines))
+
+    # 4. Sumy sprzedaży i wersja listy zamówień sklepu w tej samej transakcji
+    deltas = RollupDeltas()
+    deltas.order_placed(new_order.tenant_id, new_order.created_at, lines)
+    deltas.apply(db)
+    bump_tenant_orders(db, [new_order.tenant_id])
 
     db.commit()
     db.refresh(new_order)
-    return new_order
+    # Odpowiedź zapisujemy jako gotowy schemat (magazyn idempotencji przeżyje sesję)
+    return schemas.OrderResponse.model_validate(new_order)
 
 
 # --- 2. ZAMÓWIENIE DLA GOŚCIA (BEZ LOGOWANIA) ---
 @router.post("/guest", status_code=201)
-def create_guest_order(order_data: schemas.GuestOrderCreate, db: Session = Depends(get_db)):
+def create_guest_order(
+    order_data: schemas.GuestOrderCreate,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    # Tryb group commit (GUEST_ORDER_BATCHING=1): zapis w paczkach przez wątek w tle
+    place = _enqueue_guest_order if GUEST_ORDER_BATCHING else _place_guest_order
+    return run_idempotent(
+        idempotency_key, f"orders.guest:{order_data.tenant_id}", order_data,
+        lambda: place(db, order_data)
+    )
+
+
+def _enqueue_guest_order(db: Session, order_data: schemas.GuestOrderCreate):
+    # Walidacja i wycena w wątku żądania - błędy 404/400 wracają od razu, bez kolejki
+    total_amount, lines = price_cart(db, order_data.items, order_data.tenant_id)
+    # Oddajemy połączenie do puli na czas czekania na zapis paczki
+    db.rollback()
+
+    return guest_order_batcher.submit(GuestOrderIntent(
+        tenant_id=order_data.tenant_id,
+        email=order_data.email,
+        first_name=order_data.first_name,
+        last_name=order_data.last_name,
+        address=order_data.address,
+        phone_number=order_data.phone_number,
+        total_amount=total_amount,
+        lines=lines
+    ), _guest_order_response)
+
+
+def _guest_order_response(order_id: int) -> dict:
+    return {"msg": "Zamówienie przyjęte (Gość)", "order_id": order_id}
+
+
+def _place_guest_order(db: Session, order_data: schemas.GuestOrderCreate):
     # 1. Sprawdzamy, czy użytkownik o takim emailu już istnieje
     user = db.query(User).filter(User.email == order_data.email).first()
     
     # 2. Jeśli nie istnieje -> Tworzymy konto "Automatycznego Klienta"
     if not user:
-        # Generujemy losowe hasło
-        chars = string.ascii_letters + string.digits
-        random_password = ''.join(random.choice(chars) for i in range(12))
-        
+        # Konto bez hasła (bez bcrypt na ścieżce zamówienia) - hasło ustawi klient przejmując konto
         user = User(
             email=order_data.email,
-            hashed_password=get_password_hash(random_password),
+            hashed_password=UNUSABLE_PASSWORD,
             role="CUSTOMER", # Klient
             tenant_id=order_data.tenant_id,
             is_active=True
@@ -93,19 +138,8 @@ def create_guest_order(order_data: schemas.GuestOrderCreate, db: Session = Depen
         db.add(user)
         db.flush() # Żeby dostać user.user_id
 
-    # 3. Obliczamy sumę zamówienia
-    total_amount = 0
-    # Weryfikacja cen
-    for item in order_data.items:
-        product = db.query(Product).filter(Product.product_id == item.product_id).first()
-        if not product:
-            raise HTTPException(status_code=404, detail=f"Produkt {item.product_id} nie istnieje")
-        
-        # Sprawdzamy czy produkt należy do sklepu
-        if product.tenant_id != order_data.tenant_id:
-             raise HTTPException(status_code=400, detail="Produkt nie należy do tego sklepu")
-
-        total_amount += product.price * item.quantity
+    # 3. Wycena koszyka (jedno zapytanie o wszystkie produkty + izolacja tenantów)
+    total_amount, lines = price_cart(db, order_data.items, order_data.tenant_id)
 
     # 4. Tworzymy zamówienie
     new_order = models.StoreOrder(
@@ -124,34 +158,115 @@ def create_guest_order(order_data: schemas.GuestOrderCreate, db: Session = Depen
     db.flush() 
 
     # 5. Dodajemy pozycje zamówienia
-    for item in order_data.items:
-        product = db.query(Product).filter(Product.product_id == item.product_id).first()
-        new_item = models.OrderItem(
-            order_id=new_order.order_id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            unit_price=product.price
-        )
-        db.add(new_item)
+    db.add_all(build_order_items(new_order.order_id, lines))
+
+    # 6. Sumy sprzedaży i wersja listy zamówień sklepu w tej samej transakcji
+    deltas = RollupDeltas()
+    deltas.order_placed(new_order.tenant_id, new_order.created_at, lines)
+    deltas.apply(db)
+    bump_tenant_orders(db, [new_order.tenant_id])
 
     db.commit()
-    return {"msg": "Zamówienie przyjęte (Gość)", "order_id": new_order.order_id}
+    return _guest_order_response(new_order.order_id)
+
+
+def get_order_page(
+    query,
+    limit: int,
+    cursor: Optional[int] = None,
+    status_filter: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    model=models.StoreOrder
+):
+    """
+    Stronicowanie keyset po order_id (od najnowszych).
+    Ta sama logika obsługuje gorącą tabelę i archiwum (parametr model).
+    Kursor to order_id ostatniego zamówienia z poprzedniej strony, więc strona N kosztuje
+    tyle samo co pierwsza. Pozycje ładujemy selectinload - 2 zapytania na stronę.
+    """
+    limit = max(1, min(limit, ORDERS_PAGE_MAX))
+
+    if cursor is not None:
+        query = query.filter(model.order_id < cursor)
+    if status_filter:
+        query = query.filter(model.status == status_filter)
+    if date_from:
+        query = query.filter(model.created_at >= date_from)
+    if date_to:
+        query = query.filter(model.created_at < date_to)
+
+    # Pobieramy jeden wiersz więcej, żeby wiedzieć czy jest następna strona
+    orders = query.options(selectinload(model.items))\
+        .order_by(model.order_id.desc())\
+        .limit(limit + 1).all()
+
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = orders[-1].order_id
+
+    return {"limit": limit, "next_cursor": next_cursor, "orders": orders}
 
 
 # --- 3. POBIERANIE MOICH ZAMÓWIEŃ (DLA KLIENTA) ---
-@router.get("/", response_model=list[schemas.OrderResponse])
-def get_my_orders(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(models.StoreOrder).filter(models.StoreOrder.user_id == current_user.user_id).all()
+@router.get("/", response_model=schemas.OrderPage)
+def get_my_orders(
+    limit: int = ORDERS_PAGE_SIZE,
+    cursor: Optional[int] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    query = db.query(models.StoreOrder).filter(models.StoreOrder.user_id == current_user.user_id)
+    return get_order_page(query, limit, cursor, status_filter, date_from, date_to)
 
 
 # --- 4. POBIERANIE WSZYSTKICH ZAMÓWIEŃ SKLEPU (DLA WŁAŚCICIELA) ---
-@router.get("/manage", response_model=list[schemas.OrderResponse])
+@router.get("/manage", response_model=schemas.OrderPage)
 def get_tenant_orders(
+    response: Response,
+    limit: int = ORDERS_PAGE_SIZE,
+    cursor: Optional[int] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),  # NEW, CONFIRMED, REJECTED
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(require_owner)
+):
+    # Warunkowy GET (odpytywanie panelu): niezmieniona wersja zamówień sklepu = 304 bez listy
+    version_name = tenant_orders_version(current_user.tenant_id)
+    etag = make_etag(
+        version_name, get_version(db, version_name),
+        (limit, cursor, status_filter, date_from, date_to)
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PRIVATE_REVALIDATE)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PRIVATE_REVALIDATE
+
+    # Właściciel widzi zamówienia w swoim tenancie - stronami, od najnowszych
+    query = db.query(models.StoreOrder).filter(models.StoreOrder.tenant_id == current_user.tenant_id)
+    return get_order_page(query, limit, cursor, status_filter, date_from, date_to)
+
+
+# --- 4b. ARCHIWUM ZAMÓWIEŃ SKLEPU (TYLKO ODCZYT) ---
+@router.get("/archive", response_model=schemas.ArchivedOrderPage)
+def get_archived_orders(
+    limit: int = ORDERS_PAGE_SIZE,
+    cursor: Optional[int] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_owner)
 ):
-    # Właściciel widzi wszystkie zamówienia w swoim tenancie
-    return db.query(models.StoreOrder).filter(models.StoreOrder.tenant_id == current_user.tenant_id).order_by(models.StoreOrder.order_id.desc()).all()
+    # Zamówienia przeniesione z gorących tabel przez archive.py
+    query = db.query(models.ArchivedOrder).filter(models.ArchivedOrder.tenant_id == current_user.tenant_id)
+    return get_order_page(query, limit, cursor, status_filter, date_from, date_to, model=models.ArchivedOrder)
 
 
 # --- 5. ZATWIERDZANIE / ODRZUCANIE ZAMÓWIENIA ---
@@ -164,52 +279,59 @@ def process_order(
     order_id: int, 
     status_data: OrderStatusUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(require_owner)
 ):
-    # 1. Pobierz zamówienie
-    order = db.query(models.StoreOrder).filter(models.StoreOrder.order_id == order_id).first()
-    if not order:
-        raise HTTPException(status_code=404, detail="Zamówienie nie istnieje")
+    def apply_status():
+        # 1. Pobierz zamówienie
+        order = db.query(models.StoreOrder).filter(models.StoreOrder.order_id == order_id).first()
+        if not order:
+            raise HTTPException(status_code=404, detail="Zamówienie nie istnieje")
 
-    # 2. Sprawdź czy to właściciel tego sklepu
-    if order.tenant_id != current_user.tenant_id:
-        raise HTTPException(status_code=403, detail="Brak uprawnień do tego zamówienia")
+        # 2. Sprawdź czy to właściciel tego sklepu
+        if order.tenant_id != current_user.tenant_id:
+            raise HTTPException(status_code=403, detail="Brak uprawnień do tego zamówienia")
 
-    # 3. Jeśli status jest już taki sam, nic nie rób
-    if order.status == status_data.status:
-        return order
+        # 3. Jeśli status jest już taki sam, nic nie rób
+        if order.status == status_data.status:
+            return order
 
-    # 4. LOGIKA ZATWIERDZANIA (CONFIRMED)
-    if status_data.status == "CONFIRMED":
-        if order.status == "CONFIRMED":
-             raise HTTPException(status_code=400, detail="To zamówienie jest już zatwierdzone")
-
-        for item in order.items:
-            product = db.query(Product).filter(Product.product_id == item.product_id).first()
-            if product.stock_quantity < item.quantity:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Za mało towaru: {product.name}. Dostępne: {product.stock_quantity}, Wymagane: {item.quantity}"
-                )
-            product.stock_quantity -= item.quantity
-        
-        order.status = "CONFIRMED"
-
-    # 5. LOGIKA ODRZUCANIA (REJECTED)
-    elif status_data.status == "REJECTED":
-        if order.status == "CONFIRMED":
-            for item in order.items:
-                product = db.query(Product).filter(Product.product_id == item.product_id).first()
-                product.stock_quantity += item.quantity
-        
-        order.status = "REJECTED"
-    
-    else:
-        raise HTTPException(status_code=400, detail="Nieprawidłowy status. Użyj CONFIRMED lub REJECTED")
+        # Sumy sprzedaży przenosimy ze starego kubełka statusu do nowego
+        deltas = RollupDeltas()
+        deltas.status_changed(order.tenant_id, order.created_at, order.items, order.status, status_data.status)
 
-    db.commit()
-    db.refresh(order)
-    return order
+        # 4. LOGIKA ZATWIERDZANIA (CONFIRMED)
+        if status_data.status == "CONFIRMED":
+            # Najpierw warunkowa zmiana statusu (blokuje zamówienie przed drugim zatwierdzeniem),
+            # potem wszystkie pozycje zdejmowane ze stanu jednym warunkowym executemany
+            transition_status(db, order.order_id, order.status, "CONFIRMED")
+            reserve_stock(db, aggregate_quantities(order.items))
+            # Zmieniły się stany widoczne w katalogu sklepu
+            bump_tenant_catalog(db, order.tenant_id, prices=False)
+
+        # 5. LOGIKA ODRZUCANIA (REJECTED)
+        elif status_data.status == "REJECTED":
+            transition_status(db, order.order_id, order.status, "REJECTED")
+            if order.status == "CONFIRMED":
+                release_stock(db, aggregate_quantities(order.items))
+                bump_tenant_catalog(db, order.tenant_id, prices=False)
+
+        else:
+            raise HTTPException(status_code=400, detail="Nieprawidłowy status. Użyj CONFIRMED lub REJECTED")
+
+        deltas.apply(db)
+        bump_tenant_orders(db, [order.tenant_id])
+        db.commit()
+        db.refresh(order)
+        return order
+
+    # Konflikty współbieżności (deadlock, serializacja, równoległa zmiana statusu) ponawiamy kilka razy
+    try:
+        return run_with_retry(db, apply_status)
+    except InsufficientStock as e:
+        # Konflikt ze stanem magazynu - nic nie zostało zdjęte (transakcja wycofana)
+        raise HTTPException(status_code=409, detail=e.detail())
+    except ConcurrentUpdate:
+        raise HTTPException(status_code=409, detail="Zamówienie jest właśnie modyfikowane. Spróbuj ponownie.")
 
 
 # --- 6. USUWANIE ZAMÓWIENIA (HISTORIA) ---
@@ -217,7 +339,7 @@ def process_order(
 def delete_order(
     order_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(require_owner)
 ):
     # 1. Szukamy zamówienia
     order = db.query(models.StoreOrder).filter(models.StoreOrder.order_id == order_id).first()
@@ -228,11 +350,105 @@ def delete_order(
     if order.tenant_id != current_user.tenant_id:
         raise HTTPException(status_code=403, detail="Nie możesz usunąć tego zamówienia")
 
-    # 3. Najpierw usuwamy pozycje (items) tego zamówienia
+    # 3. Zdejmujemy zamówienie z sum sprzedaży
+    deltas = RollupDeltas()
+    deltas.order_removed(order.tenant_id, order.created_at, order.items, order.status)
+    deltas.apply(db)
+    bump_tenant_orders(db, [order.tenant_id])
+
+    # 4. Najpierw usuwamy pozycje (items) tego zamówienia
     db.query(models.OrderItem).filter(models.OrderItem.order_id == order_id).delete()
     
-    # 4. Usuwamy główne zamówienie
+    # 5. Usuwamy główne zamówienie
     db.delete(order)
     db.commit()
     
-    return None
\ No newline at end of file
+    return None
+
+
+# --- 7. MASOWE ZATWIERDZANIE / ODRZUCANIE ZAMÓWIEŃ ---
+@router.post("/bulk-status", response_model=schemas.BulkStatusResponse)
+def bulk_process_orders(
+    bulk_data: schemas.BulkStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_owner)
+):
+    if bulk_data.status not in ("CONFIRMED", "REJECTED"):
+        raise HTTPException(status_code=400, detail="Nieprawidłowy status. Użyj CONFIRMED lub REJECTED")
+
+    # Usuwamy duplikaty, zachowując kolejność z żądania
+    order_ids = list(dict.fromkeys(bulk_data.order_ids))
+    if len(order_ids) > BULK_STATUS_MAX_ORDERS:
+        raise HTTPException(status_code=400, detail=f"Maksymalnie {BULK_STATUS_MAX_ORDERS} zamówień w jednym żądaniu")
+
+    def apply_bulk():
+        results = apply_bulk_status(db, current_user.tenant_id, order_ids, bulk_data.status)
+        db.commit()
+        return results
+
+    # Cała paczka to jedna transakcja - po konflikcie ponawiamy ją w całości
+    try:
+        results = run_with_retry(db, apply_bulk) if order_ids else []
+    except ConcurrentUpdate:
+        raise HTTPException(status_code=409, detail="Zamówienia są właśnie modyfikowane. Spróbuj ponownie.")
+
+    succeeded = sum(1 for r in results if r["success"])
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
+
+
+# --- 8. EKSPORT HISTORII ZAMÓWIEŃ (DLA KSIĘGOWOŚCI) ---
+@router.get("/export")
+def export_orders(
+    export_format: str = Query("csv", alias="format"),  # csv lub ndjson
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    current_user: Principal = Depends(require_owner)
+):
+    if export_format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Nieprawidłowy format. Użyj csv lub ndjson")
+
+    # Strumieniujemy wynik kursorem serwerowym - pamięć stała niezależnie od liczby zamówień
+    filename = f"orders_{current_user.tenant_id}_{datetime.now():%Y%m%d_%H%M%S}.{export_format}"
+    return StreamingResponse(
+        stream_orders(current_user.tenant_id, export_format, status_filter, date_from, date_to),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# --- 9. STATYSTYKI SPRZEDAŻY (DLA WŁAŚCICIELA) ---
+@router.get("/stats", response_model=schemas.SalesStatsResponse)
+def get_sales_stats(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,  # włącznie
+    product_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_owner)
+):
+    # Czytamy gotowe sumy dzienne zamiast skanować zamówienia (kilka shardów na dzień)
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=STATS_DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from nie może być późniejsza niż date_to")
+    if (date_to - date_from).days >= STATS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Maksymalny zakres to {STATS_MAX_DAYS} dni")
+
+    rollup = models.SalesDailyRollup
+    rows = db.query(rollup.day, *[func.sum(getattr(rollup, m)).label(m) for m in MEASURES]).filter(
+        rollup.tenant_id == current_user.tenant_id,
+        rollup.product_id == (product_id if product_id is not None else ALL_PRODUCTS),
+        rollup.day >= date_from,
+        rollup.day <= date_to
+    ).group_by(rollup.day).order_by(rollup.day).all()
+
+    days = [dict({m: getattr(row, m) for m in MEASURES}, day=row.day) for row in rows]
+    totals = {m: sum(d[m] for d in days) for m in MEASURES}
+    return {"date_from": date_from, "date_to": date_to, "product_id": product_id, "totals": totals, "days": days}
+
+
+# --- 10. WALIDACJA KOSZYKA (PRZED ZŁOŻENIEM ZAMÓWIENIA) ---
+@router.post("/cart/validate", response_model=schemas.CartValidationResponse)
+def validate_order_cart(cart: schemas.CartValidate, db: Session = Depends(get_db)):
+    # Ceny i stany z migawki sklepu - koszyk można sprawdzać przy każdej zmianie bez obciążania bazy
+    return validate_cart(db, cart.items, cart.tenant_id)
@@ -1,6 +1,6 @@
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
-from datetime import datetime
+from datetime import date, datetime
 
 # --- 1. ELEMENT ZAMÓWIENIA (POZYCJA) ---
 class OrderItemCreate(BaseModel):
@@ -57,4 +57,75 @@ class OrderResponse(BaseModel):
     items: List[OrderItemResponse] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Strona listy zamówień (stronicowanie kursorem po order_id)
+class OrderPage(BaseModel):
+    limit: int
+    next_cursor: Optional[int] = None  # None = to była ostatnia strona
+    orders: List[OrderResponse]
+
+# Zamówienie z archiwum (tylko odczyt)
+class ArchivedOrderResponse(OrderResponse):
+    archived_at: datetime
+
+class ArchivedOrderPage(BaseModel):
+    limit: int
+    next_cursor: Optional[int] = None
+    orders: List[ArchivedOrderResponse]
+
+# --- 6. MASOWA ZMIANA STATUSU ---
+class BulkStatusUpdate(BaseModel):
+    order_ids: List[int]
+    status: str  # CONFIRMED lub REJECTED
+
+# Wynik dla pojedynczego zamówienia z paczki
+class BulkStatusResult(BaseModel):
+    order_id: int
+    success: bool
+    status: Optional[str] = None
+    detail: Optional[str] = None
+
+class BulkStatusResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkStatusResult]
+
+# --- 7. STATYSTYKI SPRZEDAŻY (z sum dziennych) ---
+class SalesStats(BaseModel):
+    placed_orders: int = 0
+    placed_units: int = 0
+    placed_revenue: float = 0
+    confirmed_orders: int = 0
+    confirmed_units: int = 0
+    confirmed_revenue: float = 0
+    rejected_orders: int = 0
+    rejected_units: int = 0
+    rejected_revenue: float = 0
+
+class SalesStatsDay(SalesStats):
+    day: date
+
+class SalesStatsResponse(BaseModel):
+    date_from: date
+    date_to: date
+    product_id: Optional[int] = None  # None = wszystkie produkty
+    totals: SalesStats
+    days: List[SalesStatsDay]
+
+# --- 8. WALIDACJA KOSZYKA (PRZED ZŁOŻENIEM ZAMÓWIENIA) ---
+class CartValidate(BaseModel):
+    tenant_id: int
+    items: List[OrderItemCreate]
+
+class CartLineStatus(BaseModel):
+    product_id: int
+    quantity: int
+    unit_price: Optional[float] = None
+    available: Optional[int] = None
+    status: str  # ok, insufficient_stock, not_found, other_tenant
+
+class CartValidationResponse(BaseModel):
+    valid: bool
+    total_amount: float
+    lines: List[CartLineStatus]
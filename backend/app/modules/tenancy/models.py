@@ -24,6 +24,8 @@ class User(Base):
     hashed_password = Column(String(200), nullable=False)
     is_active = Column(Boolean, default=True)
     role = Column(String(20), default="OWNER") # OWNER, STAFF, ADMIN, CUSTOMER
+    # Podbijana przy dezaktywacji / "wyloguj wszędzie" - tokeny ze starszą wersją ("ver") są odrzucane
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     tenant_id = Column(Integer, ForeignKey("tenants.tenant_id"), nullable=False)
     
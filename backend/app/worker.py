@@ -3,6 +3,10 @@ import sys
 import os
 from datetime import datetime
 from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+# Worker startuje jako "python app/worker.py" - dopisujemy katalog backendu, żeby widzieć pakiet app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # --- KONFIGURACJA ---
 # Adres bazy danych zgodny z Twoim docker-compose.yml:
@@ -89,15 +93,50 @@ def generate_report():
     except Exception as e:
         print(f"[Worker BŁĄD] W trakcie analizy danych: {e}", file=sys.stderr)
 
+def reconcile_facets():
+    # Okresowe uzgodnienie liczników kategorii (aktualizowanych przyrostowo przez API) z danymi
+    engine = get_db_engine()
+    if not engine:
+        return
+    try:
+        import app.modules.tenancy.models  # noqa: F401 - rejestracja tabeli tenants dla kluczy obcych
+        from app.modules.catalog.facets import reconcile
+        with Session(engine) as session:
+            fixed = reconcile(session)
+        print(f"[Worker] Liczniki kategorii uzgodnione (poprawiono: {fixed})", file=sys.stdout)
+    except Exception as e:
+        print(f"[Worker BŁĄD] Uzgadnianie liczników kategorii: {e}", file=sys.stderr)
+
+def purge_rate_limits():
+    # Pełne od dawna kubełki limitów logowania (RATE_LIMIT_SHARED) - brak wiersza znaczy to samo
+    engine = get_db_engine()
+    if not engine:
+        return
+    try:
+        from app.core.ratelimit import purge_idle_buckets
+        with Session(engine) as session:
+            deleted = purge_idle_buckets(session)
+        print(f"[Worker] Usunięto bezczynne kubełki limitów: {deleted}", file=sys.stdout)
+    except Exception as e:
+        print(f"[Worker BŁĄD] Czyszczenie kubełków limitów: {e}", file=sys.stderr)
+
 def start():
     print("--- 🚀 URUCHAMIANIE WORKERA TŁA (Backend/App) ---", file=sys.stdout)
     print(f"Baza danych: {DATABASE_URL}", file=sys.stdout)
     
     # Czekamy chwilę na start bazy danych po uruchomieniu kontenerów
     time.sleep(10) 
+
+    from app.core.config import FACET_RECONCILE_INTERVAL, RATE_LIMIT_SHARED
+    last_reconcile = 0.0
     
     while True:
         generate_report()
+        if FACET_RECONCILE_INTERVAL > 0 and time.monotonic() - last_reconcile >= FACET_RECONCILE_INTERVAL:
+            reconcile_facets()
+            last_reconcile = time.monotonic()
+        if RATE_LIMIT_SHARED:
+            purge_rate_limits()
         # Raport co 30 sekund
         print("[Worker] Czekam 30 sekund na kolejny cykl...", file=sys.stdout)
         time.sleep(30)
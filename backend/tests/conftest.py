@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+# Testy działają na pliku SQLite - ustawienia muszą być gotowe przed pierwszym importem app
+_DB_DIR = tempfile.mkdtemp(prefix="music-store-tests-")
+os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+for _name in (
+    "LOGIN_IP_RATE", "LOGIN_EMAIL_RATE", "REGISTER_IP_RATE", "REFRESH_IP_RATE",
+    "CLAIM_REQUEST_IP_RATE", "CLAIM_REQUEST_EMAIL_RATE", "CLAIM_IP_RATE"
+):
+    os.environ[_name] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.modules.catalog.models import Product  # noqa: E402
+
+CUSTOMER = {"first_name": "Jan", "last_name": "Kowalski", "address": "Kraków", "phone_number": "123456789"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    Base.metadata.create_all(engine)
+    return TestClient(app)
+
+
+@pytest.fixture
+def owner(client):
+    """Nowy sklep z zalogowanym właścicielem: (tenant_id, nagłówki z tokenem)."""
+    email = f"owner-{uuid.uuid4().hex[:8]}@example.com"
+    r = client.post("/auth/register", json={"email": email, "password": "haslo", "company_name": "Sklep"})
+    assert r.status_code == 201, r.text
+    tenant_id = r.json()["tenant_id"]
+    r = client.post("/auth/login", json={"email": email, "password": "haslo"})
+    assert r.status_code == 200, r.text
+    return tenant_id, {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def create_product(client, headers, name="Gitara", price=100.0, stock=5) -> int:
+    r = client.post(
+        "/catalog/local/",
+        json={"name": name, "price": price, "stock_quantity": stock, "tenant_id": 0},
+        headers=headers
+    )
+    assert r.status_code == 200, r.text
+    return r.json()["product_id"]
+
+
+def place_guest_order(client, tenant_id, items, idempotency_key=None):
+    headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+    return client.post(
+        "/orders/guest",
+        json={**CUSTOMER, "email": f"guest-{uuid.uuid4().hex[:8]}@example.com", "tenant_id": tenant_id, "items": items},
+        headers=headers
+    )
+
+
+def stock_of(product_id: int) -> int:
+    with SessionLocal() as db:
+        return db.get(Product, product_id).stock_quantity
@@ -0,0 +1,86 @@
+import uuid
+
+import pytest
+
+from conftest import CUSTOMER, SessionLocal, create_product
+import app.modules.auth.router as auth_router
+from app.modules.auth.dependencies import decode_access_token, get_user_record, revoke_user_tokens
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    """Wiadomości wysłane przez API (zamiast SMTP): lista (adresat, temat, treść)."""
+    sent = []
+    monkeypatch.setattr(auth_router, "send_email", lambda to, subject, body: sent.append((to, subject, body)))
+    return sent
+
+
+def _guest_email(client, tenant_id, product_id) -> str:
+    email = f"guest-{uuid.uuid4().hex[:8]}@example.com"
+    r = client.post(
+        "/orders/guest",
+        json={**CUSTOMER, "email": email, "tenant_id": tenant_id, "items": [{"product_id": product_id, "quantity": 1}]}
+    )
+    assert r.status_code == 201, r.text
+    return email
+
+
+def _claim(client, outbox, email, password="nowe-haslo"):
+    assert client.post("/auth/claim/request", json={"email": email}).status_code == 202
+    code = outbox[-1][2].split("Kod aktywacji konta: ")[1].split("\n")[0]
+    return code, client.post("/auth/claim", json={"token": code, "password": password})
+
+
+def test_claimed_guest_cannot_use_owner_endpoints(client, owner, outbox):
+    tenant_id, headers = owner
+    email = _guest_email(client, tenant_id, create_product(client, headers))
+    _, claimed = _claim(client, outbox, email)
+    assert claimed.status_code == 200, claimed.text
+
+    r = client.post("/auth/login", json={"email": email, "password": "nowe-haslo"})
+    assert r.status_code == 200, r.text
+    customer = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    # Konto klienta ma tenant_id sklepu, ale nie rolę właściciela
+    assert client.get("/orders/manage", headers=customer).status_code == 403
+    assert client.get("/orders/stats", headers=customer).status_code == 403
+    assert client.post(
+        "/catalog/local/", json={"name": "X", "price": 1.0, "stock_quantity": 1, "tenant_id": 0}, headers=customer
+    ).status_code == 403
+    assert client.get("/orders/manage", headers=headers).status_code == 200
+
+
+def test_claim_code_is_single_use(client, owner, outbox):
+    tenant_id, headers = owner
+    email = _guest_email(client, tenant_id, create_product(client, headers))
+    code, claimed = _claim(client, outbox, email)
+    assert claimed.status_code == 200, claimed.text
+    assert outbox[-1][0] == email
+
+    reused = client.post("/auth/claim", json={"token": code, "password": "inne-haslo"})
+    assert reused.status_code == 400
+    # Konto z hasłem nie dostaje już kodów
+    sent = len(outbox)
+    assert client.post("/auth/claim/request", json={"email": email}).status_code == 202
+    assert len(outbox) == sent
+
+
+def test_claim_request_does_not_reveal_accounts(client, outbox):
+    r = client.post("/auth/claim/request", json={"email": f"nobody-{uuid.uuid4().hex[:8]}@example.com"})
+    assert r.status_code == 202
+    assert outbox == []
+    assert client.post("/auth/claim", json={"token": "zgadniety-kod", "password": "x"}).status_code == 400
+
+
+def test_revoked_tokens_are_rejected_after_commit(client, owner):
+    tenant_id, headers = owner
+    token = headers["Authorization"].split(" ")[1]
+    user_id = decode_access_token(token)["user_id"]
+
+    with SessionLocal() as db, SessionLocal() as other:
+        revoke_user_tokens(db, user_id)
+        # Równoległe żądanie przed commitem wczytuje do cache jeszcze starą wersję tokenów
+        get_user_record(other, user_id)
+        db.commit()
+
+    assert client.get("/orders/manage", headers=headers).status_code == 401
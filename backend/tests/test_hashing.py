@@ -0,0 +1,32 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.hashing import PasswordHasher
+
+
+def test_timed_out_job_keeps_its_slot_until_it_finishes():
+    hasher = PasswordHasher(workers=1, max_pending=1, timeout=0.2)
+    try:
+        with pytest.raises(HTTPException) as timed_out:
+            hasher._run(time.sleep, 1.5)
+        assert timed_out.value.status_code == 503
+
+        # Porzucone zadanie nadal zajmuje proces puli - kolejne żądanie nie dostaje miejsca
+        with pytest.raises(HTTPException):
+            hasher._run(abs, -1)
+        stats = hasher.stats()
+        assert (stats["timed_out"], stats["rejected"], stats["completed"]) == (1, 1, 0)
+
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                assert hasher._run(abs, -1) == 1
+                break
+            except HTTPException:
+                assert time.monotonic() < deadline
+                time.sleep(0.2)
+        assert hasher.stats()["completed"] == 1
+    finally:
+        hasher.shutdown()
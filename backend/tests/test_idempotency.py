@@ -0,0 +1,91 @@
+import uuid
+from concurrent.futures import Future
+
+import pytest
+
+from conftest import CUSTOMER, create_product
+from app.core.database import SessionLocal
+from app.core.idempotency import IdempotencyStore, PendingResult
+from app.modules.orders.models import StoreOrder
+
+
+def _orders_in(tenant_id: int) -> int:
+    with SessionLocal() as db:
+        return db.query(StoreOrder).filter(StoreOrder.tenant_id == tenant_id).count()
+
+
+def test_replay_returns_same_body_without_second_order(client, owner):
+    tenant_id, headers = owner
+    product_id = create_product(client, headers)
+    key = uuid.uuid4().hex
+    body = {**CUSTOMER, "items": [{"product_id": product_id, "quantity": 1}]}
+
+    first = client.post("/orders/", json=body, headers={**headers, "Idempotency-Key": key})
+    replay = client.post("/orders/", json=body, headers={**headers, "Idempotency-Key": key})
+
+    assert first.status_code == 200, first.text
+    assert replay.status_code == 200
+    assert replay.json() == first.json()
+    assert _orders_in(tenant_id) == 1
+
+
+def test_guest_replay_returns_same_order_id(client, owner):
+    tenant_id, headers = owner
+    product_id = create_product(client, headers)
+    key = uuid.uuid4().hex
+    items = [{"product_id": product_id, "quantity": 1}]
+    body = {**CUSTOMER, "email": "gosc@example.com", "tenant_id": tenant_id, "items": items}
+
+    first = client.post("/orders/guest", json=body, headers={"Idempotency-Key": key})
+    replay = client.post("/orders/guest", json=body, headers={"Idempotency-Key": key})
+
+    assert first.status_code == 201, first.text
+    assert replay.json() == first.json()
+    assert _orders_in(tenant_id) == 1
+
+
+def test_same_key_with_different_body_returns_422(client, owner):
+    tenant_id, headers = owner
+    product_id = create_product(client, headers)
+    key = uuid.uuid4().hex
+
+    body = {**CUSTOMER, "email": "gosc@example.com", "tenant_id": tenant_id}
+
+    first = client.post(
+        "/orders/guest", json={**body, "items": [{"product_id": product_id, "quantity": 1}]},
+        headers={"Idempotency-Key": key}
+    )
+    # Ten sam klucz, inny koszyk
+    changed = client.post(
+        "/orders/guest", json={**body, "items": [{"product_id": product_id, "quantity": 2}]},
+        headers={"Idempotency-Key": key}
+    )
+
+    assert first.status_code == 201, first.text
+    assert changed.status_code == 422
+    assert "inną treścią" in changed.json()["detail"]
+    assert _orders_in(tenant_id) == 1
+
+
+def test_pending_result_keeps_key_until_background_write_finishes():
+    store = IdempotencyStore(ttl_seconds=60, max_entries=10, wait_seconds=0.05)
+    future = Future()
+    calls = []
+
+    def operation():
+        calls.append(1)
+        raise PendingResult(future, lambda order_id: {"order_id": order_id}, "w toku")
+
+    with pytest.raises(PendingResult) as first:
+        store.execute("k", "fp", operation)
+    assert first.value.status_code == 503
+    assert first.value.headers["Retry-After"] == "1"
+
+    # Zapis trwa - ponowienie nie uruchamia operacji drugi raz
+    with pytest.raises(Exception) as waiting:
+        store.execute("k", "fp", operation)
+    assert getattr(waiting.value, "status_code", None) == 409
+
+    future.set_result(42)
+    assert store.execute("k", "fp", operation) == {"order_id": 42}
+    assert calls == [1]
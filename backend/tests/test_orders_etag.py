@@ -0,0 +1,23 @@
+from conftest import create_product, place_guest_order
+
+
+def test_manage_etag_changes_after_new_order_and_status(client, owner):
+    tenant_id, headers = owner
+    product_id = create_product(client, headers)
+    first = place_guest_order(client, tenant_id, [{"product_id": product_id, "quantity": 1}])
+    assert first.status_code == 201, first.text
+
+    listing = client.get("/orders/manage", headers=headers)
+    etag = listing.headers["ETag"]
+    assert client.get("/orders/manage", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    # Wersję podbija ta sama transakcja, tuż przed commitem zamówienia
+    assert place_guest_order(client, tenant_id, [{"product_id": product_id, "quantity": 1}]).status_code == 201
+    changed = client.get("/orders/manage", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert len(changed.json()["orders"]) == 2
+
+    etag = changed.headers["ETag"]
+    r = client.patch(f"/orders/{first.json()['order_id']}/status", json={"status": "CONFIRMED"}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert client.get("/orders/manage", headers={**headers, "If-None-Match": etag}).status_code == 200
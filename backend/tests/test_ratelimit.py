@@ -0,0 +1,47 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException, Request
+
+from app.core import ratelimit
+from app.core.ratelimit import TokenBucketLimiter
+
+
+@pytest.fixture
+def email_limiter(monkeypatch):
+    """Limit nieudanych logowań: jedna próba, potem token co minutę."""
+    limiter = TokenBucketLimiter("login:email", 1, 1, 100)
+    monkeypatch.setattr(ratelimit, "login_email_limiter", limiter)
+    return limiter
+
+
+def _register(client) -> str:
+    email = f"owner-{uuid.uuid4().hex[:8]}@example.com"
+    r = client.post("/auth/register", json={"email": email, "password": "haslo", "company_name": "Sklep"})
+    assert r.status_code == 201, r.text
+    return email
+
+
+def test_only_failed_logins_use_the_email_limit(client, email_limiter):
+    email = _register(client)
+    assert email_limiter.stats()["buckets"] == 0  # rejestracja nie rusza limitu logowania
+
+    for _ in range(3):
+        assert client.post("/auth/login", json={"email": email, "password": "haslo"}).status_code == 200
+
+    assert client.post("/auth/login", json={"email": email, "password": "zle"}).status_code == 401
+    blocked = client.post("/auth/login", json={"email": email, "password": "haslo"})
+    assert blocked.status_code == 429
+    assert int(blocked.headers["Retry-After"]) >= 1
+
+
+def test_email_limit_counts_failures_from_every_address(email_limiter):
+    def request_from(ip):
+        return Request({"type": "http", "headers": [], "client": (ip, 1234)})
+
+    ratelimit.record_login_failure("Ofiara@example.com")
+
+    # Zgadywanie hasła rozłożone na wiele adresów nadal trafia w limit konta
+    with pytest.raises(HTTPException) as blocked:
+        ratelimit.throttle_login(request_from("10.0.0.2"), "ofiara@example.com")
+    assert blocked.value.status_code == 429
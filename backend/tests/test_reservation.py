@@ -0,0 +1,83 @@
+import threading
+
+from conftest import create_product, place_guest_order, stock_of
+from app.core.database import SessionLocal
+from app.modules.orders.models import StoreOrder
+
+
+def _order_status(order_id: int) -> str:
+    with SessionLocal() as db:
+        return db.get(StoreOrder, order_id).status
+
+
+def test_shortage_returns_409_without_partial_reservation(client, owner):
+    tenant_id, headers = owner
+    available = create_product(client, headers, "Gitara", stock=5)
+    sold_out = create_product(client, headers, "Bas", stock=1)
+    r = place_guest_order(client, tenant_id, [
+        {"product_id": available, "quantity": 2},
+        {"product_id": sold_out, "quantity": 3},
+    ])
+    order_id = r.json()["order_id"]
+
+    r = client.patch(f"/orders/{order_id}/status", json={"status": "CONFIRMED"}, headers=headers)
+
+    assert r.status_code == 409
+    assert "Za mało towaru" in r.json()["detail"]
+    # Pierwsza pozycja się mieściła, ale nic nie zostało zdjęte ze stanu
+    assert stock_of(available) == 5
+    assert stock_of(sold_out) == 1
+    assert _order_status(order_id) == "NEW"
+
+
+def test_concurrent_confirmations_deduct_stock_once(client, owner):
+    tenant_id, headers = owner
+    product_id = create_product(client, headers, stock=5)
+    order_id = place_guest_order(client, tenant_id, [{"product_id": product_id, "quantity": 2}]).json()["order_id"]
+
+    codes = []
+    start = threading.Barrier(4)
+
+    def confirm():
+        start.wait()
+        r = client.patch(f"/orders/{order_id}/status", json={"status": "CONFIRMED"}, headers=headers)
+        codes.append(r.status_code)
+
+    threads = [threading.Thread(target=confirm) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert 200 in codes
+    assert set(codes) <= {200, 409}
+    assert stock_of(product_id) == 3
+    assert _order_status(order_id) == "CONFIRMED"
+
+
+def test_concurrent_orders_never_oversell(client, owner):
+    tenant_id, headers = owner
+    product_id = create_product(client, headers, stock=1)
+    order_ids = [
+        place_guest_order(client, tenant_id, [{"product_id": product_id, "quantity": 1}]).json()["order_id"]
+        for _ in range(3)
+    ]
+
+    codes = {}
+    start = threading.Barrier(len(order_ids))
+
+    def confirm(order_id):
+        start.wait()
+        r = client.patch(f"/orders/{order_id}/status", json={"status": "CONFIRMED"}, headers=headers)
+        codes[order_id] = r.status_code
+
+    threads = [threading.Thread(target=confirm, args=(order_id,)) for order_id in order_ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(codes.values()) == [200, 409, 409]
+    assert stock_of(product_id) == 0
+    confirmed = [order_id for order_id in order_ids if _order_status(order_id) == "CONFIRMED"]
+    assert len(confirmed) == 1
@@ -0,0 +1,17 @@
+from conftest import create_product
+
+
+def _suggest(client, tenant_id, q):
+    r = client.get(f"/catalog/local/{tenant_id}/suggest", params={"q": q})
+    assert r.status_code == 200, r.text
+    return [s["name"] for s in r.json()]
+
+
+def test_suggest_needs_a_match_for_every_query_word(client, owner):
+    tenant_id, headers = owner
+    create_product(client, headers, name="Gibson Gold Top")
+    create_product(client, headers, name="Fender Stratocaster")
+
+    assert _suggest(client, tenant_id, "gibson go") == ["Gibson Gold Top"]
+    # Prefiks "g" pasuje do dwóch słów nazwy, ale "fender" - do żadnego
+    assert _suggest(client, tenant_id, "fender g") == []
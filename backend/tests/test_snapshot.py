@@ -0,0 +1,61 @@
+from conftest import SessionLocal, create_product, place_guest_order
+from app.modules.catalog import snapshot as snapshot_module
+from app.modules.catalog.snapshot import load_snapshot, tenant_snapshots
+from app.modules.catalog.models import Product
+from app.modules.orders.models import StoreOrder
+
+
+def _validate(client, tenant_id, product_id, quantity=1):
+    return client.post(
+        "/orders/cart/validate",
+        json={"tenant_id": tenant_id, "items": [{"product_id": product_id, "quantity": quantity}]}
+    )
+
+
+def test_unknown_tenant_is_rejected_without_snapshot(client):
+    cached = len(tenant_snapshots.snapshots)
+    builds = tenant_snapshots.builds
+
+    r = _validate(client, 987654321, 1)
+
+    assert r.status_code == 404
+    assert len(tenant_snapshots.snapshots) == cached
+    assert tenant_snapshots.builds == builds
+
+
+def test_order_confirmation_patches_stock_without_rebuild(client, owner):
+    tenant_id, headers = owner
+    product_id = create_product(client, headers, stock=5)
+    order = place_guest_order(client, tenant_id, [{"product_id": product_id, "quantity": 2}])
+    assert order.status_code == 201, order.text
+    assert _validate(client, tenant_id, product_id).json()["lines"][0]["available"] == 5
+    builds = tenant_snapshots.builds
+
+    r = client.patch(f"/orders/{order.json()['order_id']}/status", json={"status": "CONFIRMED"}, headers=headers)
+    assert r.status_code == 200, r.text
+
+    assert _validate(client, tenant_id, product_id).json()["lines"][0]["available"] == 3
+    assert tenant_snapshots.builds == builds
+
+
+def test_order_is_priced_from_database_not_snapshot(client, owner):
+    tenant_id, headers = owner
+    product_id = create_product(client, headers, price=100.0)
+    assert _validate(client, tenant_id, product_id).json()["lines"][0]["unit_price"] == 100.0
+
+    # Zmiana ceny z pominięciem wersji katalogu - migawka zostaje ze starą ceną
+    with SessionLocal() as db:
+        db.query(Product).filter(Product.product_id == product_id).update({"price": 120.0})
+        db.commit()
+
+    order = place_guest_order(client, tenant_id, [{"product_id": product_id, "quantity": 2}])
+    assert order.status_code == 201, order.text
+    with SessionLocal() as db:
+        assert db.get(StoreOrder, order.json()["order_id"]).total_amount == 240.0
+
+
+def test_truncated_snapshot_file_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "CATALOG_SNAPSHOT_DIR", str(tmp_path))
+    (tmp_path / "tenant-7-v3.snap").write_bytes(b"MSS1")
+
+    assert load_snapshot(7, 3) is None
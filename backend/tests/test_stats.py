@@ -0,0 +1,39 @@
+from conftest import SessionLocal, create_product, place_guest_order
+from app.modules.orders.rollups import rebuild_rollups
+
+
+def test_stats_sum_all_shards(client, owner):
+    tenant_id, headers = owner
+    product_id = create_product(client, headers, price=10.0, stock=100)
+    order_ids = []
+    for _ in range(12):
+        r = place_guest_order(client, tenant_id, [{"product_id": product_id, "quantity": 2}])
+        assert r.status_code == 201, r.text
+        order_ids.append(r.json()["order_id"])
+    r = client.patch(f"/orders/{order_ids[0]}/status", json={"status": "CONFIRMED"}, headers=headers)
+    assert r.status_code == 200, r.text
+
+    stats = client.get("/orders/stats", headers=headers)
+    assert stats.status_code == 200, stats.text
+    body = stats.json()
+    assert len(body["days"]) == 1
+    assert body["totals"]["placed_orders"] == 12
+    assert body["totals"]["placed_units"] == 24
+    assert body["totals"]["placed_revenue"] == 240.0
+    assert body["totals"]["confirmed_orders"] == 1
+
+    per_product = client.get("/orders/stats", params={"product_id": product_id}, headers=headers).json()
+    assert per_product["totals"]["placed_units"] == 24
+
+
+def test_rebuild_matches_incremental_totals(client, owner):
+    tenant_id, headers = owner
+    product_id = create_product(client, headers, price=10.0, stock=100)
+    for _ in range(3):
+        assert place_guest_order(client, tenant_id, [{"product_id": product_id, "quantity": 1}]).status_code == 201
+    before = client.get("/orders/stats", headers=headers).json()["totals"]
+
+    with SessionLocal() as db:
+        assert rebuild_rollups(db, tenant_id) > 0
+
+    assert client.get("/orders/stats", headers=headers).json()["totals"] == before
@@ -13,4 +13,35 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Token dostępu żyje krótko: po 401 raz odświeżamy go refresh tokenem i powtarzamy żądanie.
+// Równoległe żądania czekają na to samo odświeżenie.
+let refreshing = null;
+
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (error.response?.status !== 401 || !refreshToken || original._retried || original.url.startsWith('/auth/')) {
+      return Promise.reject(error);
+    }
+    original._retried = true;
+    try {
+      if (!refreshing) {
+        refreshing = axios.post(`${api.defaults.baseURL}/auth/refresh`, { refresh_token: refreshToken })
+          .finally(() => { refreshing = null; });
+      }
+      const { data } = await refreshing;
+      localStorage.setItem('token', data.access_token);
+      localStorage.setItem('refresh_token', data.refresh_token);
+      return api(original);
+    } catch (refreshError) {
+      // Refresh token wygasł albo został unieważniony - trzeba zalogować się ponownie
+      localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
+      return Promise.reject(error);
+    }
+  }
+);
+
 export default api;
\ No newline at end of file
@@ -1,10 +1,12 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import api from '../../api';
 
 // Dodajemy prop 'tenantId' (potrzebny tylko dla Gościa)
 const Cart = ({ items, onClearCart, tenantId }) => {
   const [status, setStatus] = useState(null); // 'success', 'error'
   const [loading, setLoading] = useState(false);
+  // Klucz idempotencji: ten sam dla ponowień tego samego zamówienia, nowy po sukcesie
+  const idempotencyKey = useRef(null);
   
   // --- STAN FORMULARZA ---
   const [showForm, setShowForm] = useState(false);
@@ -35,6 +37,11 @@ const Cart = ({ items, onClearCart, tenantId }) => {
     setStatus(null);
     setLoading(true);
 
+    if (!idempotencyKey.current) {
+      idempotencyKey.current = crypto.randomUUID();
+    }
+    const requestConfig = { headers: { 'Idempotency-Key': idempotencyKey.current } };
+
     // --- SKLEJANIE ADRESU DLA BACKENDU ---
     // Backend oczekuje jednego pola 'address', więc łączymy te 4 inputy w jeden napis.
     const combinedAddress = `${formData.street} ${formData.houseNumber}, ${formData.zipCode} ${formData.city}`;
@@ -57,7 +64,7 @@ const Cart = ({ items, onClearCart, tenantId }) => {
     try {
       if (!isGuest) {
         // --- 1. ZALOGOWANY WŁAŚCICIEL ---
-        await api.post('/orders/', orderPayload);
+        await api.post('/orders/', orderPayload, requestConfig);
       } else {
         // --- 2. GOŚĆ (KLIENT) ---
         if (!tenantId) {
@@ -71,10 +78,11 @@ const Cart = ({ items, onClearCart, tenantId }) => {
           ...orderPayload,
           email: formData.email,
           tenant_id: tenantId
-        });
+        }, requestConfig);
       }
 
       // --- SUKCES ---
+      idempotencyKey.current = null;
       setStatus('success');
       onClearCart();
       setShowForm(false); 
@@ -87,6 +95,10 @@ const Cart = ({ items, onClearCart, tenantId }) => {
 
     } catch (error) {
       console.error("Błąd zamówienia:", error);
+      // Serwer odpowiedział - kolejna próba to już nowe zamówienie (klucz zostaje tylko przy timeoucie)
+      if (error.response) {
+        idempotencyKey.current = null;
+      }
       alert("Błąd: " + (error.response?.data?.detail || "Nieznany błąd"));
       setStatus('error');
     } finally {
@@ -4,23 +4,41 @@ import api from '../../api';
 const OwnerOrderManager = () => {
   const [orders, setOrders] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [selected, setSelected] = useState([]); // ID zaznaczonych zamówień (tylko oczekujące)
+  const [statusFilter, setStatusFilter] = useState('NEW'); // domyślnie oczekujące - żadne nie ginie za starszymi
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // --- 1. POBIERANIE ZAMÓWIEŃ ---
-  const fetchOrders = async () => {
+  // Bez kursora: pierwsza strona (od najnowszych). Z kursorem: kolejna strona doklejana na koniec.
+  const fetchOrders = async (cursor = null) => {
     try {
-      const response = await api.get('/orders/manage');
-      setOrders(response.data);
+      const params = {};
+      if (statusFilter) params.status = statusFilter;
+      if (cursor) params.cursor = cursor;
+      const response = await api.get('/orders/manage', { params });
+      // Backend zwraca stronę: { limit, next_cursor, orders }
+      setOrders(prev => cursor ? [...prev, ...response.data.orders] : response.data.orders);
+      setNextCursor(response.data.next_cursor);
     } catch (err) {
       console.error("Błąd pobierania zamówień:", err);
       // alert("Nie udało się pobrać listy zamówień."); 
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
   useEffect(() => {
+    setLoading(true);
+    setSelected([]);
     fetchOrders();
-  }, []);
+  }, [statusFilter]);
+
+  const loadMore = () => {
+    setLoadingMore(true);
+    fetchOrders(nextCursor);
+  };
 
   // --- 2. OBSŁUGA ZMIANY STATUSU (ZATWIERDŹ / ODRZUĆ) ---
   const handleStatusChange = async (orderId, newStatus) => {
@@ -38,6 +56,31 @@ const OwnerOrderManager = () => {
     }
   };
 
+  // --- 2b. MASOWE ZATWIERDZANIE / ODRZUCANIE ZAZNACZONYCH ---
+  const pendingIds = orders.filter(o => o.status === 'NEW').map(o => o.order_id);
+
+  const toggleSelected = (orderId) => {
+    setSelected(prev => prev.includes(orderId) ? prev.filter(id => id !== orderId) : [...prev, orderId]);
+  };
+
+  const toggleAll = () => {
+    setSelected(selected.length === pendingIds.length ? [] : pendingIds);
+  };
+
+  const handleBulkStatus = async (newStatus) => {
+    try {
+      // Jedno żądanie dla całej paczki - backend zwraca wynik dla każdego zamówienia
+      const response = await api.post('/orders/bulk-status', { order_ids: selected, status: newStatus });
+      const { succeeded, failed, results } = response.data;
+      const errors = results.filter(r => !r.success).map(r => `#${r.order_id}: ${r.detail}`);
+      alert(`Zmieniono: ${succeeded}, nieudane: ${failed}` + (errors.length ? `\n${errors.join('\n')}` : ''));
+      setSelected([]);
+      fetchOrders();
+    } catch (err) {
+      alert(err.response?.data?.detail || "Błąd aktualizacji statusu");
+    }
+  };
+
   // --- 3. OBSŁUGA USUWANIA (CZYSZCZENIE HISTORII) ---
   const handleDelete = async (orderId) => {
     if (!window.confirm("Czy na pewno chcesz usunąć to zamówienie z historii?")) {
@@ -53,10 +96,45 @@ const OwnerOrderManager = () => {
     }
   };
 
-  if (loading) return <div className="text-center p-5">Ładowanie zamówień...</div>;
+  const filters = [
+    { value: 'NEW', label: 'Oczekujące' },
+    { value: 'CONFIRMED', label: 'Zatwierdzone' },
+    { value: 'REJECTED', label: 'Odrzucone' },
+    { value: '', label: 'Wszystkie' },
+  ];
 
   return (
     <div className="container mt-2">
+
+      {/* FILTR STATUSU */}
+      <div className="btn-group btn-group-sm mb-3">
+        {filters.map(f => (
+          <button
+            key={f.value || 'ALL'}
+            className={`btn ${statusFilter === f.value ? 'btn-dark' : 'btn-outline-dark'}`}
+            onClick={() => setStatusFilter(f.value)}
+          >
+            {f.label}
+          </button>
+        ))}
+      </div>
+
+      {loading ? (
+        <div className="text-center p-5">Ładowanie zamówień...</div>
+      ) : (
+      <>
+
+      {selected.length > 0 && (
+        <div className="d-flex align-items-center gap-2 mb-2">
+          <span className="text-muted small">Zaznaczone: {selected.length}</span>
+          <button className="btn btn-success btn-sm" onClick={() => handleBulkStatus('CONFIRMED')}>
+            ✅ Zatwierdź zaznaczone
+          </button>
+          <button className="btn btn-outline-danger btn-sm" onClick={() => handleBulkStatus('REJECTED')}>
+            ❌ Odrzuć zaznaczone
+          </button>
+        </div>
+      )}
       
       {orders.length === 0 ? (
         <div className="alert alert-info text-center">🎉 Wszystko posprzątane! Brak zamówień.</div>
@@ -65,6 +143,16 @@ const OwnerOrderManager = () => {
           <table className="table table-hover shadow-sm align-middle bg-white rounded">
             <thead className="table-light">
               <tr>
+                <th>
+                  <input
+                    type="checkbox"
+                    className="form-check-input"
+                    checked={pendingIds.length > 0 && selected.length === pendingIds.length}
+                    disabled={pendingIds.length === 0}
+                    onChange={toggleAll}
+                    title="Zaznacz wszystkie oczekujące"
+                  />
+                </th>
                 <th>ID</th>
                 <th>Data</th>
                 <th>Dane Klienta</th> {/* Zmieniliśmy nagłówek */}
@@ -76,6 +164,18 @@ const OwnerOrderManager = () => {
             <tbody>
               {orders.map((order) => (
                 <tr key={order.order_id}>
+                  {/* ZAZNACZENIE (tylko oczekujące) */}
+                  <td>
+                    {order.status === 'NEW' && (
+                      <input
+                        type="checkbox"
+                        className="form-check-input"
+                        checked={selected.includes(order.order_id)}
+                        onChange={() => toggleSelected(order.order_id)}
+                      />
+                    )}
+                  </td>
+
                   {/* ID */}
                   <td>#{order.order_id}</td>
                   
@@ -148,6 +248,17 @@ const OwnerOrderManager = () => {
           </table>
         </div>
       )}
+
+      {/* KOLEJNA STRONA (kursor z poprzedniej odpowiedzi) */}
+      {nextCursor && (
+        <div className="text-center mb-4">
+          <button className="btn btn-outline-secondary btn-sm" onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? 'Ładowanie...' : 'Załaduj starsze zamówienia'}
+          </button>
+        </div>
+      )}
+      </>
+      )}
     </div>
   );
 };
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import api from '../../api';
 import { jwtDecode } from "jwt-decode";
 
@@ -16,9 +16,17 @@ const ProductList = ({ onAddToCart, publicTenantId = null }) => {
   // Nowe stany sortowania
   const [sortBy, setSortBy] = useState("newest"); // newest, price, name
   const [sortOrder, setSortOrder] = useState("asc"); // asc, desc
+
+  // Kategorie (blok facets z API) i wybrana kategoria
+  const [facets, setFacets] = useState([]);
+  const [category, setCategory] = useState("");
   
   const LIMIT = 12;
 
+  // Kursory kolejnych stron (numer strony -> next_cursor z poprzedniej).
+  // Przejście o stronę dalej idzie po kursorze, skok na dowolną stronę - po numerze.
+  const cursorsRef = useRef({});
+
   // --- STANY EDYCJI ---
   const [editingId, setEditingId] = useState(null);
   const [tempPrice, setTempPrice] = useState("");
@@ -56,7 +64,10 @@ const ProductList = ({ onAddToCart, publicTenantId = null }) => {
       // Budujemy URL z parametrami
       let url = `/catalog/local/${targetTenantId}?page=${page}&limit=${LIMIT}`;
       
+      const cursor = cursorsRef.current[page];
+      if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
       if (activeSearch) url += `&search=${encodeURIComponent(activeSearch)}`;
+      if (category) url += `&category=${encodeURIComponent(category)}`;
       if (sortBy) url += `&sort_by=${sortBy}`;
       if (sortOrder) url += `&sort_order=${sortOrder}`;
 
@@ -64,7 +75,11 @@ const ProductList = ({ onAddToCart, publicTenantId = null }) => {
       
       if (response.data.products) {
           setProducts(response.data.products);
-          setTotalPages(Math.ceil(response.data.total / LIMIT));
+          setFacets(response.data.facets || []);
+          if (response.data.next_cursor) cursorsRef.current[page + 1] = response.data.next_cursor;
+          // total może pochodzić z cache - nie chowamy następnej strony, jeśli serwer ją zgłasza
+          const pagesFromTotal = Math.ceil(response.data.total / LIMIT);
+          setTotalPages(Math.max(pagesFromTotal, response.data.next_cursor ? page + 1 : page));
       } else {
           setProducts(response.data);
       }
@@ -76,11 +91,16 @@ const ProductList = ({ onAddToCart, publicTenantId = null }) => {
     }
   };
 
+  // Zmiana filtra / sortowania unieważnia zapamiętane kursory
+  useEffect(() => {
+    cursorsRef.current = {};
+  }, [publicTenantId, activeSearch, category, sortBy, sortOrder]);
+
   // Re-fetch przy każdej zmianie filtra
   useEffect(() => {
     fetchProducts();
     window.scrollTo({ top: 0, behavior: 'smooth' });
-  }, [publicTenantId, page, activeSearch, sortBy, sortOrder]);
+  }, [publicTenantId, page, activeSearch, category, sortBy, sortOrder]);
 
   const handleSearchSubmit = (e) => {
       e.preventDefault();
@@ -88,6 +108,11 @@ const ProductList = ({ onAddToCart, publicTenantId = null }) => {
       setActiveSearch(searchTerm);
   };
 
+  const handleCategoryChange = (value) => {
+      setCategory(value);
+      setPage(1);
+  };
+
   // Obsługa zmiany sortowania
   const handleSortChange = (e) => {
       const value = e.target.value;
@@ -173,6 +198,7 @@ const ProductList = ({ onAddToCart, publicTenantId = null }) => {
                         defaultValue="newest-desc"
                     >
                         <option value="newest-desc">🆕 Najnowsze</option>
+                        <option value="relevance-desc">🎯 Trafność (przy wyszukiwaniu)</option>
                         <option value="price-asc">💰 Cena: Od najniższej</option>
                         <option value="price-desc">💎 Cena: Od najwyższej</option>
                         <option value="name-asc">🔤 Nazwa: A-Z</option>
@@ -182,6 +208,24 @@ const ProductList = ({ onAddToCart, publicTenantId = null }) => {
             </div>
         </div>
 
+        {/* --- KATEGORIE (fasety) --- */}
+        {facets.length > 0 && (
+            <div className="d-flex flex-wrap gap-2 mb-4">
+                <button className={`btn btn-sm rounded-pill ${category === "" ? "btn-dark" : "btn-outline-secondary"}`} onClick={() => handleCategoryChange("")}>
+                    Wszystkie
+                </button>
+                {facets.map((facet) => (
+                    <button
+                        key={facet.category}
+                        className={`btn btn-sm rounded-pill ${category === facet.category ? "btn-dark" : "btn-outline-secondary"}`}
+                        onClick={() => handleCategoryChange(facet.category)}
+                    >
+                        {facet.category} <span className="opacity-75">({facet.count})</span>
+                    </button>
+                ))}
+            </div>
+        )}
+
         {/* --- LOADING --- */}
         {loading && <div className="text-center p-5"><div className="spinner-border text-primary"></div></div>}
         
@@ -217,7 +261,7 @@ const ProductList = ({ onAddToCart, publicTenantId = null }) => {
                     
                     <div className="card-body d-flex flex-column p-4">
                         <div className="mb-2">
-                            <small className="text-muted fw-bold" style={{fontSize: '0.7rem'}}>SKU: {product.sku}</small>
+                            <small className="text-muted fw-bold" style={{fontSize: '0.7rem'}}>SKU: {product.sku}{product.category && ` · ${product.category}`}</small>
                             <h5 className="card-title fw-bold mt-1 mb-0 text-truncate">{product.name}</h5>
                         </div>
                         <p className="card-text text-secondary small mb-3 flex-grow-1" style={{lineHeight: '1.5'}}>
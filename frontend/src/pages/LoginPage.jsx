@@ -39,6 +39,7 @@ const LoginPage = () => {
         
         // Zapisujemy token
         localStorage.setItem('token', response.data.access_token);
+        localStorage.setItem('refresh_token', response.data.refresh_token);
         
         // Przekierowanie do sklepu (wcześniej było /dashboard, teraz /store)
         navigate('/store');
@@ -37,6 +37,7 @@ const StorePage = () => {
 
   const handleLogout = () => {
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     navigate('/');
   };
 